@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+from typing import Optional, Dict, Set, AsyncIterator
+from dotenv import load_dotenv
+from .metrics import metrics
+
+load_dotenv()
+
+# NOTIFY channel written by the triggers from migration 0002
+CHANGE_CHANNEL = "schema_changes"
+
+class Subscription:
+    """One client's bounded queue of pre-formatted SSE messages"""
+    __slots__ = ('project_id', 'queue', 'overflowed')
+    
+    def __init__(self, project_id: Optional[int], queue_size: int):
+        self.project_id = project_id
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+    
+    def push(self, message: str):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A slow client is told to reload instead of holding memory for it
+            self.overflowed = True
+            events_dropped.inc()
+
+class ChangeFeed:
+    """
+    Fan database change notifications out to Server-Sent Event subscribers.
+    
+    Subscribers are indexed by project, so an event costs one formatted
+    string plus a queue put per interested subscriber; idle subscribers are
+    a queue and a suspended generator each.
+    """
+    
+    def __init__(self, queue_size: Optional[int] = None, heartbeat_seconds: Optional[float] = None):
+        if queue_size is None:
+            queue_size = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "100"))
+        if heartbeat_seconds is None:
+            heartbeat_seconds = float(os.getenv("CHANGE_FEED_HEARTBEAT", "15"))
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        # None holds the subscribers to every project
+        self._subscribers: Dict[Optional[int], Set[Subscription]] = {}
+        self._sequence = 0
+    
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+    
+    def subscribe(self, project_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription(project_id, self.queue_size)
+        self._subscribers.setdefault(project_id, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.project_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.project_id]
+    
+    def handle_notification(self, payload: Optional[str]):
+        """Listener callback for CHANGE_CHANNEL; None means events were missed"""
+        self._sequence += 1
+        if payload is None:
+            message = self._format("reset", "{}")
+            for subscribers in list(self._subscribers.values()):
+                for subscription in subscribers:
+                    subscription.push(message)
+            return
+        event = json.loads(payload)
+        # The payload is already JSON, so it is forwarded without re-encoding
+        message = self._format(event['resource'], payload)
+        events_published.inc()
+        targets = list(self._subscribers.get(None, ()))
+        if event.get('project_id') is not None:
+            targets.extend(self._subscribers.get(event['project_id'], ()))
+        for subscription in targets:
+            subscription.push(message)
+    
+    def _format(self, event: str, data: str) -> str:
+        return f"id: {self._sequence}\nevent: {event}\ndata: {data}\n\n"
+    
+    async def stream(self, project_id: Optional[int] = None) -> AsyncIterator[str]:
+        """SSE body for one client; unsubscribes when the client goes away"""
+        subscription = self.subscribe(project_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if subscription.overflowed:
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.overflowed = False
+                    yield self._format("reset", "{}")
+                    continue
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+# Global change feed instance
+change_feed = ChangeFeed()
+
+events_published = metrics.counter(
+    "change_feed_events_total", "Database change notifications fanned out to subscribers"
+)
+events_dropped = metrics.counter(
+    "change_feed_dropped_total", "Messages dropped because a subscriber's queue was full"
+)
+metrics.gauge(
+    "change_feed_subscribers", "Open change feed subscriptions",
+    lambda: change_feed.subscriber_count
+)
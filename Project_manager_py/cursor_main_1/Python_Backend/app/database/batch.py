@@ -0,0 +1,107 @@
+import asyncpg
+from typing import List, Dict, Any, Callable, NamedTuple, Type
+from pydantic import BaseModel, ValidationError
+from .connection import db_manager
+from .operations import DatabaseOperations
+from ..models.database_models import (
+    ProjectCreate, ProjectUpdate, TableCreate, TableUpdate, TableFieldCreate, TableFieldUpdate
+)
+
+REFERENCE_PREFIX = "$"
+
+class BatchError(Exception):
+    """Raised when one operation of a batch fails; the whole batch is rolled back"""
+    
+    def __init__(self, index: int, status_code: int, message: str):
+        super().__init__(message)
+        self.index = index
+        self.status_code = status_code
+
+class _Resource(NamedTuple):
+    key: str
+    create_model: Type[BaseModel]
+    update_model: Type[BaseModel]
+    create: Callable
+    get: Callable
+    update: Callable
+    delete: Callable
+
+RESOURCES: Dict[str, _Resource] = {
+    "project": _Resource(
+        "project_id", ProjectCreate, ProjectUpdate, DatabaseOperations.create_project,
+        DatabaseOperations.get_project_by_id, DatabaseOperations.update_project,
+        DatabaseOperations.delete_project
+    ),
+    "table": _Resource(
+        "table_id", TableCreate, TableUpdate, DatabaseOperations.create_table,
+        DatabaseOperations.get_table_by_id, DatabaseOperations.update_table,
+        DatabaseOperations.delete_table
+    ),
+    "field": _Resource(
+        "table_wise_field_id", TableFieldCreate, TableFieldUpdate, DatabaseOperations.create_field,
+        DatabaseOperations.get_field_by_id, DatabaseOperations.update_field,
+        DatabaseOperations.delete_field
+    ),
+}
+
+def _resolve(value: Any, refs: Dict[str, int], index: int) -> Any:
+    if isinstance(value, str) and value.startswith(REFERENCE_PREFIX):
+        name = value[len(REFERENCE_PREFIX):]
+        if name not in refs:
+            raise BatchError(index, 422, f"Unknown reference '{value}'; refs must come from earlier operations")
+        return refs[name]
+    return value
+
+async def _execute(index: int, operation: Dict[str, Any], refs: Dict[str, int]) -> Dict[str, Any]:
+    resource = RESOURCES[operation['resource']]
+    # IDs of other rows may point at earlier operations; other values are taken literally
+    data = {
+        key: _resolve(value, refs, index) if key.endswith('_id') else value
+        for key, value in operation['data'].items()
+    }
+    try:
+        if operation['op'] == 'create':
+            row = await resource.create(resource.create_model(**data).dict())
+            return {"id": row[resource.key], "data": row}
+        
+        row_id = _resolve(operation['id'], refs, index)
+        if not isinstance(row_id, int):
+            raise BatchError(index, 422, f"'{operation['op']}' needs an integer id or a reference")
+        if operation['op'] == 'delete':
+            if not await resource.delete(row_id):
+                raise BatchError(index, 404, f"{operation['resource'].capitalize()} {row_id} not found")
+            return {"id": row_id, "data": None}
+        
+        # Partial update: omitted or null values keep their current value
+        changes = {k: v for k, v in resource.update_model(**data).dict().items() if v is not None}
+        current = await resource.get(row_id)
+        if current is None:
+            raise BatchError(index, 404, f"{operation['resource'].capitalize()} {row_id} not found")
+        row = await resource.update(row_id, {**current, **changes})
+        return {"id": row_id, "data": row}
+    except ValidationError as e:
+        raise BatchError(index, 422, str(e))
+    except asyncpg.IntegrityConstraintViolationError as e:
+        raise BatchError(index, 409, str(e))
+
+async def execute_batch(operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Apply operations in order on one connection inside a single transaction.
+    
+    Any failure rolls back every operation and raises BatchError naming the
+    failing index. Cache invalidations are applied only after the commit.
+    """
+    refs: Dict[str, int] = {}
+    results = []
+    async with db_manager.transaction():
+        for index, operation in enumerate(operations):
+            outcome = await _execute(index, operation, refs)
+            if operation.get('ref'):
+                refs[operation['ref']] = outcome['id']
+            results.append({
+                "index": index,
+                "op": operation['op'],
+                "resource": operation['resource'],
+                **outcome,
+            })
+    return results
@@ -1,38 +1,429 @@
+import asyncio
+import contextvars
 import os
+import time
 import asyncpg
-from typing import Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Optional, Dict, Any, Callable, Tuple, Deque
+from urllib.parse import urlsplit, parse_qs
 from dotenv import load_dotenv
+from ..metrics import metrics
+from . import queries
+from .queries import QUERIES, PreparedConnection, prepare_statements
 
 load_dotenv()
 
-class DatabaseManager:
+class PoolOverloadedError(Exception):
+    """Raised when a connection cannot be handed out fast enough; maps to 503"""
+    
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+STATEMENT_MODES = ("implicit", "prepared", "pgbouncer")
+
+class PoolSettings:
+    """Pool sizing and timeout settings, read from the environment"""
+    
     def __init__(self):
+        self.min_size = int(os.getenv("PG_POOL_MIN_SIZE", "1"))
+        self.max_size = int(os.getenv("PG_POOL_MAX_SIZE", "10"))
+        # Seconds an idle connection is kept before being closed (0 keeps it forever)
+        self.max_inactive_lifetime = float(os.getenv("PG_POOL_MAX_INACTIVE_LIFETIME", "300"))
+        # Seconds to wait for a free connection before giving up (0 waits forever)
+        self.acquire_timeout = float(os.getenv("PG_POOL_ACQUIRE_TIMEOUT", "10"))
+        # Seconds a single statement may run, enforced by the server and the client (0 disables)
+        self.statement_timeout = float(os.getenv("PG_STATEMENT_TIMEOUT", "30"))
+        self.statement_cache_size = int(os.getenv("PG_STATEMENT_CACHE_SIZE", "100"))
+        # Callers allowed to queue for a connection before requests are shed (0 disables)
+        self.max_queue = int(os.getenv("PG_POOL_MAX_QUEUE", "100"))
+        self.retry_after = int(os.getenv("PG_POOL_RETRY_AFTER", "1"))
+        # implicit: asyncpg's per-connection LRU statement cache
+        # prepared: every registered statement is prepared when a connection opens
+        # pgbouncer: unnamed statements only, safe behind transaction pooling
+        self.statement_mode = os.getenv("PG_STATEMENT_MODE", "implicit").lower()
+        if self.statement_mode not in STATEMENT_MODES:
+            raise ValueError(
+                f"PG_STATEMENT_MODE must be one of {', '.join(STATEMENT_MODES)}, got '{self.statement_mode}'"
+            )
+        # Comma-separated DSNs of read replicas; GET requests read from them when set
+        self.replica_urls = [url.strip() for url in os.getenv("PG_REPLICA_URLS", "").split(",") if url.strip()]
+        # Seconds a replica may trail the primary before its reads go to the primary instead
+        self.replica_max_lag = float(os.getenv("PG_REPLICA_MAX_LAG", "5"))
+        self.replica_check_interval = float(os.getenv("PG_REPLICA_CHECK_INTERVAL", "2"))
+        # Seconds a client's reads wait for its last write to reach a replica
+        self.read_your_writes_ttl = int(os.getenv("PG_READ_YOUR_WRITES_TTL", "60"))
+    
+    def pool_kwargs(self) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "max_inactive_connection_lifetime": self.max_inactive_lifetime,
+            "statement_cache_size": self.statement_cache_size,
+        }
+        if self.statement_mode == "prepared":
+            kwargs["connection_class"] = PreparedConnection
+            kwargs["init"] = prepare_statements
+            # Leave room for the dynamic list queries so they cannot evict the registry
+            kwargs["statement_cache_size"] = max(self.statement_cache_size, 2 * len(QUERIES))
+            # asyncpg expires cached statements after 300 s by default, which
+            # would quietly turn this mode back into implicit
+            kwargs["max_cached_statement_lifetime"] = 0
+        elif self.statement_mode == "pgbouncer":
+            kwargs["statement_cache_size"] = 0
+        if self.statement_timeout > 0:
+            kwargs["command_timeout"] = self.statement_timeout
+            kwargs["server_settings"] = {"statement_timeout": str(int(self.statement_timeout * 1000))}
+        return kwargs
+
+def connect_params() -> Dict[str, Any]:
+    """Server and credentials from the PG* environment variables"""
+    return {
+        "host": os.getenv("PGHOST", "localhost"),
+        "user": os.getenv("PGUSER"),
+        "password": os.getenv("PGPASSWORD"),
+        "database": os.getenv("PGDATABASE"),
+        "port": int(os.getenv("PGPORT", "5432")),
+    }
+
+# Per-request state shared with LoadSheddingMiddleware; a mutable dict so that
+# flags set deep inside a handler are visible to the middleware afterwards
+request_pool_state: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "request_pool_state", default=None
+)
+
+# Set by ReplicaRoutingMiddleware for GET requests: the WAL position a replica
+# must have replayed to serve them, and the replica the request has read from
+request_read_routing: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "request_read_routing", default=None
+)
+
+# What primary_lsn() reports when the primary cannot be read; no replica replays this far
+UNKNOWN_LSN = 2 ** 63 - 1
+
+class Replica:
+    """A read replica's pool and what the last health check found"""
+    __slots__ = ('name', 'dsn', 'pool', 'healthy', 'lsn', 'lag')
+    
+    def __init__(self, index: int, dsn: str):
+        parts = urlsplit(dsn)
+        # Unix socket DSNs carry the host and port as query parameters
+        query = parse_qs(parts.query)
+        host = parts.hostname or query.get("host", ["localhost"])[0]
+        port = parts.port or query.get("port", ["5432"])[0]
+        self.name = f"{index}:{host}:{port}"
+        self.dsn = dsn
+        self.pool: Optional[asyncpg.Pool] = None
+        self.healthy = False
+        # Replayed WAL position, as a byte offset
+        self.lsn = 0
+        # Seconds of primary writes not yet replayed, measured against recorded primary positions
+        self.lag = 0.0
+    
+    def available(self, max_lag: float) -> bool:
+        return self.pool is not None and self.healthy and self.lag <= max_lag
+
+class _BoundTransaction:
+    """The connection of an open DatabaseManager.transaction() and what to run once it commits"""
+    __slots__ = ('conn', 'after_commit')
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.after_commit: List[Tuple[Callable, tuple]] = []
+
+# Set while a task is inside DatabaseManager.transaction(); acquire() hands out
+# the bound connection instead of checking out another one
+_bound_transaction: contextvars.ContextVar[Optional[_BoundTransaction]] = contextvars.ContextVar(
+    "bound_transaction", default=None
+)
+
+class DatabaseManager:
+    def __init__(self, settings: Optional[PoolSettings] = None):
+        self.settings = settings or PoolSettings()
         self.pool: Optional[asyncpg.Pool] = None
+        self.replicas = [Replica(index, dsn) for index, dsn in enumerate(self.settings.replica_urls)]
+        self.waiting = 0
+        self._channels: Dict[str, List[Callable[[Optional[str]], None]]] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        # (monotonic time, primary WAL position) of recent health checks, oldest first
+        self._primary_positions: Deque[Tuple[float, int]] = deque()
+        self._next_replica = 0
+    
+    @property
+    def overloaded(self) -> bool:
+        """Whether the acquire queue has reached the shedding threshold"""
+        return 0 < self.settings.max_queue <= self.waiting
     
     async def create_pool(self):
         """Create database connection pool"""
         try:
-            self.pool = await asyncpg.create_pool(
-                host=os.getenv("PGHOST", "localhost"),
-                user=os.getenv("PGUSER"),
-                password=os.getenv("PGPASSWORD"),
-                database=os.getenv("PGDATABASE"),
-                port=int(os.getenv("PGPORT", "5432")),
-                min_size=1,
-                max_size=10
-            )
-            print("Database connection pool created successfully")
-            return self.pool
+            self.pool = await asyncpg.create_pool(**connect_params(), **self.settings.pool_kwargs())
+            print(f"Database connection pool created successfully ({self.settings.statement_mode} statements)")
         except Exception as e:
             print(f"Failed to create database pool: {e}")
             raise e
+        if self.replicas:
+            await self._check_replicas()
+            self._monitor_task = asyncio.create_task(self._monitor_replicas())
+        return self.pool
     
     async def close_pool(self):
         """Close database connection pool"""
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+            self._monitor_task = None
+        for replica in self.replicas:
+            if replica.pool is not None:
+                await replica.pool.close()
+                replica.pool, replica.healthy = None, False
         if self.pool:
             await self.pool.close()
             print("Database connection pool closed")
     
+    @asynccontextmanager
+    async def acquire(self, primary: bool = False):
+        """
+        Acquire a pool connection for the block, recording how long the caller waited.
+        
+        Inside a GET request routed by ReplicaRoutingMiddleware the connection
+        comes from a replica, unless primary is set or no replica is healthy,
+        within PG_REPLICA_MAX_LAG and past the client's last write.
+        """
+        bound = _bound_transaction.get()
+        if bound is not None:
+            yield bound.conn
+            return
+        if not self.pool:
+            raise Exception("Database pool not initialized")
+        replica = None if primary else self._read_replica()
+        conn = None
+        if replica is not None:
+            pool = replica.pool
+            try:
+                conn = await self._checkout(pool)
+                replica_reads.inc(replica.name)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                # Down since the last health check; the next one brings it back
+                self._replica_down(replica, e)
+                replica_fallbacks.inc("error")
+        if conn is None:
+            pool = self.pool
+            conn = await self._checkout(pool)
+        try:
+            yield conn
+        finally:
+            await pool.release(conn)
+    
+    async def _checkout(self, pool: asyncpg.Pool):
+        if self.overloaded:
+            self._shed("Database connection queue is full")
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            return await pool.acquire(timeout=self.settings.acquire_timeout or None)
+        except asyncio.TimeoutError:
+            self._shed("Timed out waiting for a database connection")
+        finally:
+            self.waiting -= 1
+            pool_acquire_wait.observe(time.perf_counter() - start)
+    
+    def _read_replica(self) -> Optional[Replica]:
+        """The replica to serve the current request's reads, or None for the primary"""
+        routing = request_read_routing.get()
+        if routing is None or not self.replicas:
+            return None
+        max_lag, min_lsn = self.settings.replica_max_lag, routing["min_lsn"]
+        # Every read of a request goes to one replica, so it sees a single point in time
+        replica = routing["replica"]
+        if replica is not None and replica.available(max_lag) and replica.lsn >= min_lsn:
+            return replica
+        candidates = [replica for replica in self.replicas if replica.available(max_lag)]
+        if not candidates:
+            replica_fallbacks.inc("unavailable")
+            return None
+        candidates = [replica for replica in candidates if replica.lsn >= min_lsn]
+        if not candidates:
+            replica_fallbacks.inc("read_your_writes")
+            return None
+        self._next_replica += 1
+        routing["replica"] = candidates[self._next_replica % len(candidates)]
+        return routing["replica"]
+    
+    async def primary_lsn(self) -> int:
+        """The primary's current WAL position; UNKNOWN_LSN if it cannot be read"""
+        try:
+            async with self.pool.acquire(timeout=self.settings.acquire_timeout or None) as conn:
+                return await queries.fetchval(conn, "wal.primary_lsn")
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError):
+            return UNKNOWN_LSN
+    
+    async def _monitor_replicas(self):
+        while True:
+            await asyncio.sleep(self.settings.replica_check_interval)
+            await self._check_replicas()
+    
+    async def _check_replicas(self):
+        """
+        Record the primary's WAL position, then read each replica's replayed one.
+        
+        A replica's lag is the age of the oldest recorded primary position it
+        has not replayed, so it stays zero for a replica that keeps up, even
+        while the primary is idle, and grows for one that stopped replaying.
+        """
+        now = time.monotonic()
+        lsn = await self.primary_lsn()
+        if lsn != UNKNOWN_LSN:
+            positions = self._primary_positions
+            positions.append((now, lsn))
+            # Positions older than the lag limit only tell that a replica is too far behind
+            horizon = now - self.settings.replica_max_lag - self.settings.replica_check_interval
+            while len(positions) > 1 and positions[1][0] < horizon:
+                positions.popleft()
+        await asyncio.gather(*(self._check_replica(replica, now) for replica in self.replicas))
+    
+    async def _check_replica(self, replica: Replica, now: float):
+        timeout = self.settings.replica_check_interval
+        try:
+            if replica.pool is None:
+                replica.pool = await asyncpg.create_pool(
+                    dsn=replica.dsn, timeout=timeout, **self.settings.pool_kwargs()
+                )
+            async with replica.pool.acquire(timeout=timeout) as conn:
+                lsn = await asyncio.wait_for(queries.fetchval(conn, "wal.replica_lsn"), timeout)
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            self._replica_down(replica, e)
+            if replica.pool is not None:
+                # Rebuilt by the next successful check, so no dead connection outlives the outage
+                pool, replica.pool = replica.pool, None
+                try:
+                    await asyncio.wait_for(pool.close(), timeout)
+                except asyncio.TimeoutError:
+                    pool.terminate()
+            return
+        if not replica.healthy:
+            print(f"Reading from replica {replica.name}")
+        replica.healthy, replica.lsn, replica.lag = True, lsn, 0.0
+        for recorded_at, position in reversed(self._primary_positions):
+            if position <= lsn:
+                break
+            replica.lag = now - recorded_at
+    
+    def _replica_down(self, replica: Replica, error: Exception):
+        if replica.healthy:
+            print(f"Replica {replica.name} is unavailable, reading from the primary: {error}")
+        replica.healthy = False
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Run every acquire() in the block on one connection inside a single transaction.
+        
+        Nested calls open a savepoint. The connection must not be used from
+        tasks spawned inside the block, which would share it concurrently.
+        """
+        bound = _bound_transaction.get()
+        if bound is not None:
+            async with bound.conn.transaction():
+                yield bound.conn
+            return
+        async with self.acquire(primary=True) as conn:
+            bound = _BoundTransaction(conn)
+            token = _bound_transaction.set(bound)
+            try:
+                async with conn.transaction():
+                    yield conn
+            finally:
+                _bound_transaction.reset(token)
+        for callback, args in bound.after_commit:
+            callback(*args)
+    
+    @property
+    def in_transaction(self) -> bool:
+        """True inside a transaction() block"""
+        return _bound_transaction.get() is not None
+    
+    def after_commit(self, callback: Callable, *args):
+        """Call callback(*args) once the bound transaction commits, or now if there is none"""
+        bound = _bound_transaction.get()
+        if bound is not None:
+            bound.after_commit.append((callback, args))
+        else:
+            callback(*args)
+    
+    def _shed(self, message: str):
+        pool_shed.inc()
+        state = request_pool_state.get()
+        if state is not None:
+            state["overloaded"] = True
+        raise PoolOverloadedError(message, self.settings.retry_after)
+    
+    def listen(self, channel: str, callback: Callable[[Optional[str]], None]):
+        """
+        Call callback(payload) for every NOTIFY on channel, via the listener connection.
+        
+        callback(None) means notifications may have been missed while the
+        listener was reconnecting, so anything derived from them is stale.
+        """
+        callbacks = self._channels.setdefault(channel, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+    
+    async def start_listener(self):
+        """Start the single dedicated LISTEN connection shared by every channel"""
+        if self._channels and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._run_listener())
+    
+    async def stop_listener(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+    
+    async def _run_listener(self):
+        delay, connected_before = 1, False
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(**connect_params())
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                for channel in self._channels:
+                    await conn.add_listener(channel, self._notify)
+                print(f"Listening for notifications on {', '.join(self._channels)}")
+                if connected_before:
+                    # Whatever was published while disconnected is lost
+                    self._notify_all(None)
+                connected_before, delay = True, 1
+                await lost.wait()
+                print("Notification listener connection lost")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                print(f"Notification listener failed: {e}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+    
+    def _notify(self, conn, pid: int, channel: str, payload: str):
+        for callback in self._channels.get(channel, []):
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"Notification handler for {channel} failed: {e}")
+    
+    def _notify_all(self, payload: Optional[str]):
+        for channel in self._channels:
+            self._notify(None, 0, channel, payload)
+    
     async def get_connection(self):
         """Get a connection from the pool"""
         if not self.pool:
@@ -45,4 +436,38 @@ class DatabaseManager:
             await self.pool.release(conn)
 
 # Global database manager instance
-db_manager = DatabaseManager() 
\ No newline at end of file
+db_manager = DatabaseManager()
+
+pool_acquire_wait = metrics.histogram(
+    "db_pool_acquire_wait_seconds", "Time spent waiting for a pool connection"
+)
+pool_shed = metrics.counter(
+    "db_pool_shed_total", "Connection requests rejected because the pool was overloaded"
+)
+metrics.gauge(
+    "db_pool_size", "Open pool connections",
+    lambda: db_manager.pool.get_size() if db_manager.pool else None
+)
+metrics.gauge(
+    "db_pool_idle_connections", "Idle pool connections",
+    lambda: db_manager.pool.get_idle_size() if db_manager.pool else None
+)
+metrics.gauge(
+    "db_pool_in_use_connections", "Pool connections checked out",
+    lambda: db_manager.pool.get_size() - db_manager.pool.get_idle_size() if db_manager.pool else None
+)
+replica_reads = metrics.counter(
+    "db_replica_reads_total", "Connections handed out from a read replica", labels=("replica",)
+)
+replica_fallbacks = metrics.counter(
+    "db_replica_fallbacks_total", "GET request reads served by the primary instead of a replica", labels=("reason",)
+)
+metrics.gauge(
+    "db_replicas_available", "Read replicas healthy and within the lag limit",
+    lambda: sum(replica.available(db_manager.settings.replica_max_lag) for replica in db_manager.replicas)
+    if db_manager.replicas else None
+)
+metrics.gauge(
+    "db_pool_waiting", "Callers waiting for a pool connection",
+    lambda: db_manager.waiting
+) 
\ No newline at end of file
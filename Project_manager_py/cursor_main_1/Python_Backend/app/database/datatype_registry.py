@@ -0,0 +1,100 @@
+import asyncio
+import os
+import time
+from typing import List, Optional, Dict, Any
+from dotenv import load_dotenv
+from .connection import db_manager
+from . import queries
+from ..generation.cache import sql_cache
+
+load_dotenv()
+
+class DatatypeRegistry:
+    """Process-local cache of the field_datatype lookup table"""
+    
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("DATATYPE_CACHE_TTL", "300"))
+        # A TTL of 0 keeps the registry until it is explicitly invalidated
+        self.ttl_seconds = ttl_seconds
+        self._rows: List[Dict[str, Any]] = []
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._type_maps: Dict[str, Dict[int, str]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+    
+    @property
+    def is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        if self.ttl_seconds <= 0:
+            return False
+        return time.monotonic() - self._loaded_at > self.ttl_seconds
+    
+    async def load(self) -> int:
+        """Load all datatypes from the database, replacing the cached copy"""
+        async with self._lock:
+            return await self._load()
+    
+    async def _load(self) -> int:
+        async with db_manager.acquire() as conn:
+            rows = await queries.fetch(conn, "datatype.list")
+        loaded = [dict(row) for row in rows]
+        if self._rows and loaded != self._rows:
+            # Generated SQL embeds native type names
+            sql_cache.clear()
+        self._rows = loaded
+        self._by_id = {row['field_datatype_id']: row for row in self._rows}
+        self._type_maps = {}
+        self._loaded_at = time.monotonic()
+        print(f"Datatype registry loaded {len(self._rows)} datatypes")
+        return len(self._rows)
+    
+    def invalidate(self):
+        """Mark the registry stale so the next lookup reloads it"""
+        self._loaded_at = None
+    
+    async def ensure_fresh(self):
+        """Reload the registry if it was never loaded, expired or invalidated"""
+        if not self.is_stale:
+            return
+        async with self._lock:
+            # Another task may have reloaded while we waited for the lock
+            if self.is_stale:
+                await self._load()
+    
+    async def get_all(self) -> List[Dict[str, Any]]:
+        """Get all datatypes ordered by ID"""
+        await self.ensure_fresh()
+        return list(self._rows)
+    
+    async def get(self, datatype_id: int) -> Optional[Dict[str, Any]]:
+        """Get a datatype by ID"""
+        await self.ensure_fresh()
+        return self._by_id.get(datatype_id)
+    
+    def exists(self, datatype_id: int) -> bool:
+        """Check a datatype ID against the loaded registry"""
+        return datatype_id in self._by_id
+    
+    def resolve(self, datatype_id: int, dialect: str = "postgresql", default: str = "TEXT") -> str:
+        """Resolve a datatype ID to its type for a dialect from the loaded registry"""
+        datatype = self._by_id.get(datatype_id)
+        if not datatype or not datatype.get(dialect):
+            return default
+        return datatype[dialect]
+    
+    def type_map(self, dialect: str = "postgresql") -> Dict[int, str]:
+        """Map every loaded datatype ID to its native type for a dialect"""
+        types = self._type_maps.get(dialect)
+        if types is None:
+            types = {
+                datatype_id: datatype[dialect]
+                for datatype_id, datatype in self._by_id.items()
+                if datatype.get(dialect)
+            }
+            self._type_maps[dialect] = types
+        return types
+
+# Global datatype registry instance
+datatype_registry = DatatypeRegistry()
\ No newline at end of file
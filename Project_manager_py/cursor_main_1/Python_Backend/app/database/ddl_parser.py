@@ -0,0 +1,440 @@
+import re
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
+
+# Statements kinds worth keeping; the text of anything else (INSERT data
+# in particular) is dropped as soon as its first word is known
+RELEVANT_STATEMENTS = ("CREATE", "ALTER", "COMMENT")
+
+_SPECIAL = re.compile(r"--|/\*|'|\"|`|;|\$[A-Za-z_0-9]*\$")
+_PARTIAL_TAIL = re.compile(r"(?:-|/|\$[A-Za-z_0-9]*)$")
+_FIRST_WORD = re.compile(r"\s*([A-Za-z]+)\W")
+# The rest of a quoted string or identifier, closing quote included
+_QUOTED = {
+    "'": re.compile(r"[^']*(?:''[^']*)*'"),
+    '"': re.compile(r'[^"]*(?:""[^"]*)*"'),
+    "`": re.compile(r"[^`]*(?:``[^`]*)*`"),
+}
+_BACKSLASH_QUOTED = re.compile(r"[^'\\]*(?:(?:''|\\.)[^'\\]*)*'", re.DOTALL)
+
+class StatementSplitter:
+    """
+    Split SQL text fed in chunks into statements, with comments removed.
+    
+    Quoted strings, quoted identifiers and dollar-quoted bodies are kept
+    intact. Backslash escapes in strings are honoured once a backtick is
+    seen, since only MySQL scripts quote identifiers that way.
+    """
+    
+    def __init__(self):
+        self._buffer = ""
+        self._parts: List[str] = []
+        # The statement's text until its first word is known, then None
+        self._head: Optional[str] = ""
+        self._skipping = False
+        self.backslash_escapes = False
+        self.statements = 0
+    
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        return self._scan(final=False)
+    
+    def close(self) -> List[str]:
+        statements = self._scan(final=True)
+        self._append(self._buffer)
+        self._buffer = ""
+        statement = self._finish()
+        if statement:
+            statements.append(statement)
+        return statements
+    
+    def _append(self, text: str):
+        if self._skipping or not text:
+            return
+        self._parts.append(text)
+        if self._head is None:
+            return
+        self._head += text
+        match = _FIRST_WORD.match(self._head)
+        if match:
+            self._head = None
+            if match.group(1).upper() not in RELEVANT_STATEMENTS:
+                self._skipping = True
+                self._parts = []
+        elif self._head.strip() and not self._head.lstrip()[0].isalpha():
+            # Not starting with a word, so kept as it always was
+            self._head = None
+    
+    def _finish(self) -> Optional[str]:
+        statement = None if self._skipping else "".join(self._parts).strip()
+        if self._skipping or statement:
+            self.statements += 1
+        self._parts = []
+        self._head = ""
+        self._skipping = False
+        return statement or None
+    
+    def _scan(self, final: bool) -> List[str]:
+        buffer, position, statements = self._buffer, 0, []
+        while True:
+            match = _SPECIAL.search(buffer, position)
+            if match is None:
+                # A token may continue in the next chunk
+                tail = None if final else _PARTIAL_TAIL.search(buffer, max(position, len(buffer) - 64))
+                end = tail.start() if tail else len(buffer)
+                self._append(buffer[position:end])
+                position = end
+                break
+            token = match.group()
+            start = match.start()
+            if token == ";":
+                self._append(buffer[position:start])
+                statement = self._finish()
+                if statement:
+                    statements.append(statement)
+                position = match.end()
+                continue
+            if token == "`":
+                self.backslash_escapes = True
+            end = self._closing(buffer, token, match.end(), final)
+            if end is None:
+                if final:
+                    raise ValueError("Unterminated quote or comment at the end of the script")
+                self._append(buffer[position:start])
+                position = start
+                break
+            if token in ("--", "/*"):
+                # Comments become whitespace
+                self._append(buffer[position:start] + " ")
+            else:
+                self._append(buffer[position:end])
+            position = end
+        self._buffer = buffer[position:]
+        return statements
+    
+    def _closing(self, buffer: str, token: str, start: int, final: bool) -> Optional[int]:
+        """End of the quoted text or comment opened by token, or None if it is not in the buffer yet"""
+        if token == "--":
+            end = buffer.find("\n", start)
+            return None if end < 0 else end
+        if token == "/*":
+            end = buffer.find("*/", start)
+            return None if end < 0 else end + 2
+        if token.startswith("$"):
+            end = buffer.find(token, start)
+            return None if end < 0 else end + len(token)
+        pattern = _BACKSLASH_QUOTED if token == "'" and self.backslash_escapes else _QUOTED[token]
+        match = pattern.match(buffer, start)
+        if match is None:
+            return None
+        end = match.end()
+        # A quote right after the match, or one in the next chunk, would make it a doubled quote
+        if (end < len(buffer) and buffer[end] == token) or (end == len(buffer) and not final):
+            return None
+        return end
+
+_TOKEN = re.compile(
+    r"""\s*(?:([A-Za-z_][A-Za-z_0-9$]*)|(\d+(?:\.\d+)?)|'([^'\\]*(?:(?:''|\\.)[^'\\]*)*)'"""
+    r"""|"([^"]*(?:""[^"]*)*)"|`([^`]*(?:``[^`]*)*)`|(\S))""",
+    re.DOTALL
+)
+# Token kinds by _TOKEN group
+_TOKEN_KINDS = (None, "word", "number", "string", "ident", "ident", "symbol")
+
+class Token(NamedTuple):
+    kind: str  # "ident" (quoted), "word", "string", "number" or "symbol"
+    value: str
+    # Keyword comparisons match unquoted words only
+    upper: str = ""
+
+def tokenize(statement: str) -> List[Token]:
+    tokens = []
+    for match in _TOKEN.finditer(statement):
+        group = match.lastindex
+        if group is None:
+            continue
+        value = match.group(group)
+        if group == 1:
+            tokens.append(Token("word", value, value.upper()))
+        elif group == 3:
+            tokens.append(Token("string", value.replace("''", "'")))
+        elif group == 4:
+            tokens.append(Token("ident", value.replace('""', '"')))
+        elif group == 5:
+            tokens.append(Token("ident", value.replace('``', '`')))
+        else:
+            tokens.append(Token(_TOKEN_KINDS[group], value))
+    return tokens
+
+class ParsedColumn(NamedTuple):
+    name: str
+    type: str
+    is_primary: bool
+    is_auto_increment: bool
+
+class ParsedForeignKey(NamedTuple):
+    table: str
+    columns: Tuple[str, ...]
+    reference_table: str
+    # Empty when the clause names no columns: the referenced primary key
+    reference_columns: Tuple[str, ...]
+
+class ParsedTable(NamedTuple):
+    name: str
+    columns: List[ParsedColumn]
+    description: Optional[str]
+
+# Words that end a column's type and start its constraints
+_COLUMN_CONSTRAINTS = {
+    "NOT", "NULL", "DEFAULT", "PRIMARY", "REFERENCES", "UNIQUE", "CHECK", "CONSTRAINT", "COLLATE",
+    "AUTO_INCREMENT", "AUTOINCREMENT", "IDENTITY", "GENERATED", "COMMENT", "ON", "UNSIGNED", "SIGNED",
+    "ZEROFILL",
+}
+_TABLE_CONSTRAINTS = {"UNIQUE", "CHECK", "KEY", "INDEX", "FULLTEXT", "SPATIAL", "EXCLUDE", "LIKE", "PERIOD"}
+_SERIAL_TYPES = {"SERIAL", "SMALLSERIAL", "BIGSERIAL", "SERIAL2", "SERIAL4", "SERIAL8"}
+
+def _split(tokens: List[Token], separator: str = ",") -> List[List[Token]]:
+    """Split tokens on a symbol outside parentheses"""
+    parts, current, depth = [], [], 0
+    for token in tokens:
+        if token.kind == "symbol":
+            if token.value == "(":
+                depth += 1
+            elif token.value == ")":
+                depth -= 1
+            elif token.value == separator and depth == 0:
+                parts.append(current)
+                current = []
+                continue
+        current.append(token)
+    if current:
+        parts.append(current)
+    return parts
+
+def _type_text(tokens: List[Token]) -> str:
+    text = " ".join(token.value for token in tokens)
+    return re.sub(r"\s*([(),\[\]])\s*", r"\1", text).replace(",", ", ").strip()
+
+class SchemaBuilder:
+    """Collect tables, keys and foreign keys from CREATE TABLE, ALTER TABLE and COMMENT ON statements"""
+    
+    def __init__(self):
+        self.tables: Dict[str, ParsedTable] = {}
+        self.foreign_keys: List[ParsedForeignKey] = []
+        self.applied = 0
+    
+    def add_statement(self, statement: str):
+        tokens = tokenize(statement)
+        words = [token.upper for token in tokens[:8]]
+        try:
+            if words[:1] == ["CREATE"] and "TABLE" in words:
+                self._create_table(tokens)
+            elif words[:2] == ["ALTER", "TABLE"]:
+                self._alter_table(tokens)
+            elif words[:3] == ["COMMENT", "ON", "TABLE"]:
+                self._comment(tokens)
+            else:
+                return
+        except IndexError:
+            raise ValueError(f"Could not parse statement: {statement[:80]}")
+        self.applied += 1
+    
+    def table(self, name: str) -> Optional[ParsedTable]:
+        return self.tables.get(name.lower())
+    
+    def add_table(self, table: ParsedTable):
+        if table.name.lower() in self.tables:
+            raise ValueError(f"Table '{table.name}' is created more than once")
+        self.tables[table.name.lower()] = table
+    
+    def set_primary_key(self, name: str, columns: Tuple[str, ...]):
+        table = self.table(name)
+        if table is None:
+            return
+        keys = {column.lower() for column in columns}
+        self.tables[name.lower()] = table._replace(columns=[
+            column._replace(is_primary=column.is_primary or column.name.lower() in keys)
+            for column in table.columns
+        ])
+    
+    def _name(self, tokens: List[Token], position: int) -> Tuple[str, int]:
+        """Read a possibly schema-qualified name; returns the unqualified name and the next position"""
+        name = tokens[position].value
+        position += 1
+        while position + 1 < len(tokens) and tokens[position].value == "." and tokens[position].kind == "symbol":
+            name = tokens[position + 1].value
+            position += 2
+        return name, position
+    
+    def _column_list(self, tokens: List[Token], position: int) -> Tuple[Tuple[str, ...], int]:
+        if position >= len(tokens) or tokens[position].value != "(":
+            return (), position
+        end = position + 1
+        while tokens[end].value != ")":
+            end += 1
+        names = tuple(token.value for token in tokens[position + 1:end] if token.value != ",")
+        return names, end + 1
+    
+    def _references(self, table: str, columns: Tuple[str, ...], tokens: List[Token], position: int):
+        reference_table, position = self._name(tokens, position)
+        reference_columns, _ = self._column_list(tokens, position)
+        self.foreign_keys.append(ParsedForeignKey(table, columns, reference_table, reference_columns))
+    
+    def _create_table(self, tokens: List[Token]):
+        position = [token.upper for token in tokens[:8]].index("TABLE") + 1
+        if [token.upper for token in tokens[position:position + 3]] == ["IF", "NOT", "EXISTS"]:
+            position += 3
+        name, position = self._name(tokens, position)
+        if position >= len(tokens) or tokens[position].value != "(":
+            # CREATE TABLE ... AS / PARTITION OF carry no column list
+            return
+        depth, end = 0, position
+        for end in range(position, len(tokens)):
+            if tokens[end].value == "(" and tokens[end].kind == "symbol":
+                depth += 1
+            elif tokens[end].value == ")" and tokens[end].kind == "symbol":
+                depth -= 1
+                if depth == 0:
+                    break
+        columns: List[ParsedColumn] = []
+        primary_key: Tuple[str, ...] = ()
+        for element in _split(tokens[position + 1:end]):
+            if element[0].upper == "CONSTRAINT":
+                element = element[2:]
+            keyword = element[0].upper
+            if keyword == "PRIMARY":
+                primary_key, _ = self._column_list(element, 2)
+            elif keyword == "FOREIGN":
+                local, next_position = self._column_list(element, 2)
+                self._references(name, local, element, next_position + 1)
+            elif keyword not in _TABLE_CONSTRAINTS:
+                columns.append(self._column(name, element))
+        # MySQL table options: COMMENT='...'
+        description = None
+        trailing = tokens[end + 1:]
+        for index, token in enumerate(trailing):
+            if token.upper == "COMMENT":
+                strings = [t for t in trailing[index + 1:index + 3] if t.kind == "string"]
+                description = strings[0].value if strings else None
+        self.add_table(ParsedTable(name, columns, description))
+        self.set_primary_key(name, primary_key)
+    
+    def _column(self, table: str, element: List[Token]) -> ParsedColumn:
+        name = element[0].value
+        position, depth = 1, 0
+        while position < len(element):
+            token = element[position]
+            if token.value == "(":
+                depth += 1
+            elif token.value == ")":
+                depth -= 1
+            elif depth == 0 and (token.upper in _COLUMN_CONSTRAINTS or
+                                 (token.upper == "CHARACTER" and position + 1 < len(element)
+                                  and element[position + 1].upper == "SET")):
+                break
+            position += 1
+        type_tokens, constraints = element[1:position], element[position:]
+        is_auto_increment = False
+        if type_tokens and type_tokens[-1].upper in _SERIAL_TYPES:
+            is_auto_increment = True
+            if len(type_tokens) > 1:
+                # "BIGINT SERIAL", as older versions of the generator wrote it
+                type_tokens = type_tokens[:-1]
+        words = [token.upper for token in constraints]
+        is_primary = "PRIMARY" in words
+        if {"AUTO_INCREMENT", "AUTOINCREMENT", "IDENTITY"} & set(words):
+            is_auto_increment = True
+        if "REFERENCES" in words:
+            self._references(table, (name,), constraints, words.index("REFERENCES") + 1)
+        return ParsedColumn(name, _type_text(type_tokens) or "text", is_primary, is_auto_increment)
+    
+    def _alter_table(self, tokens: List[Token]):
+        position = 2
+        while tokens[position].upper in ("ONLY", "IF", "EXISTS"):
+            position += 1
+        name, position = self._name(tokens, position)
+        for action in _split(tokens[position:]):
+            words = [token.upper for token in action]
+            if words[:1] != ["ADD"]:
+                continue
+            start = 3 if words[1:2] == ["CONSTRAINT"] else 1
+            if words[start:start + 2] == ["PRIMARY", "KEY"]:
+                keys, _ = self._column_list(action, start + 2)
+                self.set_primary_key(name, keys)
+            elif words[start:start + 2] == ["FOREIGN", "KEY"]:
+                local, next_position = self._column_list(action, start + 2)
+                self._references(name, local, action, next_position + 1)
+    
+    def _comment(self, tokens: List[Token]):
+        name, position = self._name(tokens, 3)
+        table = self.table(name)
+        if table is not None and position + 1 < len(tokens) and tokens[position + 1].kind == "string":
+            self.tables[name.lower()] = table._replace(description=tokens[position + 1].value)
+
+def _normalize_type(native: str) -> str:
+    return re.sub(r"\s+", "", native.lower())
+
+def _base_type(native: str) -> str:
+    return re.sub(r"\s+", "", re.split(r"[(\[]", native.lower(), 1)[0])
+
+# Native types with no field_datatype of their own, by base name, and the base they import as
+TYPE_ALIASES = {
+    "smallint": "bigint", "integer": "bigint", "int": "bigint", "int2": "bigint", "int4": "bigint",
+    "int8": "bigint", "tinyint": "bigint", "mediumint": "bigint", "serial": "bigint", "smallserial": "bigint",
+    "bigserial": "bigint", "serial2": "bigint", "serial4": "bigint", "serial8": "bigint", "year": "bigint",
+    "charactervarying": "varchar", "character": "varchar", "char": "varchar", "nvarchar": "varchar",
+    "nchar": "varchar", "varchar2": "varchar",
+    "numeric": "decimal", "decimal": "numeric", "real": "numeric", "float": "numeric", "float4": "numeric",
+    "float8": "numeric", "double": "numeric", "doubleprecision": "numeric", "money": "numeric",
+    "bool": "boolean", "bit": "boolean", "tinyint(1)": "boolean",
+    "timestamp": "date", "timestampwithtimezone": "date", "timestampwithouttimezone": "date",
+    "timestamptz": "date", "datetime": "date",
+    "timewithtimezone": "time", "timewithouttimezone": "time", "timetz": "time",
+    "longtext": "text", "mediumtext": "text", "tinytext": "text", "json": "text", "jsonb": "text",
+    "uuid": "text", "xml": "text", "enum": "text", "set": "text", "citext": "text",
+    "blob": "bytea", "longblob": "bytea", "mediumblob": "bytea", "tinyblob": "bytea", "binary": "bytea",
+    "varbinary": "bytea", "bytea": "blob",
+}
+
+class DatatypeMatcher:
+    """
+    Map native column types back to field_datatype IDs.
+    
+    A type matches a datatype's postgresql or mysql name exactly (ignoring
+    case and spaces), then by base name (varchar(100) -> varchar(250)), then
+    through TYPE_ALIASES. Anything else imports as the TEXT datatype and is
+    reported as approximated.
+    """
+    
+    def __init__(self, datatypes: List[Dict[str, Any]]):
+        self._exact: Dict[str, int] = {}
+        self._base: Dict[str, int] = {}
+        self.fallback_id: Optional[int] = None
+        for row in datatypes:
+            for dialect in ("postgresql", "mysql"):
+                native = row.get(dialect)
+                if native:
+                    self._exact.setdefault(_normalize_type(native), row['field_datatype_id'])
+                    self._base.setdefault(_base_type(native), row['field_datatype_id'])
+            if self.fallback_id is None and _base_type(row.get('postgresql') or "") == "text":
+                self.fallback_id = row['field_datatype_id']
+        if self.fallback_id is None and datatypes:
+            self.fallback_id = datatypes[0]['field_datatype_id']
+    
+    def match(self, native: str) -> Tuple[int, bool]:
+        """field_datatype_id for a native type, and whether it was matched rather than approximated"""
+        normalized = _normalize_type(native)
+        if normalized.endswith("]") or normalized.endswith("array"):
+            # Arrays have no field datatype
+            return self.fallback_id, False
+        if normalized in self._exact:
+            return self._exact[normalized], True
+        base = _base_type(native)
+        if base in self._base:
+            return self._base[base], True
+        alias = TYPE_ALIASES.get(normalized) or TYPE_ALIASES.get(base)
+        if alias is not None and alias in self._base:
+            return self._base[alias], True
+        alias = TYPE_ALIASES.get(alias or "")
+        if alias is not None and alias in self._base:
+            return self._base[alias], True
+        return self.fallback_id, False
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Tuple
+from dotenv import load_dotenv
+from .connection import db_manager
+from .datatype_registry import datatype_registry
+from .operations import DatabaseOperations
+from . import queries
+from ..generation.artifacts import (
+    SCAFFOLDS, OUTPUT_DIRECTORY, output_directory, stage_files, publish_files, discard_files
+)
+from ..generation.dialects import dialect_for_database, parse_dialects
+from ..generation.graph import schema_graph
+from ..generation.render_pool import render_pool
+from ..metrics import metrics
+
+load_dotenv()
+
+# NOTIFY channel that wakes workers when a job is queued
+JOB_CHANNEL = "generation_jobs"
+
+# Seconds between progress updates of a running job, which double as its heartbeat
+PROGRESS_INTERVAL = 1.0
+
+class JobNoLongerRunning(Exception):
+    """The job's row left the running status, e.g. failed as stale, or was deleted with its project"""
+
+def _job(row) -> Dict[str, Any]:
+    job = dict(row)
+    job['options'] = json.loads(job['options'])
+    return job
+
+class GenerationWorkers:
+    """
+    Run queued generation jobs on a bounded pool of workers.
+    
+    Each of GENERATION_WORKERS tasks claims one job at a time from
+    generation_job, so several processes can share the queue; 0 leaves
+    jobs to other processes. Files are rendered by the render pool and
+    written on a thread while the task reports progress, then the
+    project's tables are marked generated and the job finished in one
+    transaction. Workers wake on the NOTIFY sent by enqueue() and poll
+    every GENERATION_JOB_POLL seconds for anything missed.
+    """
+    
+    def __init__(self, workers: Optional[int] = None, root: Optional[str] = None,
+                 poll_seconds: Optional[float] = None, stale_seconds: Optional[float] = None):
+        if workers is None:
+            workers = int(os.getenv("GENERATION_WORKERS", "2"))
+        if root is None:
+            root = os.getenv("GENERATION_ROOT", "generated_projects")
+        if poll_seconds is None:
+            poll_seconds = float(os.getenv("GENERATION_JOB_POLL", "5"))
+        if stale_seconds is None:
+            # A running job without a heartbeat for this long is failed
+            stale_seconds = float(os.getenv("GENERATION_JOB_STALE_AFTER", "60"))
+        self.workers = workers
+        self.root = Path(root)
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.running = 0
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def handle_notification(self, payload: Optional[str]):
+        """Listener callback for JOB_CHANNEL; None (missed notifications) wakes workers too"""
+        self._wakeup.set()
+    
+    async def start(self):
+        if self.workers <= 0 or self._tasks:
+            return
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="generation")
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        print(f"Started {self.workers} generation workers writing under {self.root.resolve()}")
+    
+    async def stop(self):
+        """Stop the workers; a job cut short stays running until it is failed as stale"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def enqueue(self, project_id: int, dialects: Optional[List[str]] = None,
+                      scaffold: Optional[List[str]] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a generation job for a project; returns the job and whether it is new.
+        
+        A project has at most one queued or running job, which is returned
+        instead of queueing another. Raises ValueError for a missing
+        project, a missing or invalid project_path or unknown options.
+        """
+        dialects = parse_dialects(','.join(dialects)) if dialects else None
+        unknown = [name for name in scaffold or [] if name not in SCAFFOLDS]
+        if unknown:
+            raise ValueError(f"Unknown scaffold: {', '.join(unknown)}. Allowed: {', '.join(SCAFFOLDS)}")
+        options = json.dumps({"dialects": dialects, "scaffold": list(dict.fromkeys(scaffold or []))})
+        async with db_manager.transaction() as conn:
+            project = await queries.fetchrow(conn, "project.get", project_id)
+            if project is None:
+                raise ValueError("Project not found")
+            output_directory(self.root, project['project_path'])
+            row = await queries.fetchrow(conn, "job.create", project_id, options)
+            while row is None:
+                active = await queries.fetchrow(conn, "job.active", project_id)
+                if active is not None:
+                    return _job(active), False
+                # The active job finished in between
+                row = await queries.fetchrow(conn, "job.create", project_id, options)
+            # Delivered when the transaction commits
+            await queries.execute(conn, "job.notify", str(row['job_id']))
+        return _job(row), True
+    
+    async def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        async with db_manager.acquire() as conn:
+            row = await queries.fetchrow(conn, "job.get", job_id)
+        return _job(row) if row else None
+    
+    async def list_for_project(self, project_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """A project's most recent jobs, newest first"""
+        async with db_manager.acquire() as conn:
+            rows = await queries.fetch(conn, "job.by_project", project_id, limit)
+        return [_job(row) for row in rows]
+    
+    async def _work(self):
+        while True:
+            # Cleared before looking, so a job queued while looking still wakes this worker
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                print(f"Generation worker could not claim a job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+    
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        async with db_manager.acquire() as conn:
+            await queries.execute(conn, "job.fail_stale", self.stale_seconds)
+            row = await queries.fetchrow(conn, "job.claim")
+        return _job(row) if row else None
+    
+    async def _run(self, job: Dict[str, Any]):
+        job_id = job['job_id']
+        start = time.perf_counter()
+        self.running += 1
+        try:
+            files = await self._generate(job)
+        except JobNoLongerRunning:
+            print(f"Generation job {job_id} stopped: it is no longer running")
+            jobs_finished.inc("lost")
+            return
+        except Exception as e:
+            print(f"Generation job {job_id} failed: {e}")
+            jobs_finished.inc("failed")
+            try:
+                async with db_manager.acquire() as conn:
+                    await queries.execute(conn, "job.fail", job_id, str(e) or type(e).__name__)
+            except Exception as e:
+                print(f"Could not record the failure of generation job {job_id}: {e}")
+            return
+        finally:
+            self.running -= 1
+            job_duration.observe(time.perf_counter() - start)
+        jobs_finished.inc("succeeded")
+        print(f"Generation job {job_id} wrote {files} files")
+    
+    async def _heartbeat(self, job_id: int, done: List[int], awaitable) -> Any:
+        """Await awaitable, recording done[0] tables as the job's progress every PROGRESS_INTERVAL"""
+        task = asyncio.ensure_future(awaitable)
+        try:
+            while True:
+                finished, _ = await asyncio.wait({task}, timeout=PROGRESS_INTERVAL)
+                if finished:
+                    return task.result()
+                async with db_manager.acquire() as conn:
+                    if await queries.fetchval(conn, "job.progress", job_id, done[0]) is None:
+                        raise JobNoLongerRunning(job_id)
+        except BaseException:
+            task.cancel()
+            raise
+    
+    async def _generate(self, job: Dict[str, Any]) -> int:
+        job_id, project_id, options = job['job_id'], job['project_id'], job['options']
+        await datatype_registry.ensure_fresh()
+        project = await DatabaseOperations.get_project_by_id(project_id)
+        schema = await DatabaseOperations.get_project_schema(project_id)
+        if project is None or schema is None:
+            raise ValueError("Project not found")
+        dialects = options.get('dialects') or [dialect_for_database(schema.database_name)]
+        scaffold = options.get('scaffold') or []
+        # The models scaffold maps PostgreSQL types to Python ones
+        type_maps = {name: datatype_registry.type_map(name) for name in dialects + ["postgresql"]}
+        target = output_directory(self.root, project['project_path'])
+        async with db_manager.acquire() as conn:
+            output_path = str(target / OUTPUT_DIRECTORY)
+            if await queries.fetchval(conn, "job.start", job_id, len(schema.tables), output_path) is None:
+                raise JobNoLongerRunning(job_id)
+        
+        done = [0]
+        rendered = await self._heartbeat(job_id, done, render_pool.render(
+            schema, dialects, type_maps, scaffold, with_files=True,
+            progress=lambda tables: done.__setitem__(0, tables)
+        ))
+        loop = asyncio.get_running_loop()
+        staging = f".generating-{job_id}"
+        writing = self._executor.submit(stage_files, target, staging, rendered.files)
+        try:
+            files = await self._heartbeat(job_id, done, asyncio.wrap_future(writing))
+            async with db_manager.transaction() as conn:
+                # Only the job's own worker publishes, and only while the job is still running
+                if await queries.fetchval(conn, "job.succeed", job_id, files) is None:
+                    raise JobNoLongerRunning(job_id)
+                rows = await queries.fetch(conn, "table.mark_generated", [table.table_id for table in schema.tables])
+                await loop.run_in_executor(self._executor, publish_files, target, staging)
+                for row in rows:
+                    db_manager.after_commit(schema_graph.apply_table, dict(row))
+        finally:
+            # Let an abandoned write finish first, so it cannot recreate the directory once removed
+            await asyncio.gather(asyncio.wrap_future(writing), return_exceptions=True)
+            await loop.run_in_executor(self._executor, discard_files, target, staging)
+        return files
+
+# Global generation worker pool
+generation_workers = GenerationWorkers()
+
+jobs_finished = metrics.counter(
+    "generation_jobs_total", "Generation jobs finished, by outcome", labels=("status",)
+)
+job_duration = metrics.histogram(
+    "generation_job_seconds", "Time from claiming a generation job to finishing it"
+)
+metrics.gauge(
+    "generation_jobs_running", "Generation jobs running in this process",
+    lambda: generation_workers.running
+)
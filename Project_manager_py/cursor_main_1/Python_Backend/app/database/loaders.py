@@ -0,0 +1,104 @@
+import asyncio
+import contextvars
+import functools
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Iterable, Set
+from .connection import db_manager
+from . import queries
+
+# Lookups that can be batched: name -> (registered statement taking an int[] of IDs, key column)
+LOOKUPS = {
+    "project": ("project.get_many", "project_id"),
+    "table": ("table.get_many", "table_id"),
+    "field": ("field.get_many", "table_wise_field_id"),
+}
+
+class DataLoader:
+    """
+    Coalesce the lookups made in one event loop iteration into a single batch call.
+    
+    load() queues its ID and resolves once the batch runs, on the next
+    iteration. An ID already requested shares the first lookup's result,
+    so each ID is fetched at most once per loader; failed lookups are
+    forgotten so a later load() retries them.
+    """
+    
+    def __init__(self, batch: Callable[[List[int]], Awaitable[Dict[int, Any]]]):
+        self._batch = batch
+        self._results: Dict[int, asyncio.Future] = {}
+        self._pending: List[int] = []
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def load(self, key: int) -> Optional[Any]:
+        """The row for key, or None if there is none"""
+        # Shielded: one caller being cancelled must not cancel the result others wait on
+        return await asyncio.shield(self._future(key))
+    
+    async def load_many(self, keys: Iterable[int]) -> List[Optional[Any]]:
+        """The rows for keys, in order, with None for missing ones"""
+        return await asyncio.shield(asyncio.gather(*[self._future(key) for key in keys]))
+    
+    def _future(self, key: int) -> asyncio.Future:
+        future = self._results.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._results[key] = loop.create_future()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            self._pending.append(key)
+        return future
+    
+    def _dispatch(self):
+        keys, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run(keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, keys: List[int]):
+        try:
+            found = await self._batch(keys)
+        except Exception as e:
+            for key in keys:
+                future = self._results.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._results[key]
+            if not future.done():
+                future.set_result(found.get(key))
+
+async def _fetch_rows(statement: str, key: str, ids: List[int]) -> Dict[int, Any]:
+    async with db_manager.acquire() as conn:
+        rows = await queries.fetch(conn, statement, ids)
+    return {row[key]: row for row in rows}
+
+# The loaders of the current request, by lookup name; see loader_scope()
+_request_loaders: contextvars.ContextVar[Optional[Dict[str, DataLoader]]] = contextvars.ContextVar(
+    "request_loaders", default=None
+)
+
+@contextmanager
+def loader_scope():
+    """Share one set of loaders, and what they have fetched, across the block"""
+    token = _request_loaders.set({})
+    try:
+        yield
+    finally:
+        _request_loaders.reset(token)
+
+def loader(name: str) -> Optional[DataLoader]:
+    """
+    The current loader_scope()'s loader for a lookup in LOOKUPS.
+    
+    None outside a scope, and inside a transaction, which reads on its own
+    connection and must see its own writes; callers then query directly.
+    """
+    loaders = _request_loaders.get()
+    if loaders is None or db_manager.in_transaction:
+        return None
+    found = loaders.get(name)
+    if found is None:
+        statement, key = LOOKUPS[name]
+        found = loaders[name] = DataLoader(functools.partial(_fetch_rows, statement, key))
+    return found
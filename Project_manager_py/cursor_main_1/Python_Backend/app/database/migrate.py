@@ -0,0 +1,175 @@
+"""
+Versioned schema migrations.
+
+Migrations are the NNNN_name.sql files in Python_Backend/migrations, applied
+in version order and recorded in schema_migrations. They run at startup
+(MIGRATE_ON_STARTUP) or from the command line:
+
+    python -m app.database.migrate            # apply everything pending
+    python -m app.database.migrate --target 1 # apply up to version 1
+    python -m app.database.migrate status
+"""
+import argparse
+import asyncio
+import re
+import time
+from pathlib import Path
+from typing import List, Optional, Dict, Any, NamedTuple
+import asyncpg
+from dotenv import load_dotenv
+from .connection import connect_params
+
+load_dotenv()
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# Files starting with this line run statement by statement outside a
+# transaction, which CREATE INDEX CONCURRENTLY requires
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+# Files with this line apply only where the extension can be installed;
+# elsewhere they stay pending and apply once it is available
+REQUIRES_EXTENSION = re.compile(r"^-- migrate: requires-extension (\w+)\s*$", re.MULTILINE)
+
+# Advisory lock key held while migrating, so app workers starting together
+# apply each migration once
+MIGRATION_LOCK_KEY = 4_207_015
+
+_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+class MigrationError(Exception):
+    """Raised for a malformed migrations directory"""
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+    @property
+    def required_extension(self) -> Optional[str]:
+        match = REQUIRES_EXTENSION.search(self.sql)
+        return match.group(1) if match else None
+
+    def statements(self) -> List[str]:
+        """Split a no-transaction migration into statements; keep such files to plain DDL"""
+        lines = [line for line in self.sql.splitlines() if not line.strip().startswith("--")]
+        return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+def discover(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Load the migrations in a directory, ordered by version"""
+    migrations: Dict[int, Migration] = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILE_PATTERN.match(path.name)
+        if not match:
+            raise MigrationError(f"Migration file '{path.name}' is not named NNNN_name.sql")
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f"Migration version {version} is used by more than one file")
+        migrations[version] = Migration(version, match.group(2), path.read_text())
+    return [migrations[version] for version in sorted(migrations)]
+
+async def _connect() -> asyncpg.Connection:
+    # Index builds on a large instance must not hit the API's statement timeout
+    return await asyncpg.connect(
+        **connect_params(),
+        server_settings={"statement_timeout": "0", "application_name": "project_manager_migrate"}
+    )
+
+async def _ensure_table(conn: asyncpg.Connection):
+    await conn.execute(
+        """CREATE TABLE IF NOT EXISTS schema_migrations (
+               version INTEGER PRIMARY KEY,
+               name VARCHAR(255) NOT NULL,
+               applied_at TIMESTAMP NOT NULL DEFAULT now(),
+               duration_ms INTEGER
+           )"""
+    )
+
+async def _lock(conn: asyncpg.Connection):
+    # Polled rather than blocking: a session waiting in pg_advisory_lock holds
+    # a snapshot that CREATE INDEX CONCURRENTLY in the holder would wait on
+    while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", MIGRATION_LOCK_KEY):
+        await asyncio.sleep(0.5)
+
+async def _apply(conn: asyncpg.Connection, migration: Migration):
+    start = time.perf_counter()
+    record = "INSERT INTO schema_migrations (version, name, duration_ms) VALUES ($1, $2, $3)"
+    if migration.transactional:
+        async with conn.transaction():
+            await conn.execute(migration.sql)
+            await conn.execute(record, migration.version, migration.name,
+                               int((time.perf_counter() - start) * 1000))
+    else:
+        for statement in migration.statements():
+            await conn.execute(statement)
+        await conn.execute(record, migration.version, migration.name,
+                           int((time.perf_counter() - start) * 1000))
+    print(f"Applied migration {migration.version:04d}_{migration.name} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+async def migrate(target: Optional[int] = None, directory: Path = MIGRATIONS_DIR) -> List[int]:
+    """Apply pending migrations up to target (default: all); returns the versions applied"""
+    migrations = discover(directory)
+    conn = await _connect()
+    try:
+        await _lock(conn)
+        try:
+            await _ensure_table(conn)
+            applied = {row['version'] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+            pending = [
+                migration for migration in migrations
+                if migration.version not in applied and (target is None or migration.version <= target)
+            ]
+            available = {row['name'] for row in await conn.fetch("SELECT name FROM pg_available_extensions")}
+            skipped = [
+                migration for migration in pending
+                if migration.required_extension is not None and migration.required_extension not in available
+            ]
+            for migration in pending:
+                if migration in skipped:
+                    print(f"Skipped migration {migration.version:04d}_{migration.name}: "
+                          f"extension {migration.required_extension} is not available")
+                    continue
+                await _apply(conn, migration)
+            return [migration.version for migration in pending if migration not in skipped]
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY)
+    finally:
+        await conn.close()
+
+async def status(directory: Path = MIGRATIONS_DIR) -> List[Dict[str, Any]]:
+    """Every known migration with when it was applied (None if pending)"""
+    conn = await _connect()
+    try:
+        await _ensure_table(conn)
+        applied = {row['version']: row for row in await conn.fetch("SELECT * FROM schema_migrations")}
+    finally:
+        await conn.close()
+    return [
+        {
+            "version": migration.version,
+            "name": migration.name,
+            "applied_at": applied[migration.version]['applied_at'] if migration.version in applied else None,
+        }
+        for migration in discover(directory)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or list schema migrations")
+    parser.add_argument("command", nargs="?", choices=("up", "status"), default="up")
+    parser.add_argument("--target", type=int, help="Highest version to apply")
+    args = parser.parse_args()
+    if args.command == "status":
+        for row in asyncio.run(status()):
+            state = row['applied_at'].isoformat(sep=' ', timespec='seconds') if row['applied_at'] else "pending"
+            print(f"{row['version']:04d}_{row['name']}: {state}")
+    else:
+        applied = asyncio.run(migrate(args.target))
+        print(f"{len(applied)} migration(s) applied" if applied else "Database is up to date")
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,269 @@
 import asyncpg
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
 from datetime import datetime
 from .connection import db_manager
+from . import queries
+from ..metrics import instrument_operations
+from .datatype_registry import datatype_registry
+from .loaders import loader
+from ..generation.schema import ProjectSchema
+from ..generation.graph import ProjectGraph, page_json, schema_graph
+from ..generation.diff import TableDiff, complete_tables, diff_project, from_snapshot, snapshot
+from ..generation.dialects import get_dialect, dialect_for_database
+from ..generation.cache import SQLArtifact, sql_cache
+from ..generation.render_pool import render_pool
 
+FIELD_COLUMNS = (
+    'table_id', 'field_name', 'field_datatype_id', 'is_primary', 'field_label',
+    'display_name', 'is_auto_increment', 'is_foreign_key', 'reference_table_id',
+    'reference_table_field_id'
+)
+
+PROJECT_COLUMNS = (
+    'project_id', 'project_name', 'project_description', 'database_id',
+    'database_path', 'project_path'
+)
+
+TABLE_COLUMNS = (
+    'table_id', 'project_id', 'table_name', 'table_description', 'is_generated',
+    'generated_date'
+)
+
+TABLE_FIELD_COLUMNS = ('table_wise_field_id',) + FIELD_COLUMNS
+
+SEARCH_MIN_SCORE = 0.5
+
+# Text searched for each result type: (table, key, document). The documents
+# must match the indexes in migrations/0004_search_trigram.sql exactly
+SEARCH_DOCUMENTS = {
+    'project': ('project_table', 'project_id', "project_name"),
+    'table': ('all_table', 'table_id', "(table_name || ' ' || coalesce(table_description, ''))"),
+    'field': (
+        'table_wise_field', 'table_wise_field_id',
+        "(field_name || ' ' || coalesce(field_label, '') || ' ' || coalesce(display_name, ''))"
+    ),
+}
+
+# Each result type's columns, from its matched row m.key joined to its table (t) and project (p)
+_SEARCH_RESULTS = {
+    'project': """
+        SELECT 'project' AS type, p.project_id AS id, p.project_name::text AS name,
+               p.project_description::text AS description, m.score, p.project_id, p.project_name,
+               NULL::int AS table_id, NULL::varchar AS table_name
+        FROM ({matches}) m
+        JOIN project_table p ON p.project_id = m.key""",
+    'table': """
+        SELECT 'table' AS type, t.table_id AS id, t.table_name::text AS name,
+               t.table_description::text AS description, m.score, p.project_id, p.project_name,
+               t.table_id, t.table_name
+        FROM ({matches}) m
+        JOIN all_table t ON t.table_id = m.key
+        JOIN project_table p ON p.project_id = t.project_id""",
+    'field': """
+        SELECT 'field' AS type, f.table_wise_field_id AS id, f.field_name::text AS name,
+               f.field_label::text AS description, m.score, p.project_id, p.project_name,
+               t.table_id, t.table_name
+        FROM ({matches}) m
+        JOIN table_wise_field f ON f.table_wise_field_id = m.key
+        JOIN all_table t ON t.table_id = f.table_id
+        JOIN project_table p ON p.project_id = t.project_id""",
+}
+
+# Rows of each type inside one project ($5), for scoped searches
+_SEARCH_SCOPES = {
+    'project': "project_id = $5",
+    'table': "project_id = $5",
+    'field': "table_id IN (SELECT table_id FROM all_table WHERE project_id = $5)",
+}
+
+def _search_query(types: List[str], scoped: bool) -> str:
+    """
+    Build the search statement for a set of result types.
+    
+    $1 is the term, $2 the number of candidates per type, $3 / $4 the page
+    limit and offset, and $5 the project ID when scoped. The caller sets
+    pg_trgm.word_similarity_threshold, which `<%` filters on.
+    
+    Unscoped, each type's candidates come from its GiST index, which prunes
+    on the threshold and returns rows nearest first, so the scan stops
+    after $2. Scoped, the project's rows are read by their foreign key
+    index first (OFFSET 0 keeps the planner from going through the GiST
+    index and filtering the whole table by project) and sorted.
+    """
+    parts = []
+    for result_type in types:
+        table, key, document = SEARCH_DOCUMENTS[result_type]
+        if scoped:
+            source = (
+                f"(SELECT {key} AS key, {document} AS document FROM {table} "
+                f"WHERE {_SEARCH_SCOPES[result_type]} OFFSET 0) scoped"
+            )
+            key, document = "key", "document"
+        else:
+            source = table
+        matches = (
+            f"SELECT {key} AS key, 1 - ($1 <<-> {document}) AS score FROM {source} "
+            f"WHERE $1 <% {document} ORDER BY $1 <<-> {document} LIMIT $2"
+        )
+        parts.append(_SEARCH_RESULTS[result_type].format(matches=matches))
+    return "\n        UNION ALL".join(parts) + "\n        ORDER BY score DESC, type, id LIMIT $3 OFFSET $4"
+
+
+class JSONPage(NamedTuple):
+    """A page of rows serialized by Postgres, with what the route needs for its headers"""
+    body: str
+    row_count: int
+    last_key: Optional[int]
+
+class SearchUnavailableError(Exception):
+    """Raised by search when the pg_trgm extension is not installed"""
+
+class BulkValidationError(ValueError):
+    """Raised when one or more items of a bulk request are invalid"""
+    
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__(f"{len(errors)} invalid item(s)")
+        self.errors = errors
+
+def _field_columns(fields: List[Dict[str, Any]]) -> List[list]:
+    """Transpose field dicts into one array per table_wise_field column"""
+    defaults = {'is_primary': False, 'is_auto_increment': False, 'is_foreign_key': False}
+    return [
+        [field.get(column, defaults.get(column)) for field in fields]
+        for column in FIELD_COLUMNS
+    ]
+
+def _list_query(table: str, key: str, columns: Optional[List[str]], filter_column: Optional[str],
+                filter_value: Any, after: Optional[int], limit: Optional[int]):
+    """
+    Build a keyset-paginated SELECT ordered by the table's ID column.
+    
+    Column and table names come from the *_COLUMNS whitelists above, never
+    from user input.
+    """
+    conditions, args = [], []
+    if filter_column is not None:
+        args.append(filter_value)
+        conditions.append(f"{filter_column} = ${len(args)}")
+    if after is not None:
+        args.append(after)
+        conditions.append(f"{key} > ${len(args)}")
+    sql = f"SELECT {', '.join(columns) if columns else '*'} FROM {table}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {key}"
+    if limit is not None:
+        args.append(limit)
+        sql += f" LIMIT ${len(args)}"
+    return sql, args
+
+@instrument_operations
 class DatabaseOperations:
     """Database operations for all tables"""
     
+    @staticmethod
+    async def _fetch_list(table: str, key: str, columns: Optional[List[str]] = None,
+                          filter_column: Optional[str] = None, filter_value: Any = None,
+                          after: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        sql, args = _list_query(table, key, columns, filter_column, filter_value, after, limit)
+        async with db_manager.acquire() as conn:
+            rows = await conn.fetch(sql, *args)
+            return [dict(row) for row in rows]
+    
+    @staticmethod
+    async def _fetch_list_json(table: str, key: str, columns: Optional[List[str]] = None,
+                               filter_column: Optional[str] = None, filter_value: Any = None,
+                               after: Optional[int] = None, limit: Optional[int] = None) -> JSONPage:
+        # Postgres aggregates the page into one JSON document, so rows are
+        # never decoded into Records, dicts or models on the way out
+        sql, args = _list_query(table, key, columns, filter_column, filter_value, after, limit)
+        sql = (f"SELECT COALESCE(json_agg(page ORDER BY page.{key}), '[]'::json)::text AS body, "
+               f"count(*) AS row_count, max(page.{key}) AS last_key FROM ({sql}) page")
+        async with db_manager.acquire() as conn:
+            row = await conn.fetchrow(sql, *args)
+            return JSONPage(row['body'], row['row_count'], row['last_key'])
+    
+    @staticmethod
+    async def _count(table: str, filter_column: Optional[str] = None, filter_value: Any = None) -> int:
+        sql = f"SELECT COUNT(*) FROM {table}"
+        args = []
+        if filter_column is not None:
+            sql += f" WHERE {filter_column} = $1"
+            args.append(filter_value)
+        async with db_manager.acquire() as conn:
+            return await conn.fetchval(sql, *args)
+    
     # Database Table Operations
     @staticmethod
     async def get_all_databases() -> List[Dict[str, Any]]:
         """Get all databases"""
-        async with db_manager.pool.acquire() as conn:
-            rows = await conn.fetch("SELECT * FROM database_table ORDER BY database_id")
+        async with db_manager.acquire() as conn:
+            rows = await queries.fetch(conn, "database.list")
             return [dict(row) for row in rows]
     
     @staticmethod
     async def create_database(database_name: str) -> Dict[str, Any]:
         """Create a new database"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "INSERT INTO database_table (database_name) VALUES ($1) RETURNING *",
+        async with db_manager.acquire() as conn:
+            row = await queries.fetchrow(
+                conn, "database.create",
                 database_name
             )
             return dict(row)
     
     # Project Table Operations
     @staticmethod
-    async def get_all_projects() -> List[Dict[str, Any]]:
-        """Get all projects"""
-        async with db_manager.pool.acquire() as conn:
-            rows = await conn.fetch("SELECT * FROM project_table ORDER BY project_id")
-            return [dict(row) for row in rows]
+    async def get_all_projects(columns: Optional[List[str]] = None, after: Optional[int] = None,
+                               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get all projects, optionally projected and keyset-paginated by project_id"""
+        return await DatabaseOperations._fetch_list(
+            "project_table", "project_id", columns, after=after, limit=limit
+        )
+    
+    @staticmethod
+    async def get_all_projects_json(columns: Optional[List[str]] = None, after: Optional[int] = None,
+                                    limit: Optional[int] = None) -> JSONPage:
+        """Get a page of projects as JSON text built by Postgres"""
+        return await DatabaseOperations._fetch_list_json(
+            "project_table", "project_id", columns, after=after, limit=limit
+        )
+    
+    @staticmethod
+    async def count_projects() -> int:
+        """Count all projects"""
+        return await DatabaseOperations._count("project_table")
+    
+    @staticmethod
+    async def _get_by_id(lookup: str, statement: str, row_id: int) -> Optional[Dict[str, Any]]:
+        """A row by ID, batched with the request's other lookups of the same kind"""
+        batch = loader(lookup)
+        if batch is not None:
+            row = await batch.load(row_id)
+        else:
+            async with db_manager.acquire() as conn:
+                row = await queries.fetchrow(conn, statement, row_id)
+        return dict(row) if row else None
     
     @staticmethod
     async def get_project_by_id(project_id: int) -> Optional[Dict[str, Any]]:
         """Get project by ID"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT * FROM project_table WHERE project_id = $1",
+        return await DatabaseOperations._get_by_id("project", "project.get", project_id)
+    
+    @staticmethod
+    async def get_project_tree_json(project_id: int) -> Optional[str]:
+        """Get a project with its tables and their fields nested, as JSON text built by Postgres"""
+        async with db_manager.acquire() as conn:
+            return await queries.fetchval(
+                conn, "project.tree",
                 project_id
             )
-            return dict(row) if row else None
     
     @staticmethod
     async def create_project(project_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new project"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """INSERT INTO project_table 
-                   (project_name, project_description, database_id, database_path, project_path)
-                   VALUES ($1, $2, $3, $4, $5) RETURNING *""",
+        async with db_manager.acquire() as conn:
+            row = await queries.fetchrow(
+                conn, "project.create",
                 project_data['project_name'],
                 project_data['project_description'],
                 project_data['database_id'],
@@ -61,12 +275,9 @@ class DatabaseOperations:
     @staticmethod
     async def update_project(project_id: int, project_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a project"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """UPDATE project_table 
-                   SET project_name = $1, project_description = $2, database_id = $3,
-                       database_path = $4, project_path = $5
-                   WHERE project_id = $6 RETURNING *""",
+        async with db_manager.acquire() as conn:
+            row = await queries.fetchrow(
+                conn, "project.update",
                 project_data['project_name'],
                 project_data['project_description'],
                 project_data['database_id'],
@@ -74,122 +285,176 @@ class DatabaseOperations:
                 project_data['project_path'],
                 project_id
             )
+            db_manager.after_commit(sql_cache.invalidate_project, project_id)
+            # The project's database, and so its dialect, may have changed
+            db_manager.after_commit(schema_graph.invalidate_project, project_id)
             return dict(row) if row else None
     
     @staticmethod
     async def delete_project(project_id: int) -> bool:
         """Delete a project"""
-        async with db_manager.pool.acquire() as conn:
-            result = await conn.execute(
-                "DELETE FROM project_table WHERE project_id = $1",
+        async with db_manager.acquire() as conn:
+            result = await queries.fetchval(
+                conn, "project.delete",
                 project_id
             )
-            return result == "DELETE 1"
+            db_manager.after_commit(sql_cache.invalidate_project, project_id)
+            db_manager.after_commit(schema_graph.invalidate_project, project_id)
+            return result is not None
     
     # Table Operations
     @staticmethod
-    async def get_tables_by_project(project_id: int) -> List[Dict[str, Any]]:
-        """Get all tables for a project"""
-        async with db_manager.pool.acquire() as conn:
-            rows = await conn.fetch(
-                "SELECT * FROM all_table WHERE project_id = $1 ORDER BY table_id",
-                project_id
-            )
-            return [dict(row) for row in rows]
+    async def get_tables_by_project(project_id: int, columns: Optional[List[str]] = None,
+                                    after: Optional[int] = None,
+                                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get all tables for a project, optionally projected and keyset-paginated by table_id"""
+        return await DatabaseOperations._fetch_list(
+            "all_table", "table_id", columns, "project_id", project_id, after, limit
+        )
+    
+    @staticmethod
+    async def get_tables_by_project_json(project_id: int, columns: Optional[List[str]] = None,
+                                         after: Optional[int] = None,
+                                         limit: Optional[int] = None) -> JSONPage:
+        """Get a page of a project's tables as JSON text, served from the schema graph"""
+        graph = await DatabaseOperations._project_graph(project_id)
+        if graph is None:
+            return JSONPage('[]', 0, None)
+        return JSONPage(*page_json(graph.tables.values(), "table_id", columns, after, limit))
+    
+    @staticmethod
+    async def count_tables_by_project(project_id: int) -> int:
+        """Count the tables of a project"""
+        graph = await DatabaseOperations._project_graph(project_id)
+        return len(graph.tables) if graph else 0
     
     @staticmethod
     async def get_table_by_id(table_id: int) -> Optional[Dict[str, Any]]:
         """Get table by ID"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT * FROM all_table WHERE table_id = $1",
-                table_id
-            )
-            return dict(row) if row else None
+        project_id = schema_graph.project_of(table_id)
+        # Reads inside a batch transaction must see its uncommitted writes
+        if project_id is not None and not db_manager.in_transaction:
+            return schema_graph.get(project_id).tables[table_id].as_dict()
+        return await DatabaseOperations._get_by_id("table", "table.get", table_id)
     
     @staticmethod
     async def create_table(table_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new table"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """INSERT INTO all_table 
-                   (project_id, table_name, table_description, is_generated, generated_date)
-                   VALUES ($1, $2, $3, $4, $5) RETURNING *""",
+        async with db_manager.acquire() as conn:
+            row = await queries.fetchrow(
+                conn, "table.create",
                 table_data['project_id'],
                 table_data['table_name'],
                 table_data['table_description'],
                 table_data.get('is_generated', False),
                 table_data.get('generated_date')
             )
+            db_manager.after_commit(sql_cache.invalidate_project, row['project_id'])
+            db_manager.after_commit(schema_graph.apply_table, dict(row))
             return dict(row)
     
     @staticmethod
     async def update_table(table_id: int, table_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a table"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """UPDATE all_table 
-                   SET table_name = $1, table_description = $2, is_generated = $3, generated_date = $4
-                   WHERE table_id = $5 RETURNING *""",
+        async with db_manager.acquire() as conn:
+            row = await queries.fetchrow(
+                conn, "table.update",
                 table_data['table_name'],
                 table_data['table_description'],
                 table_data.get('is_generated', False),
                 table_data.get('generated_date'),
                 table_id
             )
-            return dict(row) if row else None
+            db_manager.after_commit(sql_cache.invalidate_table, table_id)
+            if not row:
+                return None
+            db_manager.after_commit(schema_graph.apply_table, dict(row))
+            return dict(row)
     
     @staticmethod
     async def delete_table(table_id: int) -> bool:
         """Delete a table"""
-        async with db_manager.pool.acquire() as conn:
-            result = await conn.execute(
-                "DELETE FROM all_table WHERE table_id = $1",
+        async with db_manager.acquire() as conn:
+            result = await queries.fetchval(
+                conn, "table.delete",
                 table_id
             )
-            return result == "DELETE 1"
+            db_manager.after_commit(sql_cache.invalidate_table, table_id)
+            db_manager.after_commit(schema_graph.remove_table, table_id)
+            return result is not None
     
     @staticmethod
     async def get_table_name(table_id: int) -> Optional[str]:
         """Get table name by ID"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT table_name FROM all_table WHERE table_id = $1",
-                table_id
-            )
-            return row['table_name'] if row else None
+        return (await DatabaseOperations.get_table_names([table_id]))[table_id]
+    
+    @staticmethod
+    async def get_table_names(table_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Get the names of several tables by ID, None for tables that do not exist.
+        
+        Tables of cached projects are answered from the schema graph; the
+        rest are read with one query, shared with the request's other table
+        lookups.
+        """
+        names: Dict[int, Optional[str]] = {}
+        missing = []
+        for table_id in table_ids:
+            project_id = schema_graph.project_of(table_id)
+            if project_id is not None and not db_manager.in_transaction:
+                names[table_id] = schema_graph.get(project_id).tables[table_id].table_name
+            else:
+                missing.append(table_id)
+        if missing:
+            batch = loader("table")
+            if batch is not None:
+                rows = await batch.load_many(missing)
+            else:
+                async with db_manager.acquire() as conn:
+                    found = {row['table_id']: row for row in await queries.fetch(conn, "table.get_many", missing)}
+                rows = [found.get(table_id) for table_id in missing]
+            for table_id, row in zip(missing, rows):
+                names[table_id] = row['table_name'] if row else None
+        return names
     
     # Field Operations
     @staticmethod
-    async def get_fields_by_table(table_id: int) -> List[Dict[str, Any]]:
-        """Get all fields for a table"""
-        async with db_manager.pool.acquire() as conn:
-            rows = await conn.fetch(
-                "SELECT * FROM table_wise_field WHERE table_id = $1 ORDER BY table_wise_field_id",
-                table_id
-            )
-            return [dict(row) for row in rows]
+    async def get_fields_by_table(table_id: int, columns: Optional[List[str]] = None,
+                                  after: Optional[int] = None,
+                                  limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get all fields for a table, optionally projected and keyset-paginated by table_wise_field_id"""
+        return await DatabaseOperations._fetch_list(
+            "table_wise_field", "table_wise_field_id", columns, "table_id", table_id, after, limit
+        )
+    
+    @staticmethod
+    async def get_fields_by_table_json(table_id: int, columns: Optional[List[str]] = None,
+                                       after: Optional[int] = None,
+                                       limit: Optional[int] = None) -> JSONPage:
+        """Get a page of a table's fields as JSON text, served from the schema graph"""
+        graph = await DatabaseOperations._table_graph(table_id)
+        if graph is None or table_id not in graph.tables:
+            return JSONPage('[]', 0, None)
+        fields = graph.tables[table_id].fields.values()
+        return JSONPage(*page_json(fields, "table_wise_field_id", columns, after, limit))
+    
+    @staticmethod
+    async def count_fields_by_table(table_id: int) -> int:
+        """Count the fields of a table"""
+        graph = await DatabaseOperations._table_graph(table_id)
+        return len(graph.tables[table_id].fields) if graph and table_id in graph.tables else 0
     
     @staticmethod
     async def get_field_by_id(field_id: int) -> Optional[Dict[str, Any]]:
         """Get field by ID"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT * FROM table_wise_field WHERE table_wise_field_id = $1",
-                field_id
-            )
-            return dict(row) if row else None
+        return await DatabaseOperations._get_by_id("field", "field.get", field_id)
     
     @staticmethod
     async def create_field(field_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new field"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """INSERT INTO table_wise_field 
-                   (table_id, field_name, field_datatype_id, is_primary, field_label, 
-                    display_name, is_auto_increment, is_foreign_key, reference_table_id, 
-                    reference_table_field_id)
-                   VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10) RETURNING *""",
+        async with db_manager.acquire() as conn:
+            row = await queries.fetchrow(
+                conn, "field.create",
                 field_data['table_id'],
                 field_data['field_name'],
                 field_data['field_datatype_id'],
@@ -201,18 +466,16 @@ class DatabaseOperations:
                 field_data.get('reference_table_id'),
                 field_data.get('reference_table_field_id')
             )
+            db_manager.after_commit(sql_cache.invalidate_table, row['table_id'])
+            db_manager.after_commit(schema_graph.apply_field, dict(row))
             return dict(row)
     
     @staticmethod
     async def update_field(field_id: int, field_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a field"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """UPDATE table_wise_field 
-                   SET table_id = $1, field_name = $2, field_datatype_id = $3, is_primary = $4,
-                       field_label = $5, display_name = $6, is_auto_increment = $7, 
-                       is_foreign_key = $8, reference_table_id = $9, reference_table_field_id = $10
-                   WHERE table_wise_field_id = $11 RETURNING *""",
+        async with db_manager.acquire() as conn:
+            row = await queries.fetchrow(
+                conn, "field.update",
                 field_data['table_id'],
                 field_data['field_name'],
                 field_data['field_datatype_id'],
@@ -225,70 +488,419 @@ class DatabaseOperations:
                 field_data.get('reference_table_field_id'),
                 field_id
             )
-            return dict(row) if row else None
+            if not row:
+                return None
+            field = dict(row)
+            # A field moved to another table changes both tables' DDL
+            db_manager.after_commit(sql_cache.invalidate_table, field.pop('previous_table_id'))
+            db_manager.after_commit(sql_cache.invalidate_table, field['table_id'])
+            db_manager.after_commit(schema_graph.apply_field, field)
+            return field
     
     @staticmethod
     async def delete_field(field_id: int) -> bool:
         """Delete a field"""
-        async with db_manager.pool.acquire() as conn:
-            result = await conn.execute(
-                "DELETE FROM table_wise_field WHERE table_wise_field_id = $1",
+        async with db_manager.acquire() as conn:
+            table_id = await queries.fetchval(
+                conn, "field.delete",
                 field_id
             )
-            return result == "DELETE 1"
+            db_manager.after_commit(sql_cache.invalidate_table, table_id)
+            db_manager.after_commit(schema_graph.remove_field, field_id)
+            return table_id is not None
+    
+    # Bulk Field Operations
+    @staticmethod
+    async def _validate_fields(conn, fields: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate a batch of complete field rows together, returning per-item errors"""
+        table_ids = {f['table_id'] for f in fields} | {
+            f['reference_table_id'] for f in fields if f.get('reference_table_id') is not None
+        }
+        reference_field_ids = {
+            f['reference_table_field_id'] for f in fields if f.get('reference_table_field_id') is not None
+        }
+        existing_tables = {
+            row['table_id'] for row in await queries.fetch(
+                conn, "table.existing_ids", list(table_ids)
+            )
+        }
+        reference_fields = {
+            row['table_wise_field_id']: row['table_id'] for row in await queries.fetch(
+                conn, "field.owners",
+                list(reference_field_ids)
+            )
+        }
+        
+        errors = []
+        seen_names = {}
+        for index, field in enumerate(fields):
+            problems = []
+            if field['table_id'] not in existing_tables:
+                problems.append(f"table {field['table_id']} does not exist")
+            if not datatype_registry.exists(field['field_datatype_id']):
+                problems.append(f"field_datatype_id {field['field_datatype_id']} does not exist")
+            reference_table_id = field.get('reference_table_id')
+            if reference_table_id is not None and reference_table_id not in existing_tables:
+                problems.append(f"reference table {reference_table_id} does not exist")
+            reference_field_id = field.get('reference_table_field_id')
+            if reference_field_id is not None:
+                owner = reference_fields.get(reference_field_id)
+                if owner is None:
+                    problems.append(f"reference field {reference_field_id} does not exist")
+                elif reference_table_id is not None and owner != reference_table_id:
+                    problems.append(f"reference field {reference_field_id} is not in table {reference_table_id}")
+            name_key = (field['table_id'], field['field_name'])
+            if name_key in seen_names:
+                problems.append(f"duplicate field name '{field['field_name']}' (item {seen_names[name_key]})")
+            else:
+                seen_names[name_key] = index
+            if problems:
+                errors.append({"index": index, "field_name": field['field_name'], "errors": problems})
+        return errors
+    
+    @staticmethod
+    async def create_fields_bulk(fields: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate and insert many fields in one transaction, returned in input order"""
+        if not fields:
+            return []
+        await datatype_registry.ensure_fresh()
+        async with db_manager.acquire() as conn:
+            async with conn.transaction():
+                errors = await DatabaseOperations._validate_fields(conn, fields)
+                if errors:
+                    raise BulkValidationError(errors)
+                rows = await queries.fetch(conn, "field.bulk_insert", *_field_columns(fields))
+        created = [dict(row) for row in rows]
+        for table_id in {row['table_id'] for row in created}:
+            db_manager.after_commit(sql_cache.invalidate_table, table_id)
+        for row in created:
+            db_manager.after_commit(schema_graph.apply_field, row)
+        return created
+    
+    @staticmethod
+    async def update_fields_bulk(updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply partial updates to many fields in one transaction.
+        
+        Each update carries table_wise_field_id plus the columns to change;
+        the current rows are locked and merged with the changes before the
+        batch is validated and written. Results follow the input order.
+        """
+        if not updates:
+            return []
+        field_ids = [update['table_wise_field_id'] for update in updates]
+        await datatype_registry.ensure_fresh()
+        async with db_manager.acquire() as conn:
+            async with conn.transaction():
+                current = {
+                    row['table_wise_field_id']: dict(row) for row in await queries.fetch(
+                        conn, "field.lock_many",
+                        field_ids
+                    )
+                }
+                errors = []
+                merged = []
+                seen_ids = set()
+                for index, update in enumerate(updates):
+                    field_id = update['table_wise_field_id']
+                    if field_id not in current:
+                        errors.append({"index": index, "table_wise_field_id": field_id,
+                                       "errors": [f"field {field_id} does not exist"]})
+                    elif field_id in seen_ids:
+                        errors.append({"index": index, "table_wise_field_id": field_id,
+                                       "errors": [f"field {field_id} is updated more than once"]})
+                    seen_ids.add(field_id)
+                    merged.append({**current.get(field_id, {}), **update})
+                if errors:
+                    raise BulkValidationError(errors)
+                errors = await DatabaseOperations._validate_fields(conn, merged)
+                if errors:
+                    raise BulkValidationError(errors)
+                rows = await queries.fetch(conn, "field.bulk_update", *_field_columns(merged), field_ids)
+        updated = {row['table_wise_field_id']: dict(row) for row in rows}
+        for table_id in {f['table_id'] for f in current.values()} | {f['table_id'] for f in updated.values()}:
+            db_manager.after_commit(sql_cache.invalidate_table, table_id)
+        for row in updated.values():
+            db_manager.after_commit(schema_graph.apply_field, row)
+        return [updated[field_id] for field_id in field_ids]
     
     # Field Datatype Operations
     @staticmethod
     async def get_all_datatypes() -> List[Dict[str, Any]]:
         """Get all field datatypes"""
-        async with db_manager.pool.acquire() as conn:
-            rows = await conn.fetch("SELECT * FROM field_datatype ORDER BY field_datatype_id")
-            return [dict(row) for row in rows]
+        return await datatype_registry.get_all()
     
     @staticmethod
     async def get_sql_type(datatype_id: int) -> str:
         """Get PostgreSQL type for a datatype ID"""
-        async with db_manager.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT postgresql FROM field_datatype WHERE field_datatype_id = $1",
-                datatype_id
-            )
-            return row['postgresql'] if row else 'TEXT'
+        await datatype_registry.ensure_fresh()
+        return datatype_registry.resolve(datatype_id)
     
     # SQL Generation
     @staticmethod
-    async def generate_sql(table_id: int) -> str:
-        """Generate SQL CREATE TABLE statement"""
-        async with db_manager.pool.acquire() as conn:
-            # Get table info
-            table_row = await conn.fetchrow(
-                "SELECT * FROM all_table WHERE table_id = $1",
+    async def _project_graph(project_id: int) -> Optional[ProjectGraph]:
+        """A project's schema graph, loaded into the cache on first access; None if there is no such project"""
+        graph = schema_graph.get(project_id)
+        if graph is not None:
+            return graph
+        token = schema_graph.begin_load()
+        # Cached until the next change, so never filled from a replica that may be behind it
+        async with db_manager.acquire(primary=True) as conn:
+            graph = await DatabaseOperations.read_project_graph(conn, project_id)
+        return schema_graph.put(graph, token) if graph else None
+    
+    @staticmethod
+    async def read_project_graph(conn, project_id: int) -> Optional[ProjectGraph]:
+        """Read a project's schema graph on conn, bypassing the cache; None if there is no such project"""
+        project = await queries.fetchrow(
+            conn, "generate.project",
+            project_id
+        )
+        if not project:
+            return None
+        table_rows = await queries.fetch(
+            conn, "generate.project_tables",
+            project_id
+        )
+        field_rows = await queries.fetch(
+            conn, "generate.project_fields",
+            project_id
+        )
+        return ProjectGraph(
+            project_id,
+            project['database_name'],
+            [dict(row) for row in table_rows],
+            [dict(row) for row in field_rows]
+        )
+    
+    @staticmethod
+    async def _table_graph(table_id: int) -> Optional[ProjectGraph]:
+        """The schema graph of the project a table belongs to; None if there is no such table"""
+        project_id = schema_graph.project_of(table_id)
+        if project_id is not None:
+            return await DatabaseOperations._project_graph(project_id)
+        async with db_manager.acquire(primary=True) as conn:
+            project_id = await queries.fetchval(
+                conn, "table.project",
                 table_id
             )
-            if not table_row:
-                raise ValueError("Table not found")
-            
-            # Get fields
-            field_rows = await conn.fetch(
-                "SELECT * FROM table_wise_field WHERE table_id = $1 ORDER BY table_wise_field_id",
-                table_id
+        if project_id is None:
+            return None
+        graph = await DatabaseOperations._project_graph(project_id)
+        if graph is not None and table_id not in graph.tables:
+            # The cached graph predates the table, e.g. one created by another
+            # worker or in SQL whose notification has not been applied yet
+            schema_graph.invalidate_project(project_id)
+            graph = await DatabaseOperations._project_graph(project_id)
+        return graph
+    
+    @staticmethod
+    async def _load_table_schema(table_id: int):
+        """Load a table's schema and its project's schema graph"""
+        # Refresh before taking a connection so a reload never nests an acquire
+        await datatype_registry.ensure_fresh()
+        graph = await DatabaseOperations._table_graph(table_id)
+        if graph is None or table_id not in graph.tables:
+            raise ValueError("Table not found")
+        return graph.table_schema(table_id), graph
+    
+    @staticmethod
+    async def generate_sql(table_id: int, dialects: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Generate the CREATE TABLE statement of a table for each requested dialect.
+        
+        Defaults to the dialect of the project's database. Returns a dict of
+        dialect name to script, in the requested order.
+        """
+        table, graph = await DatabaseOperations._load_table_schema(table_id)
+        dialects = dialects or [dialect_for_database(graph.database_name)]
+        return {
+            name: get_dialect(name).render_table(table, datatype_registry.type_map(name))
+            for name in dialects
+        }
+    
+    @staticmethod
+    async def get_sql_artifact(table_id: int, dialects: Optional[List[str]] = None) -> SQLArtifact:
+        """Generate a table's SQL response through the artifact cache"""
+        # A registry reload clears the cache, so it runs before the lookup
+        await datatype_registry.ensure_fresh()
+        key = ("table", table_id, tuple(dialects or ()))
+        artifact = sql_cache.get(key)
+        if artifact is not None:
+            return artifact
+        # Taken before loading, so a write committed while this renders keeps the result uncached
+        token = sql_cache.begin_load()
+        table, graph = await DatabaseOperations._load_table_schema(table_id)
+        dialects = dialects or [dialect_for_database(graph.database_name)]
+        scripts = {
+            name: get_dialect(name).render_table(table, datatype_registry.type_map(name))
+            for name in dialects
+        }
+        payload = {"query": scripts[dialects[0]], "dialect": dialects[0], "queries": scripts}
+        # Tagged with the tables it references too, so renaming or dropping one invalidates it
+        tags = [("table", table_id), ("project", graph.project_id)]
+        tags += [("table", reference_id) for reference_id in graph.referenced_tables(table_id)]
+        return sql_cache.put(key, payload, tags=tags, token=token)
+    
+    @staticmethod
+    async def get_project_schema(project_id: int) -> Optional[ProjectSchema]:
+        """Get a project's ordered schema from its schema graph"""
+        graph = await DatabaseOperations._project_graph(project_id)
+        return graph.schema() if graph else None
+    
+    @staticmethod
+    async def _render_project_sql(schema: ProjectSchema, dialects: Optional[List[str]]) -> Dict[str, Any]:
+        dialects = dialects or [dialect_for_database(schema.database_name)]
+        # Large projects render in the process pool, off the event loop
+        rendered = await render_pool.render(
+            schema, dialects, {name: datatype_registry.type_map(name) for name in dialects}
+        )
+        scripts = rendered.scripts
+        return {
+            "query": scripts[dialects[0]],
+            "dialect": dialects[0],
+            "queries": scripts,
+            "table_order": [table.name for table in schema.tables],
+            "deferred_constraints": [fk.name for fk in schema.deferred_foreign_keys],
+        }
+    
+    @staticmethod
+    async def generate_project_sql(project_id: int, dialects: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Generate the DDL script for every table of a project in FK dependency order"""
+        await datatype_registry.ensure_fresh()
+        schema = await DatabaseOperations.get_project_schema(project_id)
+        if schema is None:
+            raise ValueError("Project not found")
+        return await DatabaseOperations._render_project_sql(schema, dialects)
+    
+    @staticmethod
+    async def get_project_sql_artifact(project_id: int, dialects: Optional[List[str]] = None) -> SQLArtifact:
+        """Generate a project's SQL response through the artifact cache"""
+        # A registry reload clears the cache, so it runs before the lookup
+        await datatype_registry.ensure_fresh()
+        key = ("project", project_id, tuple(dialects or ()))
+        artifact = sql_cache.get(key)
+        if artifact is not None:
+            return artifact
+        token = sql_cache.begin_load()
+        schema = await DatabaseOperations.get_project_schema(project_id)
+        if schema is None:
+            raise ValueError("Project not found")
+        payload = await DatabaseOperations._render_project_sql(schema, dialects)
+        tags = [("project", project_id)] + [("table", table.table_id) for table in schema.tables]
+        return sql_cache.put(key, payload, tags=tags, token=token)
+    
+    # Migrations
+    @staticmethod
+    async def _migration_state(conn, graph: ProjectGraph, table_id: Optional[int]):
+        """Current tables, their snapshots and the latest snapshot time, for a project or one table"""
+        current = complete_tables(graph.schema())
+        if table_id is not None:
+            current = {table_id: current[table_id]}
+            rows = await queries.fetch(conn, "snapshot.table", table_id)
+        else:
+            rows = await queries.fetch(conn, "snapshot.project", graph.project_id)
+        snapshots = {}
+        for row in rows:
+            table = from_snapshot(row['snapshot'])
+            snapshots[table.table_id] = table
+        return current, snapshots, max((row['generated_at'] for row in rows), default=None)
+    
+    @staticmethod
+    def _render_migration(diffs: List[TableDiff], database_name: Optional[str], dialects: Optional[List[str]],
+                          snapshot_at: Optional[datetime], recorded: bool) -> Dict[str, Any]:
+        dialects = dialects or [dialect_for_database(database_name)]
+        scripts = {
+            name: get_dialect(name).render_migration(diffs, datatype_registry.type_map(name))
+            for name in dialects
+        }
+        return {
+            "query": scripts[dialects[0]],
+            "dialect": dialects[0],
+            "queries": scripts,
+            "changes": [diff.summary() for diff in diffs],
+            "snapshot_at": snapshot_at,
+            "recorded": recorded,
+        }
+    
+    @staticmethod
+    async def _migration(project_id: Optional[int], table_id: Optional[int], dialects: Optional[List[str]],
+                         record: bool) -> Dict[str, Any]:
+        await datatype_registry.ensure_fresh()
+        missing = "Table not found" if table_id is not None else "Project not found"
+        if not record:
+            if table_id is not None:
+                graph = await DatabaseOperations._table_graph(table_id)
+            else:
+                graph = await DatabaseOperations._project_graph(project_id)
+            if graph is None or (table_id is not None and table_id not in graph.tables):
+                raise ValueError(missing)
+            async with db_manager.acquire() as conn:
+                current, snapshots, snapshot_at = await DatabaseOperations._migration_state(conn, graph, table_id)
+            diffs = diff_project(snapshots, current)
+            return DatabaseOperations._render_migration(diffs, graph.database_name, dialects, snapshot_at, False)
+        
+        async with db_manager.transaction() as conn:
+            if table_id is not None:
+                project_id = await queries.fetchval(conn, "table.project", table_id)
+            # Recording migrations of a project one at a time keeps each diff based on the latest snapshot
+            if project_id is None or await queries.fetchval(conn, "project.lock", project_id) is None:
+                raise ValueError(missing)
+            graph = await DatabaseOperations.read_project_graph(conn, project_id)
+            current, snapshots, snapshot_at = await DatabaseOperations._migration_state(conn, graph, table_id)
+            diffs = diff_project(snapshots, current)
+            await queries.execute(
+                conn, "snapshot.save",
+                project_id,
+                list(current),
+                [snapshot(table) for table in current.values()]
             )
-            
-            table_name = table_row['table_name']
-            sql = f"CREATE TABLE {table_name} (\n"
-            
-            # Build column definitions
-            column_lines = []
-            for field in field_rows:
-                datatype = await DatabaseOperations.get_sql_type(field['field_datatype_id'])
-                line = f"  {field['field_name']} {datatype}"
-                
-                if field['is_auto_increment']:
-                    line += ' SERIAL'
-                if field['is_primary']:
-                    line += ' PRIMARY KEY'
-                
-                column_lines.append(line)
-            
-            sql += ',\n'.join(column_lines) + '\n);'
-            return sql 
\ No newline at end of file
+            if table_id is None:
+                await queries.execute(conn, "snapshot.delete_dropped", project_id, list(current))
+            rows = await queries.fetch(conn, "table.mark_generated", list(current))
+            for row in rows:
+                db_manager.after_commit(schema_graph.apply_table, dict(row))
+        return DatabaseOperations._render_migration(diffs, graph.database_name, dialects, snapshot_at, True)
+    
+    @staticmethod
+    async def get_table_migration(table_id: int, dialects: Optional[List[str]] = None,
+                                  record: bool = False) -> Dict[str, Any]:
+        """
+        Diff a table against its last recorded migration and render the ALTER statements.
+        
+        With record, the current schema becomes the table's snapshot and the
+        table is marked generated, in the transaction that read it.
+        """
+        return await DatabaseOperations._migration(None, table_id, dialects, record)
+    
+    @staticmethod
+    async def get_project_migration(project_id: int, dialects: Optional[List[str]] = None,
+                                    record: bool = False) -> Dict[str, Any]:
+        """Diff every table of a project, created and dropped ones included; record as for tables"""
+        return await DatabaseOperations._migration(project_id, None, dialects, record)
+    
+    # Search
+    @staticmethod
+    async def search(term: str, types: Optional[List[str]] = None, project_id: Optional[int] = None,
+                     limit: int = 20, offset: int = 0,
+                     min_score: float = SEARCH_MIN_SCORE) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Rank projects, tables and fields by trigram word similarity to a term.
+        
+        Returns a page of results, best first, and whether more follow. Each
+        type contributes at most offset + limit + 1 candidates, so a page
+        costs the same however many rows match, but deep pages cost more.
+        """
+        types = [result_type for result_type in SEARCH_DOCUMENTS if not types or result_type in types]
+        args = [term, offset + limit + 1, limit + 1, offset]
+        if project_id is not None:
+            args.append(project_id)
+        try:
+            async with db_manager.acquire() as conn:
+                async with conn.transaction():
+                    await queries.execute(conn, "search.threshold", str(min_score))
+                    rows = await conn.fetch(_search_query(types, project_id is not None), *args)
+        except asyncpg.UndefinedFunctionError:
+            raise SearchUnavailableError("Search needs the pg_trgm extension, which is not installed")
+        return [dict(row) for row in rows[:limit]], len(rows) > limit
+
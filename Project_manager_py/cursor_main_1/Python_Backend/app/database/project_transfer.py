@@ -0,0 +1,189 @@
+import json
+from typing import List, Optional, Dict, Any, AsyncIterator
+from .connection import db_manager
+from . import queries
+from .operations import _field_columns
+
+EXPORT_VERSION = 1
+
+TABLE_BATCH_SIZE = 500
+FIELD_BATCH_SIZE = 2000
+
+async def export_project(project_id: int, prefetch: int = 1000) -> AsyncIterator[str]:
+    """
+    Stream a project as NDJSON lines: one project line, then its tables, then their fields.
+    
+    Rows are read through server-side cursors inside one REPEATABLE READ
+    transaction, so memory stays constant and the export is a consistent
+    snapshot. Postgres renders each row as JSON; it is never decoded here.
+    Yields nothing when the project does not exist.
+    """
+    async with db_manager.acquire() as conn:
+        async with conn.transaction(isolation='repeatable_read', readonly=True):
+            project = await queries.fetchval(conn, "export.project", project_id)
+            if project is None:
+                return
+            yield f'{{"type":"project","version":{EXPORT_VERSION},"data":{project}}}\n'
+            async for row in queries.cursor(conn, "export.tables", project_id, prefetch=prefetch):
+                yield f'{{"type":"table","data":{row[0]}}}\n'
+            async for row in queries.cursor(conn, "export.fields", project_id, prefetch=prefetch):
+                yield f'{{"type":"field","data":{row[0]}}}\n'
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """Decode an NDJSON byte stream one line at a time, skipping blank lines"""
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _decode_line(line, line_number)
+    if buffer.strip():
+        yield _decode_line(buffer, line_number + 1)
+
+def _decode_line(line: bytes, line_number: int) -> Dict[str, Any]:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"Line {line_number}: invalid JSON ({e})")
+    if not isinstance(record, dict) or 'type' not in record or not isinstance(record.get('data'), dict):
+        raise ValueError(f"Line {line_number}: expected an object with 'type' and 'data'")
+    return record
+
+class ProjectImporter:
+    """
+    Ingest an exported project on one connection inside the caller's transaction.
+    
+    Tables and fields are inserted in batches with new IDs; the old -> new
+    mappings are kept so fields land in their new tables. Field references
+    are written last, once every field of the stream exists, and references
+    to tables or fields outside the imported project are cleared.
+    
+    With project_id the records are added to an existing project and the
+    stream must not contain a project record. Seed table_ids / field_ids
+    with identity entries to let references point at rows already there.
+    """
+    
+    def __init__(self, conn, project_name: Optional[str] = None, project_id: Optional[int] = None):
+        self.conn = conn
+        self.project_name = project_name
+        self.project_id = project_id
+        self.table_ids: Dict[int, int] = {}
+        self.field_ids: Dict[int, int] = {}
+        self._tables: List[Dict[str, Any]] = []
+        self._fields: List[Dict[str, Any]] = []
+        self._references: List[tuple] = []
+        self.unresolved_references = 0
+    
+    async def add(self, record: Dict[str, Any]):
+        kind, data = record['type'], record['data']
+        if kind == 'project':
+            await self._create_project(data)
+            return
+        if self.project_id is None:
+            raise ValueError("The first record must be the project")
+        if kind == 'table':
+            self._tables.append(data)
+            if len(self._tables) >= TABLE_BATCH_SIZE:
+                await self._flush_tables()
+        elif kind == 'field':
+            self._fields.append(data)
+            if len(self._fields) >= FIELD_BATCH_SIZE:
+                await self._flush_fields()
+        else:
+            raise ValueError(f"Unknown record type '{kind}'")
+    
+    async def finish(self) -> Dict[str, Any]:
+        """Flush pending batches and remap field references"""
+        if self.project_id is None:
+            raise ValueError("The stream contains no project")
+        await self._flush_fields()
+        await self._remap_references()
+        return {
+            "project_id": self.project_id,
+            "tables": len(self.table_ids),
+            "fields": len(self.field_ids),
+            "unresolved_references": self.unresolved_references,
+        }
+    
+    async def _create_project(self, data: Dict[str, Any]):
+        if self.project_id is not None:
+            raise ValueError("The stream contains more than one project")
+        self.project_id = await queries.fetchval(
+            self.conn, "import.project",
+            self.project_name or data['project_name'],
+            data.get('project_description'),
+            data['database_id'],
+            data.get('database_path'),
+            data.get('project_path')
+        )
+    
+    async def _flush_tables(self):
+        if not self._tables:
+            return
+        tables, self._tables = self._tables, []
+        rows = await queries.fetch(
+            self.conn, "import.tables",
+            self.project_id,
+            [t['table_name'] for t in tables],
+            [t.get('table_description') for t in tables],
+            [t.get('is_generated', False) for t in tables],
+            [t.get('generated_date') for t in tables]
+        )
+        for table, new_id in zip(tables, (row['table_id'] for row in rows)):
+            self.table_ids[table['table_id']] = new_id
+    
+    async def _flush_fields(self):
+        await self._flush_tables()
+        if not self._fields:
+            return
+        fields, self._fields = self._fields, []
+        values = []
+        for field in fields:
+            table_id = self.table_ids.get(field['table_id'])
+            if table_id is None:
+                raise ValueError(
+                    f"Field {field.get('table_wise_field_id')} belongs to table "
+                    f"{field['table_id']}, which is not in the stream before it"
+                )
+            values.append({
+                **field,
+                'table_id': table_id,
+                'reference_table_id': None,
+                'reference_table_field_id': None,
+            })
+        rows = await queries.fetch(self.conn, "field.bulk_insert", *_field_columns(values))
+        for field, new_id in zip(fields, (row['table_wise_field_id'] for row in rows)):
+            self.field_ids[field['table_wise_field_id']] = new_id
+            if field.get('reference_table_id') is not None or field.get('reference_table_field_id') is not None:
+                self._references.append(
+                    (new_id, field.get('reference_table_id'), field.get('reference_table_field_id'))
+                )
+    
+    async def _remap_references(self):
+        if not self._references:
+            return
+        field_ids, table_refs, field_refs = [], [], []
+        for new_id, old_table_id, old_field_id in self._references:
+            table_ref = self.table_ids.get(old_table_id) if old_table_id is not None else None
+            field_ref = self.field_ids.get(old_field_id) if old_field_id is not None else None
+            if (old_table_id is not None and table_ref is None) or (old_field_id is not None and field_ref is None):
+                self.unresolved_references += 1
+            field_ids.append(new_id)
+            table_refs.append(table_ref)
+            field_refs.append(field_ref)
+        await queries.fetch(
+            self.conn, "import.references",
+            field_ids, table_refs, field_refs
+        )
+
+async def import_project(records: AsyncIterator[Dict[str, Any]], project_name: Optional[str] = None) -> Dict[str, Any]:
+    """Import an NDJSON project stream in a single transaction"""
+    async with db_manager.acquire() as conn:
+        async with conn.transaction():
+            importer = ProjectImporter(conn, project_name)
+            async for record in records:
+                await importer.add(record)
+            return await importer.finish()
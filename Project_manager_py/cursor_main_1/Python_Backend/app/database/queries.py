@@ -0,0 +1,304 @@
+import asyncpg
+from typing import List, Optional, Dict, Any
+
+# Every fixed statement the backend runs, by name. Statements built at
+# request time (list pages with projections and cursors, counts) stay inline.
+QUERIES: Dict[str, str] = {
+    # Databases
+    "database.list": "SELECT * FROM database_table ORDER BY database_id",
+    "database.create": "INSERT INTO database_table (database_name) VALUES ($1) RETURNING *",
+
+    # Projects
+    "project.get": "SELECT * FROM project_table WHERE project_id = $1",
+    "project.get_many": "SELECT * FROM project_table WHERE project_id = ANY($1::int[])",
+    "project.tree": """
+        SELECT row_to_json(tree)::text FROM (
+            SELECT p.*, COALESCE((
+                SELECT json_agg(t_tree ORDER BY t_tree.table_id) FROM (
+                    SELECT t.*, COALESCE((
+                        SELECT json_agg(f ORDER BY f.table_wise_field_id)
+                        FROM table_wise_field f
+                        WHERE f.table_id = t.table_id
+                    ), '[]'::json) AS fields
+                    FROM all_table t
+                    WHERE t.project_id = p.project_id
+                ) t_tree
+            ), '[]'::json) AS tables
+            FROM project_table p
+            WHERE p.project_id = $1
+        ) tree""",
+    "project.create": """
+        INSERT INTO project_table
+        (project_name, project_description, database_id, database_path, project_path)
+        VALUES ($1, $2, $3, $4, $5) RETURNING *""",
+    "project.update": """
+        UPDATE project_table
+        SET project_name = $1, project_description = $2, database_id = $3,
+            database_path = $4, project_path = $5
+        WHERE project_id = $6 RETURNING *""",
+    "project.delete": "DELETE FROM project_table WHERE project_id = $1 RETURNING project_id",
+
+    # Tables
+    "table.get": "SELECT * FROM all_table WHERE table_id = $1",
+    "table.get_many": "SELECT * FROM all_table WHERE table_id = ANY($1::int[])",
+    "table.create": """
+        INSERT INTO all_table
+        (project_id, table_name, table_description, is_generated, generated_date)
+        VALUES ($1, $2, $3, $4, $5) RETURNING *""",
+    "table.update": """
+        UPDATE all_table
+        SET table_name = $1, table_description = $2, is_generated = $3, generated_date = $4
+        WHERE table_id = $5 RETURNING *""",
+    "table.delete": "DELETE FROM all_table WHERE table_id = $1 RETURNING table_id",
+    "table.project": "SELECT project_id FROM all_table WHERE table_id = $1",
+    "table.existing_ids": "SELECT table_id FROM all_table WHERE table_id = ANY($1::int[])",
+
+    # Fields
+    "field.get": "SELECT * FROM table_wise_field WHERE table_wise_field_id = $1",
+    "field.get_many": "SELECT * FROM table_wise_field WHERE table_wise_field_id = ANY($1::int[])",
+    "field.create": """
+        INSERT INTO table_wise_field
+        (table_id, field_name, field_datatype_id, is_primary, field_label,
+         display_name, is_auto_increment, is_foreign_key, reference_table_id,
+         reference_table_field_id)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10) RETURNING *""",
+    "field.update": """
+        WITH previous AS (
+            SELECT table_id FROM table_wise_field WHERE table_wise_field_id = $11
+        )
+        UPDATE table_wise_field
+        SET table_id = $1, field_name = $2, field_datatype_id = $3, is_primary = $4,
+            field_label = $5, display_name = $6, is_auto_increment = $7,
+            is_foreign_key = $8, reference_table_id = $9, reference_table_field_id = $10
+        WHERE table_wise_field_id = $11
+        RETURNING *, (SELECT table_id FROM previous) AS previous_table_id""",
+    "field.delete": "DELETE FROM table_wise_field WHERE table_wise_field_id = $1 RETURNING table_id",
+    "field.owners": """
+        SELECT table_wise_field_id, table_id FROM table_wise_field
+        WHERE table_wise_field_id = ANY($1::int[])""",
+    "field.lock_many": """
+        SELECT * FROM table_wise_field
+        WHERE table_wise_field_id = ANY($1::int[]) FOR UPDATE""",
+    # Values are bound as parallel arrays and expanded with unnest(), so a whole
+    # batch is written with one statement that still RETURNs the new rows. Each
+    # row's ID is drawn next to its ordinality, so the rows come back in input order
+    "field.bulk_insert": """
+        WITH v AS (
+            SELECT nextval(pg_get_serial_sequence('table_wise_field', 'table_wise_field_id'))::int
+                       AS table_wise_field_id, *
+            FROM unnest($1::int[], $2::varchar[], $3::int[], $4::bool[], $5::varchar[],
+                        $6::varchar[], $7::bool[], $8::bool[], $9::int[], $10::int[])
+                WITH ORDINALITY AS v (table_id, field_name, field_datatype_id, is_primary, field_label,
+                                      display_name, is_auto_increment, is_foreign_key, reference_table_id,
+                                      reference_table_field_id, ordinality)
+        ), inserted AS (
+            INSERT INTO table_wise_field
+                (table_wise_field_id, table_id, field_name, field_datatype_id, is_primary, field_label,
+                 display_name, is_auto_increment, is_foreign_key, reference_table_id,
+                 reference_table_field_id)
+            SELECT table_wise_field_id, table_id, field_name, field_datatype_id, is_primary, field_label,
+                   display_name, is_auto_increment, is_foreign_key, reference_table_id,
+                   reference_table_field_id
+            FROM v
+            RETURNING *
+        )
+        SELECT inserted.* FROM inserted JOIN v USING (table_wise_field_id) ORDER BY v.ordinality""",
+    "field.bulk_update": """
+        UPDATE table_wise_field f
+        SET table_id = v.table_id, field_name = v.field_name, field_datatype_id = v.field_datatype_id,
+            is_primary = v.is_primary, field_label = v.field_label, display_name = v.display_name,
+            is_auto_increment = v.is_auto_increment, is_foreign_key = v.is_foreign_key,
+            reference_table_id = v.reference_table_id, reference_table_field_id = v.reference_table_field_id
+        FROM unnest($1::int[], $2::varchar[], $3::int[], $4::bool[], $5::varchar[],
+                    $6::varchar[], $7::bool[], $8::bool[], $9::int[], $10::int[], $11::int[])
+            AS v (table_id, field_name, field_datatype_id, is_primary, field_label,
+                  display_name, is_auto_increment, is_foreign_key, reference_table_id,
+                  reference_table_field_id, table_wise_field_id)
+        WHERE f.table_wise_field_id = v.table_wise_field_id
+        RETURNING f.*""",
+
+    # Datatypes
+    "datatype.list": "SELECT * FROM field_datatype ORDER BY field_datatype_id",
+
+    # Search; set_config is a plain function, so this prepares without pg_trgm
+    "search.threshold": "SELECT set_config('pg_trgm.word_similarity_threshold', $1, true)",
+
+    # Replication positions as byte offsets; a server that is not a standby reports its own
+    "wal.primary_lsn": "SELECT (pg_current_wal_lsn() - '0/0'::pg_lsn)::bigint",
+    "wal.replica_lsn": """
+        SELECT (CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn()
+                     ELSE pg_current_wal_lsn() END - '0/0'::pg_lsn)::bigint""",
+
+    # SQL generation
+    "generate.project": """
+        SELECT p.project_id, d.database_name
+        FROM project_table p
+        LEFT JOIN database_table d ON d.database_id = p.database_id
+        WHERE p.project_id = $1""",
+    "generate.project_tables": "SELECT * FROM all_table WHERE project_id = $1 ORDER BY table_id",
+    "generate.project_fields": """
+        SELECT f.*
+        FROM table_wise_field f
+        JOIN all_table t ON t.table_id = f.table_id
+        WHERE t.project_id = $1
+        ORDER BY f.table_id, f.table_wise_field_id""",
+
+    # Schema snapshots for migrations
+    "snapshot.table": "SELECT snapshot::text, generated_at FROM schema_snapshot WHERE table_id = $1",
+    "snapshot.project": "SELECT snapshot::text, generated_at FROM schema_snapshot WHERE project_id = $1",
+    "snapshot.save": """
+        INSERT INTO schema_snapshot (table_id, project_id, snapshot)
+        SELECT v.table_id, $1, v.snapshot
+        FROM unnest($2::int[], $3::jsonb[]) AS v (table_id, snapshot)
+        ON CONFLICT (table_id) DO UPDATE
+        SET project_id = EXCLUDED.project_id, snapshot = EXCLUDED.snapshot, generated_at = now()""",
+    "snapshot.delete_dropped": """
+        DELETE FROM schema_snapshot WHERE project_id = $1 AND NOT (table_id = ANY($2::int[]))""",
+    "project.lock": "SELECT project_id FROM project_table WHERE project_id = $1 FOR UPDATE",
+    "table.mark_generated": """
+        UPDATE all_table SET is_generated = true, generated_date = now()
+        WHERE table_id = ANY($1::int[]) RETURNING *""",
+
+    # Project export / import
+    "export.project": "SELECT row_to_json(p)::text FROM project_table p WHERE p.project_id = $1",
+    "export.tables": """
+        SELECT row_to_json(t)::text FROM all_table t
+        WHERE t.project_id = $1 ORDER BY t.table_id""",
+    "export.fields": """
+        SELECT row_to_json(f)::text FROM table_wise_field f
+        JOIN all_table t ON t.table_id = f.table_id
+        WHERE t.project_id = $1 ORDER BY f.table_wise_field_id""",
+    "import.project": """
+        INSERT INTO project_table
+        (project_name, project_description, database_id, database_path, project_path)
+        VALUES ($1, $2, $3, $4, $5) RETURNING project_id""",
+    # IDs are drawn next to each row's ordinality, as in field.bulk_insert
+    "import.tables": """
+        WITH v AS (
+            SELECT nextval(pg_get_serial_sequence('all_table', 'table_id'))::int AS table_id, *
+            FROM unnest($2::varchar[], $3::text[], $4::bool[], $5::text[]) WITH ORDINALITY
+                AS v (table_name, table_description, is_generated, generated_date, ordinality)
+        ), inserted AS (
+            INSERT INTO all_table
+            (table_id, project_id, table_name, table_description, is_generated, generated_date)
+            SELECT v.table_id, $1, v.table_name, v.table_description, v.is_generated, v.generated_date::timestamp
+            FROM v
+            RETURNING table_id
+        )
+        SELECT table_id FROM inserted JOIN v USING (table_id) ORDER BY v.ordinality""",
+    "import.references": """
+        UPDATE table_wise_field f
+        SET reference_table_id = v.reference_table_id,
+            reference_table_field_id = v.reference_table_field_id
+        FROM unnest($1::int[], $2::int[], $3::int[])
+            AS v (table_wise_field_id, reference_table_id, reference_table_field_id)
+        WHERE f.table_wise_field_id = v.table_wise_field_id""",
+
+    # Generation jobs
+    "job.create": """
+        INSERT INTO generation_job (project_id, options) VALUES ($1, $2::jsonb)
+        ON CONFLICT (project_id) WHERE status IN ('queued', 'running') DO NOTHING
+        RETURNING *""",
+    "job.active": "SELECT * FROM generation_job WHERE project_id = $1 AND status IN ('queued', 'running')",
+    "job.notify": "SELECT pg_notify('generation_jobs', $1::text)",
+    "job.get": "SELECT * FROM generation_job WHERE job_id = $1",
+    "job.by_project": """
+        SELECT * FROM generation_job WHERE project_id = $1
+        ORDER BY job_id DESC LIMIT $2""",
+    # SKIP LOCKED lets every worker of every process poll the same queue
+    "job.claim": """
+        UPDATE generation_job
+        SET status = 'running', started_at = now(), heartbeat_at = now()
+        WHERE job_id = (
+            SELECT job_id FROM generation_job WHERE status = 'queued'
+            ORDER BY job_id LIMIT 1 FOR UPDATE SKIP LOCKED
+        )
+        RETURNING *""",
+    # start, progress and succeed return no row once the job is no longer
+    # running, e.g. after job.fail_stale failed it
+    "job.start": """
+        UPDATE generation_job SET tables_total = $2, output_path = $3, heartbeat_at = now()
+        WHERE job_id = $1 AND status = 'running' RETURNING job_id""",
+    "job.progress": """
+        UPDATE generation_job SET tables_done = $2, heartbeat_at = now()
+        WHERE job_id = $1 AND status = 'running' RETURNING job_id""",
+    "job.succeed": """
+        UPDATE generation_job
+        SET status = 'succeeded', tables_done = tables_total, files_written = $2, finished_at = now()
+        WHERE job_id = $1 AND status = 'running' RETURNING job_id""",
+    "job.fail": """
+        UPDATE generation_job SET status = 'failed', error = $2, finished_at = now()
+        WHERE job_id = $1 AND status = 'running'""",
+    "job.fail_stale": """
+        UPDATE generation_job
+        SET status = 'failed', error = 'The worker running the job stopped', finished_at = now()
+        WHERE status = 'running' AND heartbeat_at < now() - make_interval(secs => $1)""",
+
+    # Schema ingestion from a live database
+    "introspect.columns": """
+        SELECT c.relname AS table_name, a.attname AS column_name,
+               format_type(a.atttypid, a.atttypmod) AS data_type,
+               (a.attidentity <> '' OR coalesce(pg_get_expr(d.adbin, d.adrelid), '') LIKE 'nextval(%')
+                   AS is_auto_increment,
+               obj_description(c.oid, 'pg_class') AS table_description
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+        LEFT JOIN pg_attrdef d ON d.adrelid = c.oid AND d.adnum = a.attnum
+        WHERE n.nspname = $1 AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+        ORDER BY c.relname, a.attnum""",
+    "introspect.keys": """
+        SELECT con.contype::text AS contype, c.relname AS table_name, rc.relname AS reference_table,
+               array_agg(a.attname ORDER BY k.position) AS columns,
+               array_agg(ra.attname ORDER BY k.position) AS reference_columns
+        FROM pg_constraint con
+        JOIN pg_class c ON c.oid = con.conrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k (attnum, reference_attnum, position)
+        JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+        LEFT JOIN pg_class rc ON rc.oid = con.confrelid
+        LEFT JOIN pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = k.reference_attnum
+        WHERE n.nspname = $1 AND con.contype IN ('p', 'f')
+        GROUP BY con.oid, con.contype, c.relname, rc.relname
+        ORDER BY c.relname, con.conname""",
+}
+
+class PreparedConnection(asyncpg.Connection):
+    """
+    Connection whose statement cache is filled with the whole registry when it opens.
+    
+    Statements are kept in asyncpg's own per-connection cache rather than as
+    PreparedStatement objects, which are only valid for a single pool checkout.
+    """
+    
+    async def prepare_registry(self) -> int:
+        # Connection._get_statement(query, timeout) is private: it is what
+        # fetch() and execute() use to fill the cache, unchanged from asyncpg
+        # 0.27 through 0.32 (requirements.txt pins that range)
+        for sql in QUERIES.values():
+            await self._get_statement(sql, None)
+        return len(QUERIES)
+
+async def prepare_statements(conn: PreparedConnection):
+    """Pool init hook: prepare every registered statement once per physical connection"""
+    await conn.prepare_registry()
+
+async def fetch(conn, name: str, *args) -> List[asyncpg.Record]:
+    """Run a registered statement and return all rows"""
+    return await conn.fetch(QUERIES[name], *args)
+
+async def fetchrow(conn, name: str, *args) -> Optional[asyncpg.Record]:
+    """Run a registered statement and return the first row"""
+    return await conn.fetchrow(QUERIES[name], *args)
+
+async def fetchval(conn, name: str, *args) -> Any:
+    """Run a registered statement and return the first column of the first row"""
+    return await conn.fetchval(QUERIES[name], *args)
+
+async def execute(conn, name: str, *args) -> str:
+    """Run a registered statement and return its status"""
+    return await conn.execute(QUERIES[name], *args)
+
+def cursor(conn, name: str, *args, prefetch: Optional[int] = None):
+    """Open a server-side cursor over a registered statement; needs a transaction"""
+    return conn.cursor(QUERIES[name], *args, prefetch=prefetch)
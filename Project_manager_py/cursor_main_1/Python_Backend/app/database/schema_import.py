@@ -0,0 +1,171 @@
+import codecs
+import asyncpg
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
+from .connection import db_manager, connect_params
+from .datatype_registry import datatype_registry
+from .operations import DatabaseOperations
+from .project_transfer import ProjectImporter
+from . import queries
+from .ddl_parser import StatementSplitter, SchemaBuilder, ParsedTable, ParsedColumn, ParsedForeignKey, DatatypeMatcher
+from ..generation.cache import sql_cache
+from ..generation.graph import schema_graph
+
+async def parse_script(chunks: AsyncIterator[bytes]) -> Tuple[SchemaBuilder, int]:
+    """
+    Parse a SQL script streamed as UTF-8 bytes; returns the schema and the statement count.
+    
+    Only CREATE TABLE, ALTER TABLE and COMMENT ON statements are kept in
+    memory, so data sections of a dump cost no more than scanning them.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    splitter = StatementSplitter()
+    builder = SchemaBuilder()
+    async for chunk in chunks:
+        for statement in splitter.feed(decoder.decode(chunk)):
+            builder.add_statement(statement)
+    for statement in splitter.feed(decoder.decode(b"", final=True)) + splitter.close():
+        builder.add_statement(statement)
+    return builder, splitter.statements
+
+async def introspect_database(schema_name: str = "public", database: Optional[str] = None) -> SchemaBuilder:
+    """
+    Read the tables of a schema from the catalog of a database on the configured server.
+    
+    Without database, the backend's own database is read through the pool.
+    """
+    if database is None:
+        async with db_manager.acquire() as conn:
+            return await _introspect(conn, schema_name)
+    try:
+        conn = await asyncpg.connect(**{**connect_params(), "database": database})
+    except asyncpg.InvalidCatalogNameError:
+        raise ValueError(f"Database '{database}' does not exist")
+    try:
+        return await _introspect(conn, schema_name)
+    finally:
+        await conn.close()
+
+async def _introspect(conn, schema_name: str) -> SchemaBuilder:
+    builder = SchemaBuilder()
+    columns: Dict[str, List[ParsedColumn]] = {}
+    descriptions: Dict[str, Optional[str]] = {}
+    for row in await queries.fetch(conn, "introspect.columns", schema_name):
+        columns.setdefault(row['table_name'], []).append(
+            ParsedColumn(row['column_name'], row['data_type'], False, row['is_auto_increment'])
+        )
+        descriptions[row['table_name']] = row['table_description']
+    for name, table_columns in columns.items():
+        builder.add_table(ParsedTable(name, table_columns, descriptions[name]))
+    for row in await queries.fetch(conn, "introspect.keys", schema_name):
+        if row['contype'] == 'p':
+            builder.set_primary_key(row['table_name'], tuple(row['columns']))
+        else:
+            builder.foreign_keys.append(ParsedForeignKey(
+                row['table_name'], tuple(row['columns']), row['reference_table'], tuple(row['reference_columns'])
+            ))
+    return builder
+
+async def import_schema(project_id: int, builder: SchemaBuilder) -> Dict[str, Any]:
+    """
+    Create a parsed schema's tables and fields in a project, in one transaction.
+    
+    Rows go through ProjectImporter in batches. Foreign keys resolve by
+    table and column name against the parsed tables first, then the
+    project's existing ones; a clause naming no columns references the
+    primary key. Clauses that do not resolve are reported, not created.
+    Raises ValueError for a missing project or a table name already in it.
+    """
+    if not builder.tables:
+        raise ValueError("No CREATE TABLE statements found")
+    matcher = DatatypeMatcher(await datatype_registry.get_all())
+    if matcher.fallback_id is None:
+        raise ValueError("No field datatypes are defined")
+    
+    async with db_manager.transaction() as conn:
+        if await queries.fetchval(conn, "project.lock", project_id) is None:
+            raise ValueError("Project not found")
+        graph = await DatabaseOperations.read_project_graph(conn, project_id)
+        existing = {table.table_name.lower(): table for table in graph.tables.values()}
+        conflicts = [table.name for key, table in builder.tables.items() if key in existing]
+        if conflicts:
+            raise ValueError(f"Tables already in the project: {', '.join(conflicts[:10])}")
+        
+        # Parsed rows get negative placeholder IDs; existing rows map to themselves
+        importer = ProjectImporter(conn, project_id=project_id)
+        columns: Dict[str, Dict[str, int]] = {}
+        primary_keys: Dict[str, List[str]] = {}
+        table_ids: Dict[str, int] = {}
+        for key, table in existing.items():
+            importer.table_ids[table.table_id] = table.table_id
+            table_ids[key] = table.table_id
+            columns[key] = {}
+            primary_keys[key] = []
+            for field in table.fields.values():
+                importer.field_ids[field.table_wise_field_id] = field.table_wise_field_id
+                columns[key][field.field_name.lower()] = field.table_wise_field_id
+                if field.is_primary:
+                    primary_keys[key].append(field.field_name.lower())
+        next_field_id = 0
+        for index, (key, table) in enumerate(builder.tables.items()):
+            table_ids[key] = -(index + 1)
+            columns[key] = {}
+            for column in table.columns:
+                if column.name.lower() in columns[key]:
+                    raise ValueError(f"Column '{column.name}' appears twice in table '{table.name}'")
+                next_field_id -= 1
+                columns[key][column.name.lower()] = next_field_id
+            primary_keys[key] = [column.name.lower() for column in table.columns if column.is_primary]
+        
+        references: Dict[int, Tuple[int, int]] = {}
+        unresolved = []
+        for fk in builder.foreign_keys:
+            key, target = fk.table.lower(), fk.reference_table.lower()
+            local = [name.lower() for name in fk.columns]
+            remote = [name.lower() for name in fk.reference_columns] or primary_keys.get(target, [])
+            if (key not in builder.tables or target not in table_ids or len(local) != len(remote)
+                    or any(name not in columns[key] for name in local)
+                    or any(name not in columns[target] for name in remote)):
+                unresolved.append(
+                    f"{fk.table}({', '.join(fk.columns)}) -> {fk.reference_table}({', '.join(fk.reference_columns)})"
+                )
+                continue
+            for name, reference in zip(local, remote):
+                references[columns[key][name]] = (table_ids[target], columns[target][reference])
+        
+        approximated = set()
+        fields = 0
+        for key, table in builder.tables.items():
+            await importer.add({"type": "table", "data": {
+                "table_id": table_ids[key],
+                "table_name": table.name,
+                "table_description": table.description,
+            }})
+            for column in table.columns:
+                field_id = columns[key][column.name.lower()]
+                datatype_id, matched = matcher.match(column.type)
+                if not matched:
+                    approximated.add(column.type)
+                reference_table_id, reference_field_id = references.get(field_id, (None, None))
+                await importer.add({"type": "field", "data": {
+                    "table_wise_field_id": field_id,
+                    "table_id": table_ids[key],
+                    "field_name": column.name,
+                    "field_datatype_id": datatype_id,
+                    "is_primary": column.is_primary,
+                    "is_auto_increment": column.is_auto_increment,
+                    "is_foreign_key": field_id in references,
+                    "reference_table_id": reference_table_id,
+                    "reference_table_field_id": reference_field_id,
+                }})
+                fields += 1
+        await importer.finish()
+        db_manager.after_commit(sql_cache.invalidate_project, project_id)
+        db_manager.after_commit(schema_graph.invalidate_project, project_id)
+    return {
+        "project_id": project_id,
+        "tables": len(builder.tables),
+        "fields": fields,
+        "foreign_keys": len(references),
+        "unresolved_foreign_keys": unresolved,
+        "approximated_types": sorted(approximated),
+    }
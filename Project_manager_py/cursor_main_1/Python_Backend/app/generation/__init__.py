@@ -0,0 +1 @@
+# Generation package
@@ -0,0 +1,182 @@
+import keyword
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import List, Optional, Dict, Iterable, NamedTuple, Sequence
+from .schema import TableSchema
+from .dialects import get_dialect
+
+# Optional outputs besides the DDL scripts
+SCAFFOLDS = ("models", "crud")
+
+# Directory under a project's output path that each run replaces as a whole
+OUTPUT_DIRECTORY = "generated"
+
+# Python types for the base names of PostgreSQL native types; others become str
+PYTHON_TYPES = {
+    "smallint": "int", "integer": "int", "int": "int", "bigint": "int",
+    "serial": "int", "bigserial": "int",
+    "numeric": "Decimal", "decimal": "Decimal",
+    "real": "float", "double precision": "float", "float": "float",
+    "boolean": "bool", "bool": "bool",
+    "date": "date", "time": "time", "timestamp": "datetime", "timestamptz": "datetime",
+    "uuid": "UUID", "json": "Any", "jsonb": "Any", "bytea": "bytes",
+}
+
+MODELS_HEADER = '''"""Pydantic models generated from the project schema; regenerate rather than edit"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+'''
+
+class GeneratedFile(NamedTuple):
+    path: str
+    content: str
+
+def file_name(name: str) -> str:
+    """A table name made safe to use as a file name"""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name).lstrip('.') or '_'
+
+def _identifier(name: str) -> str:
+    identifier = re.sub(r'\W', '_', name)
+    if not identifier or identifier[0].isdigit() or keyword.iskeyword(identifier):
+        identifier = f"f_{identifier}"
+    return identifier
+
+def _class_name(name: str) -> str:
+    words = [word for word in re.split(r'[^A-Za-z0-9]+', name) if word]
+    class_name = ''.join(word[:1].upper() + word[1:] for word in words) or "Table"
+    return class_name if not class_name[0].isdigit() else f"T{class_name}"
+
+def python_type(native: Optional[str]) -> str:
+    base = (native or "").lower().split("(")[0].strip()
+    return PYTHON_TYPES.get(base, "str")
+
+def model_class_names(tables: Sequence[TableSchema]) -> List[str]:
+    """The model class name of each table, unique within the module"""
+    names = []
+    used = set()
+    for table in tables:
+        class_name = _class_name(table.name)
+        if class_name in used:
+            class_name = f"{class_name}{table.table_id}"
+        used.add(class_name)
+        names.append(class_name)
+    return names
+
+def render_model(table: TableSchema, class_name: str, postgresql_types: Dict[int, str]) -> str:
+    """
+    One table's Pydantic model.
+    
+    Keys that are not generated are required; every other column is
+    optional, as the DDL declares no NOT NULL. Column names that are not
+    valid identifiers get a sanitized attribute with the name as alias.
+    """
+    lines = [f"class {class_name}(BaseModel):"]
+    for column in table.columns:
+        annotation = python_type(postgresql_types.get(column.datatype_id))
+        required = column.is_primary and not column.is_auto_increment
+        attribute = _identifier(column.name)
+        if attribute != column.name:
+            default = f"Field(..., alias={column.name!r})" if required else f"Field(None, alias={column.name!r})"
+        else:
+            default = None if required else "None"
+        if not required:
+            annotation = f"Optional[{annotation}]"
+        lines.append(f"    {attribute}: {annotation}" + (f" = {default}" if default else ""))
+    if not table.columns:
+        lines.append("    pass")
+    return '\n'.join(lines) + '\n'
+
+def render_models(models: Sequence[str]) -> str:
+    """The models module, from render_model() output in table order"""
+    return '\n\n'.join([MODELS_HEADER, *models])
+
+def render_table_files(table: TableSchema, scripts: Dict[str, str], scaffold: Sequence[str]) -> List[GeneratedFile]:
+    """One table's CREATE script per dialect, from its render_table() output, and its CRUD statements when scaffolded"""
+    files = []
+    for name, script in scripts.items():
+        dialect = get_dialect(name)
+        stem = f"{name}/tables/{file_name(table.name)}"
+        files.append(GeneratedFile(stem + dialect.file_extension, script + '\n'))
+        crud = dialect.render_crud(table) if "crud" in scaffold else None
+        if crud:
+            files.append(GeneratedFile(f"{name}/crud/{file_name(table.name)}.sql", crud))
+    return files
+
+def render_project_files(scripts: Dict[str, str], models: Optional[str]) -> List[GeneratedFile]:
+    """The whole-project script per dialect, and the models module when scaffolded"""
+    files = [
+        GeneratedFile(f"{name}/schema{get_dialect(name).file_extension}", script + '\n')
+        for name, script in scripts.items()
+    ]
+    if models is not None:
+        files.append(GeneratedFile("models.py", models))
+    return files
+
+def output_directory(root: Path, project_path: Optional[str]) -> Path:
+    """
+    Where a project's files go: project_path taken relative to root.
+    
+    Leading separators and drive letters are dropped, so "/crm" and
+    "C:\\crm" both land in root/crm; paths that climb out of root are
+    rejected with ValueError.
+    """
+    parts = [part for part in re.split(r'[\\/]+', project_path or "") if part and not part.endswith(':')]
+    if not parts:
+        raise ValueError("Project has no project_path")
+    if any(part in ('.', '..') for part in parts):
+        raise ValueError("project_path must not contain '.' or '..' segments")
+    return root.joinpath(*parts)
+
+def stage_files(target: Path, staging_name: str, files: Iterable[GeneratedFile]) -> int:
+    """
+    Write a project's rendered files into the staging directory target/staging_name.
+    
+    publish_files() then makes them the project's output and
+    discard_files() drops them instead. Returns the files written.
+    """
+    staging = target / staging_name
+    staging.mkdir(parents=True, exist_ok=False)
+    written = 0
+    try:
+        for generated in files:
+            _write(staging, generated)
+            written += 1
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return written
+
+def publish_files(target: Path, staging_name: str):
+    """
+    Replace target/OUTPUT_DIRECTORY with a staging directory.
+    
+    Two renames, so readers see either the old files or the new ones, and
+    files of dropped tables disappear. On failure the previous output is
+    restored.
+    """
+    staging = target / staging_name
+    output = target / OUTPUT_DIRECTORY
+    previous = target / f"{staging_name}.previous"
+    try:
+        if output.exists():
+            os.replace(output, previous)
+        os.replace(staging, output)
+    except BaseException:
+        if previous.exists() and not output.exists():
+            os.replace(previous, output)
+        raise
+    shutil.rmtree(previous, ignore_errors=True)
+
+def discard_files(target: Path, staging_name: str):
+    """Remove a staging directory that was not published, if there is one"""
+    shutil.rmtree(target / staging_name, ignore_errors=True)
+
+def _write(directory: Path, generated: GeneratedFile):
+    path = directory / generated.path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(generated.content, encoding="utf-8")
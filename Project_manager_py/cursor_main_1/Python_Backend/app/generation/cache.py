@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Hashable, Iterable, NamedTuple, Set
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class SQLArtifact(NamedTuple):
+    """A generated SQL response, pre-serialized with its content hash"""
+    payload: Dict[str, Any]
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "SQLArtifact":
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        return cls(payload=payload, body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+
+class SQLArtifactCache:
+    """
+    LRU cache of generated SQL artifacts bounded by serialized size.
+    
+    Entries are tagged with the tables and projects they were generated
+    from (e.g. ("table", 7), ("project", 3)); writes invalidate by tag.
+    An artifact rendered across an invalidation is returned but not
+    stored, as it may predate the write.
+    """
+    
+    def __init__(self, max_bytes: Optional[int] = None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv("SQL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, SQLArtifact]" = OrderedDict()
+        self._entry_tags: Dict[Hashable, Set[Hashable]] = {}
+        self._tagged: Dict[Hashable, Set[Hashable]] = {}
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidation, even one that finds nothing to drop
+        self._epoch = 0
+    
+    def get(self, key: Hashable) -> Optional[SQLArtifact]:
+        artifact = self._entries.get(key)
+        if artifact is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return artifact
+    
+    def begin_load(self) -> int:
+        """Token to pass to put() for an artifact about to be rendered"""
+        return self._epoch
+    
+    def put(self, key: Hashable, payload: Dict[str, Any], tags: Iterable[Hashable], token: int) -> SQLArtifact:
+        """Serialize and store a payload, evicting least recently used entries past the budget"""
+        artifact = SQLArtifact.from_payload(payload)
+        if token != self._epoch:
+            return artifact
+        self._discard(key)
+        if len(artifact.body) > self.max_bytes:
+            return artifact
+        self._entries[key] = artifact
+        self._entry_tags[key] = set(tags)
+        for tag in self._entry_tags[key]:
+            self._tagged.setdefault(tag, set()).add(key)
+        self.size_bytes += len(artifact.body)
+        while self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+        return artifact
+    
+    def _discard(self, key: Hashable):
+        artifact = self._entries.pop(key, None)
+        if artifact is None:
+            return
+        self.size_bytes -= len(artifact.body)
+        for tag in self._entry_tags.pop(key, ()):
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+    
+    def invalidate(self, tag: Hashable):
+        """Drop every entry generated from the tagged table or project"""
+        self._epoch += 1
+        for key in list(self._tagged.get(tag, ())):
+            self._discard(key)
+            self.invalidations += 1
+    
+    def invalidate_table(self, table_id: Optional[int]):
+        if table_id is not None:
+            self.invalidate(("table", table_id))
+    
+    def invalidate_project(self, project_id: Optional[int]):
+        if project_id is not None:
+            self.invalidate(("project", project_id))
+    
+    def clear(self):
+        self._epoch += 1
+        self._entries.clear()
+        self._entry_tags.clear()
+        self._tagged.clear()
+        self.size_bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == etag:
+            return True
+    return False
+
+# Global generated SQL cache instance
+sql_cache = SQLArtifactCache()
@@ -0,0 +1,343 @@
+import json
+from typing import List, Optional, Dict, Any, Sequence
+from .schema import ColumnSchema, ForeignKeySchema, TableSchema, ProjectSchema, deferred_keys_by_table
+from .diff import TableDiff
+
+class Dialect:
+    """
+    Renders schema IR for one target database.
+    
+    `name` is also the field_datatype column holding the native type, and
+    `types` passed to the render methods maps field_datatype_id to it.
+    """
+    name = ""
+    default_type = "TEXT"
+    # Extension of the files generation jobs write this dialect's scripts to
+    file_extension = ".sql"
+    
+    def render_table(self, table: TableSchema, types: Dict[int, str]) -> str:
+        raise NotImplementedError
+    
+    def render_deferred(self, fks: List[ForeignKeySchema]) -> Optional[str]:
+        return None
+    
+    def render_project_table(self, table: TableSchema, deferred: Sequence[ForeignKeySchema],
+                             types: Dict[int, str]) -> str:
+        """Render a table as part of its project's script; deferred are its keys added after every table"""
+        return self.render_table(table, types)
+    
+    def render_project(self, schema: ProjectSchema, types: Dict[int, str],
+                       parts: Optional[List[str]] = None) -> str:
+        """
+        Render every table of a project in dependency order.
+        
+        parts are the tables' render_project_table() output, in schema
+        order, when they have been rendered already.
+        """
+        if parts is None:
+            deferred = deferred_keys_by_table(schema)
+            parts = [
+                self.render_project_table(table, deferred.get(table.table_id, ()), types)
+                for table in schema.tables
+            ]
+        parts = parts + [self.render_deferred(schema.deferred_foreign_keys)]
+        return '\n\n'.join(part for part in parts if part)
+    
+    def render_migration(self, diffs: List[TableDiff], types: Dict[int, str]) -> str:
+        """Render the statements that take a database from the snapshots to the current schema"""
+        raise NotImplementedError
+    
+    def render_crud(self, table: TableSchema) -> Optional[str]:
+        """Render named CRUD statements for a table, or None where the dialect has none"""
+        return None
+
+class SQLDialect(Dialect):
+    auto_increment = "SERIAL"
+    
+    def native_type(self, column: ColumnSchema, types: Dict[int, str]) -> str:
+        return types.get(column.datatype_id) or self.default_type
+    
+    def column_definition(self, column: ColumnSchema, types: Dict[int, str]) -> str:
+        definition = f"{column.name} {self.native_type(column, types)}"
+        if column.is_auto_increment:
+            definition += f" {self.auto_increment}"
+        return definition
+    
+    def render_column(self, column: ColumnSchema, types: Dict[int, str]) -> str:
+        line = f"  {self.column_definition(column, types)}"
+        if column.is_primary:
+            line += ' PRIMARY KEY'
+        return line
+    
+    def render_foreign_key(self, fk: ForeignKeySchema) -> str:
+        return (f"CONSTRAINT {fk.name} FOREIGN KEY ({fk.column}) "
+                f"REFERENCES {fk.reference_table} ({fk.reference_column})")
+    
+    def render_table(self, table: TableSchema, types: Dict[int, str]) -> str:
+        lines = [self.render_column(column, types) for column in table.columns]
+        lines.extend(f"  {self.render_foreign_key(fk)}" for fk in table.foreign_keys)
+        return f"CREATE TABLE {table.name} (\n" + ',\n'.join(lines) + '\n);'
+    
+    def render_deferred(self, fks: List[ForeignKeySchema]) -> Optional[str]:
+        if not fks:
+            return None
+        lines = ["-- Foreign keys deferred because of circular references"]
+        lines.extend(f"ALTER TABLE {fk.table} ADD {self.render_foreign_key(fk)};" for fk in fks)
+        return '\n'.join(lines)
+    
+    def placeholder(self, index: int) -> str:
+        """The bind parameter marker for the index-th (1-based) parameter"""
+        return "?"
+    
+    def render_crud(self, table: TableSchema) -> Optional[str]:
+        """
+        Named INSERT, SELECT, UPDATE and DELETE statements, one per `-- name:` block.
+        
+        Statements by key need a primary key, so a table without one gets
+        only the insert and the paged list.
+        """
+        if not table.columns:
+            return None
+        columns = [column.name for column in table.columns]
+        inserted = [column.name for column in table.columns if not column.is_auto_increment]
+        keys = [column.name for column in table.columns if column.is_primary]
+        blocks = []
+        if inserted:
+            blocks.append(
+                f"-- name: insert_{table.name}\n"
+                f"INSERT INTO {table.name} ({', '.join(inserted)})\n"
+                f"VALUES ({', '.join(self.placeholder(i) for i in range(1, len(inserted) + 1))});"
+            )
+        blocks.append(
+            f"-- name: list_{table.name}\n"
+            f"SELECT {', '.join(columns)}\nFROM {table.name}\nORDER BY {', '.join(keys or columns[:1])}\n"
+            f"LIMIT {self.placeholder(1)} OFFSET {self.placeholder(2)};"
+        )
+        if keys:
+            blocks.append(
+                f"-- name: get_{table.name}\n"
+                f"SELECT {', '.join(columns)}\nFROM {table.name}\nWHERE {self._key_condition(keys, 1)};"
+            )
+            values = [name for name in columns if name not in keys]
+            if values:
+                assignments = ', '.join(f"{name} = {self.placeholder(i)}" for i, name in enumerate(values, 1))
+                blocks.append(
+                    f"-- name: update_{table.name}\n"
+                    f"UPDATE {table.name}\nSET {assignments}\nWHERE {self._key_condition(keys, len(values) + 1)};"
+                )
+            blocks.append(
+                f"-- name: delete_{table.name}\nDELETE FROM {table.name}\nWHERE {self._key_condition(keys, 1)};"
+            )
+        return '\n\n'.join(blocks) + '\n'
+    
+    def _key_condition(self, keys: List[str], first: int) -> str:
+        return ' AND '.join(f"{key} = {self.placeholder(first + i)}" for i, key in enumerate(keys))
+    
+    def drop_foreign_key(self, fk: ForeignKeySchema) -> str:
+        return f"DROP CONSTRAINT {fk.name}"
+    
+    def drop_primary_key(self, table: TableSchema) -> str:
+        raise NotImplementedError
+    
+    def alter_column(self, table: str, before: ColumnSchema, after: ColumnSchema,
+                     types: Dict[int, str]) -> List[str]:
+        raise NotImplementedError
+    
+    def render_migration(self, diffs: List[TableDiff], types: Dict[int, str]) -> str:
+        """
+        Emit ALTER statements in an order every step can run in.
+        
+        Foreign keys are dropped before the columns and tables they use and
+        added after everything else, so new tables are created bare and the
+        order of tables within the migration does not matter.
+        """
+        statements = []
+        for diff in diffs:
+            if diff.before is not None:
+                statements.extend(
+                    f"ALTER TABLE {diff.before.name} {self.drop_foreign_key(fk)};" for fk in diff.dropped_foreign_keys
+                )
+        for diff in diffs:
+            if diff.action == "create":
+                statements.append(self.render_table(diff.after._replace(foreign_keys=()), types))
+            elif diff.action == "alter":
+                statements.extend(self._alter_table(diff, types))
+        for diff in diffs:
+            if diff.action == "drop":
+                statements.append(f"DROP TABLE {diff.before.name};")
+        for diff in diffs:
+            statements.extend(
+                f"ALTER TABLE {diff.after.name} ADD {self.render_foreign_key(fk)};" for fk in diff.added_foreign_keys
+            )
+        return '\n'.join(statements) if statements else "-- No changes since the last recorded migration"
+    
+    def _alter_table(self, diff: TableDiff, types: Dict[int, str]) -> List[str]:
+        statements = []
+        name = diff.before.name
+        if diff.renamed_table:
+            statements.append(f"ALTER TABLE {name} RENAME TO {diff.after.name};")
+            name = diff.after.name
+        statements.extend(
+            f"ALTER TABLE {name} RENAME COLUMN {change.before.name} TO {change.after.name};"
+            for change in diff.renamed
+        )
+        if diff.primary_key_changed and any(column.is_primary for column in diff.before.columns):
+            statements.append(f"ALTER TABLE {name} {self.drop_primary_key(diff.before)};")
+        statements.extend(f"ALTER TABLE {name} DROP COLUMN {column.name};" for column in diff.dropped)
+        statements.extend(
+            f"ALTER TABLE {name} ADD COLUMN {self.column_definition(column, types)};" for column in diff.added
+        )
+        for change in diff.altered:
+            statements.extend(self.alter_column(name, change.before, change.after, types))
+        primary_key = [column.name for column in diff.after.columns if column.is_primary]
+        if diff.primary_key_changed and primary_key:
+            statements.append(f"ALTER TABLE {name} ADD PRIMARY KEY ({', '.join(primary_key)});")
+        return statements
+
+class PostgreSQLDialect(SQLDialect):
+    name = "postgresql"
+    # SERIAL is a type of its own, so it cannot follow the column's type
+    auto_increment = "GENERATED BY DEFAULT AS IDENTITY"
+    
+    def placeholder(self, index: int) -> str:
+        return f"${index}"
+    
+    def drop_primary_key(self, table: TableSchema) -> str:
+        # The default constraint name; RENAME TO does not rename it, so a table
+        # renamed outside these migrations may need the name adjusted
+        return f"DROP CONSTRAINT {table.name}_pkey"
+    
+    def alter_column(self, table: str, before: ColumnSchema, after: ColumnSchema,
+                     types: Dict[int, str]) -> List[str]:
+        statements = []
+        native = self.native_type(after, types)
+        if self.native_type(before, types) != native:
+            statements.append(
+                f"ALTER TABLE {table} ALTER COLUMN {after.name} TYPE {native} USING {after.name}::{native};"
+            )
+        if after.is_auto_increment and not before.is_auto_increment:
+            statements.append(f"ALTER TABLE {table} ALTER COLUMN {after.name} ADD GENERATED BY DEFAULT AS IDENTITY;")
+        elif before.is_auto_increment and not after.is_auto_increment:
+            # Generated columns are identities, SERIAL ones have a sequence default;
+            # an identity must go first, as DROP DEFAULT fails on one
+            statements.append(f"ALTER TABLE {table} ALTER COLUMN {after.name} DROP IDENTITY IF EXISTS;")
+            statements.append(f"ALTER TABLE {table} ALTER COLUMN {after.name} DROP DEFAULT;")
+        return statements
+
+class MySQLDialect(SQLDialect):
+    name = "mysql"
+    auto_increment = "AUTO_INCREMENT"
+    
+    def drop_foreign_key(self, fk: ForeignKeySchema) -> str:
+        return f"DROP FOREIGN KEY {fk.name}"
+    
+    def drop_primary_key(self, table: TableSchema) -> str:
+        return "DROP PRIMARY KEY"
+    
+    def alter_column(self, table: str, before: ColumnSchema, after: ColumnSchema,
+                     types: Dict[int, str]) -> List[str]:
+        if self.column_definition(before._replace(name=after.name), types) == self.column_definition(after, types):
+            return []
+        return [f"ALTER TABLE {table} MODIFY COLUMN {self.column_definition(after, types)};"]
+
+class MongoDBDialect(Dialect):
+    """Renders each table as a createCollection call with a $jsonSchema validator"""
+    name = "mongodb"
+    default_type = "String"
+    file_extension = ".js"
+    
+    # field_datatype.mongodb holds shell type names; $jsonSchema wants BSON aliases
+    BSON_TYPES = {
+        "NumberLong": "long",
+        "NumberInt": "int",
+        "Double": "double",
+        "Decimal128": "decimal",
+        "String": "string",
+        "Boolean": "bool",
+        "Date": "date",
+        "BinData": "binData",
+        "ObjectId": "objectId",
+    }
+    
+    def bson_type(self, native: str) -> str:
+        return self.BSON_TYPES.get(native, native[:1].lower() + native[1:])
+    
+    def validator(self, table: TableSchema, types: Dict[int, str]) -> Dict[str, Any]:
+        references = {fk.column: fk for fk in table.foreign_keys}
+        properties: Dict[str, Any] = {}
+        for column in table.columns:
+            prop = {"bsonType": self.bson_type(types.get(column.datatype_id) or self.default_type)}
+            fk = references.get(column.name)
+            if fk:
+                prop["description"] = f"references {fk.reference_table}.{fk.reference_column}"
+            properties[column.name] = prop
+        json_schema: Dict[str, Any] = {"bsonType": "object"}
+        required = [column.name for column in table.columns if column.is_primary]
+        if required:
+            json_schema["required"] = required
+        json_schema["properties"] = properties
+        return {"$jsonSchema": json_schema}
+    
+    def render_table(self, table: TableSchema, types: Dict[int, str]) -> str:
+        options = json.dumps({"validator": self.validator(table, types)}, indent=2)
+        return f"db.createCollection({json.dumps(table.name)}, {options});"
+    
+    def render_migration(self, diffs: List[TableDiff], types: Dict[int, str]) -> str:
+        """Rename and unset fields in existing documents, then replace each collection's validator"""
+        statements = []
+        for diff in diffs:
+            if diff.action == "create":
+                statements.append(self.render_table(diff.after, types))
+                continue
+            collection = f"db.getCollection({json.dumps(diff.before.name)})"
+            if diff.action == "drop":
+                statements.append(f"{collection}.drop();")
+                continue
+            if diff.renamed_table:
+                statements.append(f"{collection}.renameCollection({json.dumps(diff.after.name)});")
+                collection = f"db.getCollection({json.dumps(diff.after.name)})"
+            if diff.renamed:
+                renames = {change.before.name: change.after.name for change in diff.renamed}
+                statements.append(f"{collection}.updateMany({{}}, {json.dumps({'$rename': renames})});")
+            if diff.dropped:
+                unset = {column.name: "" for column in diff.dropped}
+                statements.append(f"{collection}.updateMany({{}}, {json.dumps({'$unset': unset})});")
+            command = {"collMod": diff.after.name, "validator": self.validator(diff.after, types)}
+            statements.append(f"db.runCommand({json.dumps(command, indent=2)});")
+        return '\n\n'.join(statements) if statements else "// No changes since the last recorded migration"
+    
+    def render_project_table(self, table: TableSchema, deferred: Sequence[ForeignKeySchema],
+                             types: Dict[int, str]) -> str:
+        # Collections have no load-order constraints, so deferred keys become descriptions too
+        return self.render_table(table._replace(foreign_keys=table.foreign_keys + tuple(deferred)), types)
+
+DIALECTS: Dict[str, Dialect] = {
+    dialect.name: dialect
+    for dialect in (PostgreSQLDialect(), MySQLDialect(), MongoDBDialect())
+}
+
+DEFAULT_DIALECT = "postgresql"
+
+def get_dialect(name: str) -> Dialect:
+    """Get a dialect by name, raising ValueError for unknown names"""
+    dialect = DIALECTS.get(name.lower())
+    if dialect is None:
+        raise ValueError(f"Unknown dialect '{name}', expected one of: {', '.join(DIALECTS)}")
+    return dialect
+
+def dialect_for_database(database_name: Optional[str]) -> str:
+    """Map a database_table.database_name (e.g. 'mongoDB') to a dialect name"""
+    name = (database_name or "").lower()
+    return name if name in DIALECTS else DEFAULT_DIALECT
+
+def parse_dialects(value: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated dialect query parameter, validating each name"""
+    if not value:
+        return None
+    names = []
+    for part in value.split(','):
+        if part.strip():
+            name = get_dialect(part.strip()).name
+            if name not in names:
+                names.append(name)
+    return names or None
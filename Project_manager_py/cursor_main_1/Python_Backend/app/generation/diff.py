@@ -0,0 +1,134 @@
+import json
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
+from .schema import ColumnSchema, ForeignKeySchema, TableSchema, ProjectSchema
+
+class ColumnChange(NamedTuple):
+    before: ColumnSchema
+    after: ColumnSchema
+
+class TableDiff(NamedTuple):
+    """
+    Changes to one table between its snapshot and its current schema.
+    
+    Columns are matched by field ID, so an edited field_name is a rename
+    rather than a drop and an add. `before` is None for a table created
+    since the snapshot and `after` is None for a dropped one.
+    """
+    table_id: int
+    before: Optional[TableSchema]
+    after: Optional[TableSchema]
+    added: Tuple[ColumnSchema, ...] = ()
+    dropped: Tuple[ColumnSchema, ...] = ()
+    renamed: Tuple[ColumnChange, ...] = ()
+    # Datatype or auto-increment changes; dialects skip those with the same native type
+    altered: Tuple[ColumnChange, ...] = ()
+    primary_key_changed: bool = False
+    added_foreign_keys: Tuple[ForeignKeySchema, ...] = ()
+    dropped_foreign_keys: Tuple[ForeignKeySchema, ...] = ()
+    
+    @property
+    def action(self) -> str:
+        if self.before is None:
+            return "create"
+        if self.after is None:
+            return "drop"
+        return "alter"
+    
+    @property
+    def renamed_table(self) -> bool:
+        return self.before is not None and self.after is not None and self.before.name != self.after.name
+    
+    @property
+    def changed(self) -> bool:
+        return self.action != "alter" or self.renamed_table or any((
+            self.added, self.dropped, self.renamed, self.altered, self.primary_key_changed,
+            self.added_foreign_keys, self.dropped_foreign_keys
+        ))
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "table_id": self.table_id,
+            "table": (self.after or self.before).name,
+            "action": self.action,
+            "renamed_from": self.before.name if self.renamed_table else None,
+            "added_columns": [column.name for column in self.added],
+            "dropped_columns": [column.name for column in self.dropped],
+            "renamed_columns": [{"from": change.before.name, "to": change.after.name} for change in self.renamed],
+            "altered_columns": [change.after.name for change in self.altered],
+            "primary_key_changed": self.primary_key_changed,
+            "added_foreign_keys": [fk.name for fk in self.added_foreign_keys],
+            "dropped_foreign_keys": [fk.name for fk in self.dropped_foreign_keys],
+        }
+
+def snapshot(table: TableSchema) -> str:
+    """Serialize a table schema for schema_snapshot; the nested NamedTuples become arrays"""
+    return json.dumps(table, separators=(',', ':'))
+
+def from_snapshot(data: str) -> TableSchema:
+    table_id, name, columns, foreign_keys = json.loads(data)
+    return TableSchema(
+        table_id=table_id,
+        name=name,
+        columns=tuple(ColumnSchema(*column) for column in columns),
+        foreign_keys=tuple(ForeignKeySchema(*fk) for fk in foreign_keys),
+    )
+
+def complete_tables(schema: ProjectSchema) -> Dict[int, TableSchema]:
+    """Each table of a project with all its foreign keys, deferred ones included, in schema order"""
+    deferred: Dict[int, List[ForeignKeySchema]] = {}
+    for fk in schema.deferred_foreign_keys:
+        deferred.setdefault(fk.table_id, []).append(fk)
+    return {
+        table.table_id: table._replace(foreign_keys=table.foreign_keys + tuple(deferred.get(table.table_id, ())))
+        for table in schema.tables
+    }
+
+def _foreign_key_identity(fk: ForeignKeySchema):
+    # Referenced tables are matched by ID: renaming one leaves the constraint intact
+    return fk.name, fk.column, fk.reference_table_id, fk.reference_column
+
+def diff_table(before: Optional[TableSchema], after: Optional[TableSchema]) -> TableDiff:
+    """Diff two versions of a table in time linear in its columns"""
+    if before is None:
+        return TableDiff(after.table_id, None, after, added=after.columns, added_foreign_keys=after.foreign_keys)
+    if after is None:
+        # Its keys are dropped first, as a table dropped with it may be one they reference
+        return TableDiff(
+            before.table_id, before, None, dropped=before.columns, dropped_foreign_keys=before.foreign_keys
+        )
+    
+    old = {column.field_id: column for column in before.columns}
+    new = {column.field_id: column for column in after.columns}
+    renamed, altered = [], []
+    for column in after.columns:
+        previous = old.get(column.field_id)
+        if previous is None:
+            continue
+        if previous.name != column.name:
+            renamed.append(ColumnChange(previous, column))
+        if (previous.datatype_id, previous.is_auto_increment) != (column.datatype_id, column.is_auto_increment):
+            altered.append(ColumnChange(previous, column))
+    
+    old_keys = {_foreign_key_identity(fk) for fk in before.foreign_keys}
+    new_keys = {_foreign_key_identity(fk) for fk in after.foreign_keys}
+    return TableDiff(
+        after.table_id,
+        before,
+        after,
+        added=tuple(column for column in after.columns if column.field_id not in old),
+        dropped=tuple(column for column in before.columns if column.field_id not in new),
+        renamed=tuple(renamed),
+        altered=tuple(altered),
+        primary_key_changed=(
+            {column.field_id for column in before.columns if column.is_primary}
+            != {column.field_id for column in after.columns if column.is_primary}
+        ),
+        added_foreign_keys=tuple(fk for fk in after.foreign_keys if _foreign_key_identity(fk) not in old_keys),
+        dropped_foreign_keys=tuple(fk for fk in before.foreign_keys if _foreign_key_identity(fk) not in new_keys),
+    )
+
+def diff_project(before: Dict[int, TableSchema], after: Dict[int, TableSchema]) -> List[TableDiff]:
+    """Diff every table of a project; current tables in schema order, then dropped ones"""
+    diffs = [diff_table(before.get(table_id), table) for table_id, table in after.items()]
+    diffs.extend(diff_table(table, None) for table_id, table in before.items() if table_id not in after)
+    return [diff for diff in diffs if diff.changed]
@@ -0,0 +1,341 @@
+import json
+import os
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Iterable, Sequence, Set
+from dotenv import load_dotenv
+from ..metrics import metrics
+from .cache import sql_cache
+from .schema import ProjectSchema, TableSchema, build_table_schema, build_project_schema
+
+load_dotenv()
+
+class FieldNode:
+    """A table_wise_field row"""
+    __slots__ = (
+        'table_wise_field_id', 'table_id', 'field_name', 'field_datatype_id', 'is_primary',
+        'field_label', 'display_name', 'is_auto_increment', 'is_foreign_key',
+        'reference_table_id', 'reference_table_field_id'
+    )
+    
+    def __init__(self, row: Dict[str, Any]):
+        for column in self.__slots__:
+            setattr(self, column, row.get(column))
+    
+    def as_dict(self, columns: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        return {column: getattr(self, column) for column in columns or self.__slots__}
+
+class TableNode:
+    """An all_table row and its fields in table_wise_field_id order"""
+    __slots__ = (
+        'table_id', 'project_id', 'table_name', 'table_description', 'is_generated',
+        'generated_date', 'fields'
+    )
+    COLUMNS = __slots__[:-1]
+    
+    def __init__(self, row: Dict[str, Any], fields: Optional[Dict[int, FieldNode]] = None):
+        for column in self.COLUMNS:
+            setattr(self, column, row.get(column))
+        self.fields: Dict[int, FieldNode] = fields if fields is not None else {}
+    
+    def as_dict(self, columns: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        return {column: getattr(self, column) for column in columns or self.COLUMNS}
+
+class ProjectGraph:
+    """
+    One project's tables, fields and foreign key edges.
+    
+    The ordered ProjectSchema used for generation is built on first use and
+    kept until the next change to the project.
+    """
+    __slots__ = ('project_id', 'database_name', 'tables', '_schema')
+    
+    def __init__(self, project_id: int, database_name: Optional[str], table_rows: Iterable[Dict[str, Any]],
+                 field_rows: Iterable[Dict[str, Any]]):
+        self.project_id = project_id
+        self.database_name = database_name
+        self.tables: Dict[int, TableNode] = {row['table_id']: TableNode(row) for row in table_rows}
+        for row in field_rows:
+            self.tables[row['table_id']].fields[row['table_wise_field_id']] = FieldNode(row)
+        self._schema: Optional[ProjectSchema] = None
+    
+    def fields(self) -> Iterable[FieldNode]:
+        for table in self.tables.values():
+            yield from table.fields.values()
+    
+    def referenced_tables(self, table_id: int) -> Set[int]:
+        """Other tables a table's foreign key fields point at"""
+        return {
+            field.reference_table_id for field in self.tables[table_id].fields.values()
+            if field.is_foreign_key and field.reference_table_id not in (None, table_id)
+        }
+    
+    def references_to(self, table_id: int) -> List[FieldNode]:
+        """Fields of the project whose foreign key points at a table"""
+        return [field for field in self.fields() if field.reference_table_id == table_id]
+    
+    def schema(self) -> ProjectSchema:
+        if self._schema is None:
+            self._schema = build_project_schema(
+                self.project_id,
+                self.database_name,
+                [table.as_dict() for table in self.tables.values()],
+                [field.as_dict() for field in self.fields()]
+            )
+        return self._schema
+    
+    def table_schema(self, table_id: int) -> TableSchema:
+        table = self.tables[table_id]
+        return build_table_schema(table_id, table.table_name, [field.as_dict() for field in table.fields.values()])
+    
+    def changed(self):
+        self._schema = None
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def page_json(nodes: Iterable[Any], key: str, columns: Optional[Sequence[str]], after: Optional[int],
+              limit: Optional[int]):
+    """Serialize a keyset page of nodes the way the Postgres list queries do; returns (body, count, last key)"""
+    rows = []
+    for node in nodes:
+        if after is not None and getattr(node, key) <= after:
+            continue
+        if limit is not None and len(rows) == limit:
+            break
+        rows.append(node.as_dict(columns))
+    body = json.dumps(rows, separators=(',', ':'), default=_json_default)
+    return body, len(rows), rows[-1][key] if rows else None
+
+def _insert_ordered(nodes: Dict[int, Any], key: int, node: Any) -> Dict[int, Any]:
+    """Add a node keeping ID order; new rows almost always have the highest ID"""
+    if nodes and key < next(reversed(nodes)):
+        return dict(sorted({**nodes, key: node}.items()))
+    nodes[key] = node
+    return nodes
+
+def _timestamp(value: Any) -> Any:
+    # Notification payloads carry timestamps as JSON strings
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+class SchemaGraphCache:
+    """
+    LRU of project schema graphs, bounded by project count.
+    
+    Graphs are loaded lazily by DatabaseOperations and then kept current by
+    the write paths (after commit) and by change notifications from other
+    workers. A load that overlaps a change is used once but not cached, so
+    a graph read before the change cannot overwrite it.
+    """
+    
+    def __init__(self, max_projects: Optional[int] = None):
+        if max_projects is None:
+            max_projects = int(os.getenv("SCHEMA_GRAPH_MAX_PROJECTS", "256"))
+        self.max_projects = max_projects
+        self._projects: "OrderedDict[int, ProjectGraph]" = OrderedDict()
+        # table_id -> project_id for every cached table
+        self._table_projects: Dict[int, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, project_id: int) -> Optional[ProjectGraph]:
+        graph = self._projects.get(project_id)
+        if graph is None:
+            self.misses += 1
+            return None
+        self._projects.move_to_end(project_id)
+        self.hits += 1
+        return graph
+    
+    def project_of(self, table_id: int) -> Optional[int]:
+        """Project of a cached table, or None if the table's project is not cached"""
+        return self._table_projects.get(table_id)
+    
+    def begin_load(self) -> int:
+        """Token to pass to put() for a graph about to be read from the database"""
+        return self._epoch
+    
+    def put(self, graph: ProjectGraph, token: int) -> ProjectGraph:
+        if token != self._epoch or self.max_projects <= 0:
+            return graph
+        self._discard(graph.project_id)
+        self._projects[graph.project_id] = graph
+        for table_id in graph.tables:
+            self._table_projects[table_id] = graph.project_id
+        while len(self._projects) > self.max_projects:
+            self._discard(next(iter(self._projects)))
+            self.evictions += 1
+        return graph
+    
+    def _discard(self, project_id: Optional[int]):
+        graph = self._projects.pop(project_id, None)
+        if graph is not None:
+            for table_id in graph.tables:
+                self._table_projects.pop(table_id, None)
+    
+    def _cached_table(self, table_id: Optional[int]):
+        project_id = self._table_projects.get(table_id)
+        if project_id is None:
+            return None, None
+        graph = self._projects[project_id]
+        return graph, graph.tables[table_id]
+    
+    # Incremental updates; each takes the row as committed
+    def apply_table(self, row: Dict[str, Any]):
+        self._epoch += 1
+        graph, table = self._cached_table(row['table_id'])
+        if table is not None and table.project_id != row['project_id']:
+            del graph.tables[table.table_id]
+            del self._table_projects[table.table_id]
+            graph.changed()
+            graph = table = None
+        if graph is None:
+            graph = self._projects.get(row['project_id'])
+            if graph is None:
+                return
+        if table is None:
+            graph.tables = _insert_ordered(graph.tables, row['table_id'], TableNode(row))
+            self._table_projects[row['table_id']] = graph.project_id
+        else:
+            for column in TableNode.COLUMNS:
+                setattr(table, column, row.get(column))
+        graph.changed()
+    
+    def remove_table(self, table_id: int):
+        self._epoch += 1
+        graph, table = self._cached_table(table_id)
+        if graph is None:
+            return
+        del graph.tables[table_id]
+        del self._table_projects[table_id]
+        # Mirror the ON DELETE SET NULL foreign keys on table_wise_field
+        for field in graph.references_to(table_id):
+            field.reference_table_id = None
+        removed_fields = set(table.fields)
+        for field in graph.fields():
+            if field.reference_table_field_id in removed_fields:
+                field.reference_table_field_id = None
+        graph.changed()
+    
+    def apply_field(self, row: Dict[str, Any]):
+        self._epoch += 1
+        field_id = row['table_wise_field_id']
+        graph, table = self._cached_table(row['table_id'])
+        if table is None or field_id not in table.fields:
+            # New, or moved here from another table
+            self._remove_field(field_id, clear_references=False)
+        if table is None:
+            return
+        field = table.fields.get(field_id)
+        if field is None:
+            table.fields = _insert_ordered(table.fields, field_id, FieldNode(row))
+        else:
+            for column in FieldNode.__slots__:
+                setattr(field, column, row.get(column))
+        graph.changed()
+    
+    def remove_field(self, field_id: int):
+        self._epoch += 1
+        self._remove_field(field_id, clear_references=True)
+    
+    def _remove_field(self, field_id: int, clear_references: bool):
+        for graph in self._projects.values():
+            for table in graph.tables.values():
+                if table.fields.pop(field_id, None) is None:
+                    continue
+                if clear_references:
+                    for field in graph.fields():
+                        if field.reference_table_field_id == field_id:
+                            field.reference_table_field_id = None
+                graph.changed()
+                return
+    
+    def invalidate_project(self, project_id: Optional[int]):
+        self._epoch += 1
+        if project_id in self._projects:
+            self._discard(project_id)
+            self.invalidations += 1
+    
+    def clear(self):
+        self._epoch += 1
+        self._projects.clear()
+        self._table_projects.clear()
+    
+    def handle_notification(self, payload: Optional[str]):
+        """Listener callback for the change channel; None means events were missed"""
+        if payload is None:
+            self.clear()
+            sql_cache.clear()
+            return
+        event = json.loads(payload)
+        # Other workers' writes reach this worker's generated SQL only through here
+        sql_cache.invalidate_table(event.get('table_id'))
+        sql_cache.invalidate_project(event.get('project_id'))
+        resource, op, data = event['resource'], event['op'], event.get('data')
+        if resource == 'project':
+            # A project update may change its database, which the graph resolves by join
+            self.invalidate_project(event['id'])
+        elif op == 'delete':
+            if resource == 'table':
+                self.remove_table(event['id'])
+            else:
+                self.remove_field(event['id'])
+        elif data is None:
+            # The row did not fit in the notification
+            self.invalidate_project(event.get('project_id'))
+            if resource == 'table':
+                self.invalidate_project(self._table_projects.get(event['id']))
+        elif resource == 'table':
+            self.apply_table({**data, 'generated_date': _timestamp(data.get('generated_date'))})
+        else:
+            self.apply_field(data)
+    
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def memory_bytes(self) -> int:
+        """Approximate size of the cached graphs: nodes, their containers and values"""
+        total = sys.getsizeof(self._projects) + sys.getsizeof(self._table_projects)
+        for graph in self._projects.values():
+            total += sys.getsizeof(graph) + sys.getsizeof(graph.tables)
+            for table in graph.tables.values():
+                total += sys.getsizeof(table) + sys.getsizeof(table.fields)
+                total += sum(sys.getsizeof(getattr(table, column)) for column in TableNode.COLUMNS)
+                for field in table.fields.values():
+                    total += sys.getsizeof(field)
+                    total += sum(sys.getsizeof(getattr(field, column)) for column in FieldNode.__slots__)
+        return total
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "projects": len(self._projects),
+            "tables": len(self._table_projects),
+            "fields": sum(len(table.fields) for graph in self._projects.values() for table in graph.tables.values()),
+            "max_projects": self.max_projects,
+            "memory_bytes": self.memory_bytes(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+# Global schema graph cache instance
+schema_graph = SchemaGraphCache()
+
+metrics.gauge(
+    "schema_graph_projects", "Projects held in the schema graph cache",
+    lambda: len(schema_graph._projects)
+)
+metrics.gauge(
+    "schema_graph_hit_ratio", "Share of schema graph lookups served from memory",
+    lambda: schema_graph.hit_rate
+)
@@ -0,0 +1,208 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Dict, Tuple, Sequence, Callable, NamedTuple
+from dotenv import load_dotenv
+from .schema import ColumnSchema, ForeignKeySchema, TableSchema, ProjectSchema, deferred_keys_by_table
+from .dialects import get_dialect
+from .artifacts import GeneratedFile, model_class_names, render_model, render_models, render_table_files, render_project_files
+from ..metrics import metrics
+
+load_dotenv()
+
+# Shards per process, so one slow shard does not leave the other processes idle
+SHARDS_PER_PROCESS = 4
+
+class RenderedProject(NamedTuple):
+    # Whole-project script per dialect, in the requested order
+    scripts: Dict[str, str]
+    # Every generated file, when files were requested
+    files: List[GeneratedFile]
+
+# (table_id, name, columns, foreign_keys, deferred keys, model class name), all plain tuples
+PackedTable = Tuple[int, str, tuple, tuple, tuple, Optional[str]]
+
+def _pack(table: TableSchema, deferred: Sequence[ForeignKeySchema], class_name: Optional[str]) -> PackedTable:
+    # Plain tuples pickle without a class reference per column and key
+    return (
+        table.table_id, table.name,
+        tuple(map(tuple, table.columns)), tuple(map(tuple, table.foreign_keys)), tuple(map(tuple, deferred)),
+        class_name,
+    )
+
+def _unpack(packed: PackedTable) -> Tuple[TableSchema, Tuple[ForeignKeySchema, ...], Optional[str]]:
+    table_id, name, columns, foreign_keys, deferred, class_name = packed
+    table = TableSchema(
+        table_id=table_id,
+        name=name,
+        columns=tuple(ColumnSchema(*column) for column in columns),
+        foreign_keys=tuple(ForeignKeySchema(*fk) for fk in foreign_keys),
+    )
+    return table, tuple(ForeignKeySchema(*fk) for fk in deferred), class_name
+
+def render_shard(dialects: Sequence[str], type_maps: Dict[str, Dict[int, str]], scaffold: Sequence[str],
+                 with_files: bool, tables: Sequence[PackedTable]):
+    """
+    Render a slice of a project's tables, in the pool's processes or inline.
+    
+    Returns each dialect's project script parts for the tables, and with
+    with_files their files and model classes, all in table order.
+    """
+    parts: Dict[str, List[str]] = {name: [] for name in dialects}
+    files: List[GeneratedFile] = []
+    models: List[str] = []
+    for packed in tables:
+        table, deferred, class_name = _unpack(packed)
+        scripts = {}
+        for name in dialects:
+            dialect = get_dialect(name)
+            part = dialect.render_project_table(table, deferred, type_maps[name])
+            parts[name].append(part)
+            if with_files:
+                # A table's own script never includes the keys deferred to the end of the project's
+                scripts[name] = dialect.render_table(table, type_maps[name]) if deferred else part
+        if with_files:
+            files.extend(render_table_files(table, scripts, scaffold))
+            if class_name is not None:
+                models.append(render_model(table, class_name, type_maps["postgresql"]))
+    return parts, files, models
+
+def _ready() -> int:
+    return os.getpid()
+
+class RenderPool:
+    """
+    Render large projects in a pool of processes, off the event loop.
+    
+    A project of RENDER_POOL_MIN_TABLES tables or more is packed into plain
+    tuples and split by table into shards that RENDER_PROCESSES processes
+    render in parallel; the shards are merged back in table order, so the
+    output matches rendering inline. Smaller projects, and every project
+    when RENDER_PROCESSES is 0, render inline on the event loop.
+    
+    RENDER_PROCESSES is per server process, so it defaults to one: with
+    several uvicorn workers, each starts its own pool. If a rendering
+    process dies, the pool is replaced and that render runs inline.
+    """
+    
+    def __init__(self, processes: Optional[int] = None, min_tables: Optional[int] = None):
+        if processes is None:
+            processes = int(os.getenv("RENDER_PROCESSES", "1"))
+        if min_tables is None:
+            min_tables = int(os.getenv("RENDER_POOL_MIN_TABLES", "200"))
+        self.processes = processes
+        self.min_tables = min_tables
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    async def start(self):
+        if self.processes <= 0 or self._executor is not None:
+            return
+        self._executor = self._new_executor()
+        # Start the processes now rather than on the first large project
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._executor, _ready) for _ in range(self.processes)])
+        print(f"Started {self.processes} rendering processes")
+    
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Spawned rather than forked: the parent has an event loop and threads
+        return ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+    
+    def _replace_broken(self, executor: ProcessPoolExecutor):
+        # Renders that failed together replace the pool once
+        if self._executor is not executor:
+            return
+        print("A rendering process died; restarting the render pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._new_executor()
+        pool_restarts.inc()
+    
+    async def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def render(self, schema: ProjectSchema, dialects: Sequence[str], type_maps: Dict[str, Dict[int, str]],
+                     scaffold: Sequence[str] = (), with_files: bool = False,
+                     progress: Optional[Callable[[int], None]] = None) -> RenderedProject:
+        """
+        Render a project's scripts for each dialect, and with with_files every generated file.
+        
+        type_maps holds each dialect's types, and "postgresql" as well when
+        the models scaffold is rendered. progress is called with the number
+        of tables rendered so far.
+        """
+        start = time.perf_counter()
+        deferred = deferred_keys_by_table(schema)
+        with_models = with_files and "models" in scaffold
+        class_names = model_class_names(schema.tables) if with_models else [None] * len(schema.tables)
+        packed = [
+            _pack(table, deferred.get(table.table_id, ()), class_name)
+            for table, class_name in zip(schema.tables, class_names)
+        ]
+        executor = self._executor
+        shards = None
+        if executor is not None and len(packed) >= self.min_tables:
+            try:
+                shards = await self._render_shards(
+                    executor, dialects, type_maps, scaffold, with_files, packed, progress
+                )
+                renders.inc("pool")
+            except BrokenProcessPool:
+                self._replace_broken(executor)
+        if shards is None:
+            shards = [render_shard(dialects, type_maps, scaffold, with_files, packed)]
+            if progress is not None:
+                progress(len(packed))
+            renders.inc("inline")
+        
+        scripts = {}
+        for name in dialects:
+            parts = [part for shard_parts, _, _ in shards for part in shard_parts[name]]
+            scripts[name] = get_dialect(name).render_project(schema, type_maps[name], parts)
+        files = []
+        if with_files:
+            files = [generated for _, shard_files, _ in shards for generated in shard_files]
+            models = render_models([model for _, _, shard_models in shards for model in shard_models]) if with_models else None
+            files.extend(render_project_files(scripts, models))
+        render_duration.observe(time.perf_counter() - start)
+        return RenderedProject(scripts, files)
+    
+    async def _render_shards(self, executor, dialects, type_maps, scaffold, with_files, packed, progress):
+        loop = asyncio.get_running_loop()
+        size = math.ceil(len(packed) / (self.processes * SHARDS_PER_PROCESS))
+        futures = [
+            loop.run_in_executor(
+                executor, render_shard, dialects, type_maps, scaffold, with_files, packed[i:i + size]
+            )
+            for i in range(0, len(packed), size)
+        ]
+        try:
+            if progress is not None:
+                done = 0
+                for finished in asyncio.as_completed(futures):
+                    shard_parts, _, _ = await finished
+                    done += len(shard_parts[dialects[0]])
+                    progress(done)
+            # Gathered in shard order, so the merge is deterministic whichever finished first
+            return await asyncio.gather(*futures)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+# Global render pool
+render_pool = RenderPool()
+
+renders = metrics.counter(
+    "project_renders_total", "Project renders, inline or in the process pool", labels=("mode",)
+)
+pool_restarts = metrics.counter(
+    "render_pool_restarts_total", "Render pools replaced after a rendering process died"
+)
+render_duration = metrics.histogram(
+    "project_render_seconds", "Time to render a project's scripts and files"
+)
@@ -0,0 +1,208 @@
+import heapq
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
+
+class ColumnSchema(NamedTuple):
+    """A table_wise_field row reduced to what DDL rendering needs"""
+    field_id: int
+    name: str
+    datatype_id: int
+    is_primary: bool
+    is_auto_increment: bool
+
+class ForeignKeySchema(NamedTuple):
+    """A resolved foreign key from one column to a column of another table"""
+    name: str
+    table_id: int
+    table: str
+    column: str
+    reference_table_id: int
+    reference_table: str
+    reference_column: str
+
+class TableSchema(NamedTuple):
+    table_id: int
+    name: str
+    columns: Tuple[ColumnSchema, ...]
+    foreign_keys: Tuple[ForeignKeySchema, ...]
+
+class ProjectSchema(NamedTuple):
+    """Tables in dependency order plus the constraints that must be added afterwards"""
+    project_id: int
+    database_name: Optional[str]
+    tables: Tuple[TableSchema, ...]
+    deferred_foreign_keys: Tuple[ForeignKeySchema, ...]
+
+def deferred_keys_by_table(schema: ProjectSchema) -> Dict[int, Tuple[ForeignKeySchema, ...]]:
+    """A project's deferred foreign keys grouped by the table they belong to"""
+    deferred: Dict[int, Tuple[ForeignKeySchema, ...]] = {}
+    for fk in schema.deferred_foreign_keys:
+        deferred[fk.table_id] = deferred.get(fk.table_id, ()) + (fk,)
+    return deferred
+
+def _column(field: Dict[str, Any]) -> ColumnSchema:
+    return ColumnSchema(
+        field_id=field['table_wise_field_id'],
+        name=field['field_name'],
+        datatype_id=field['field_datatype_id'],
+        is_primary=field['is_primary'],
+        is_auto_increment=field['is_auto_increment'],
+    )
+
+def build_table_schema(table_id: int, table_name: str, field_rows: List[Dict[str, Any]]) -> TableSchema:
+    """Build the schema of a single table, without foreign keys"""
+    return TableSchema(
+        table_id=table_id,
+        name=table_name,
+        columns=tuple(_column(field) for field in field_rows),
+        foreign_keys=(),
+    )
+
+def _resolve_foreign_keys(table_rows: List[Dict[str, Any]],
+                          field_rows: List[Dict[str, Any]]) -> Dict[int, List[ForeignKeySchema]]:
+    """Resolve is_foreign_key fields to table/column names within the same project"""
+    table_names = {row['table_id']: row['table_name'] for row in table_rows}
+    field_names = {row['table_wise_field_id']: row['field_name'] for row in field_rows}
+    primary_keys: Dict[int, List[str]] = {}
+    for field in field_rows:
+        if field['is_primary']:
+            primary_keys.setdefault(field['table_id'], []).append(field['field_name'])
+    
+    foreign_keys: Dict[int, List[ForeignKeySchema]] = {}
+    for field in field_rows:
+        reference_table_id = field['reference_table_id']
+        if not field['is_foreign_key'] or reference_table_id not in table_names:
+            continue
+        reference_column = field_names.get(field['reference_table_field_id'])
+        if reference_column is None:
+            # Fall back to the referenced table's primary key when it is a single column
+            keys = primary_keys.get(reference_table_id, [])
+            if len(keys) != 1:
+                continue
+            reference_column = keys[0]
+        table_name = table_names[field['table_id']]
+        foreign_keys.setdefault(field['table_id'], []).append(ForeignKeySchema(
+            name=f"fk_{table_name}_{field['field_name']}",
+            table_id=field['table_id'],
+            table=table_name,
+            column=field['field_name'],
+            reference_table_id=reference_table_id,
+            reference_table=table_names[reference_table_id],
+            reference_column=reference_column,
+        ))
+    return foreign_keys
+
+def _strongly_connected_components(table_ids: List[int], dependencies: Dict[int, set]) -> List[List[int]]:
+    """Iterative Tarjan's algorithm, safe for projects with thousands of tables"""
+    index: Dict[int, int] = {}
+    low: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack = set()
+    components = []
+    for root in table_ids:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(sorted(dependencies.get(root, ()))))]
+        while work:
+            node, edges = work[-1]
+            for reference_id in edges:
+                if reference_id not in index:
+                    index[reference_id] = low[reference_id] = len(index)
+                    stack.append(reference_id)
+                    on_stack.add(reference_id)
+                    work.append((reference_id, iter(sorted(dependencies.get(reference_id, ())))))
+                    break
+                if reference_id in on_stack:
+                    low[node] = min(low[node], index[reference_id])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+    return components
+
+def order_tables(table_ids: List[int], dependencies: Dict[int, set]) -> List[int]:
+    """
+    Topologically sort tables so referenced tables come first.
+    
+    Tables that reference each other in a cycle are kept together in table
+    ID order; the foreign keys inside such a cycle that point forward have
+    to be deferred by the caller. Ties are broken by table ID so the order
+    is deterministic.
+    """
+    known = set(table_ids)
+    dependencies = {
+        table_id: {ref for ref in dependencies.get(table_id, ()) if ref in known and ref != table_id}
+        for table_id in table_ids
+    }
+    components = _strongly_connected_components(sorted(table_ids), dependencies)
+    component_of = {table_id: i for i, component in enumerate(components) for table_id in component}
+    
+    dependents: List[set] = [set() for _ in components]
+    in_degree = [0] * len(components)
+    for table_id, references in dependencies.items():
+        for reference_id in references:
+            source, target = component_of[reference_id], component_of[table_id]
+            if source != target and target not in dependents[source]:
+                dependents[source].add(target)
+                in_degree[target] += 1
+    
+    ready = [(components[i][0], i) for i in range(len(components)) if in_degree[i] == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, i = heapq.heappop(ready)
+        order.extend(components[i])
+        for dependent in dependents[i]:
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                heapq.heappush(ready, (components[dependent][0], dependent))
+    return order
+
+def build_project_schema(project_id: int, database_name: Optional[str], table_rows: List[Dict[str, Any]],
+                         field_rows: List[Dict[str, Any]]) -> ProjectSchema:
+    """Build the ordered schema of a project from its all_table and table_wise_field rows"""
+    columns: Dict[int, List[ColumnSchema]] = {row['table_id']: [] for row in table_rows}
+    for field in field_rows:
+        columns[field['table_id']].append(_column(field))
+    foreign_keys = _resolve_foreign_keys(table_rows, field_rows)
+    dependencies = {
+        table_id: {fk.reference_table_id for fk in fks}
+        for table_id, fks in foreign_keys.items()
+    }
+    order = order_tables([row['table_id'] for row in table_rows], dependencies)
+    
+    position = {table_id: index for index, table_id in enumerate(order)}
+    table_names = {row['table_id']: row['table_name'] for row in table_rows}
+    tables = []
+    deferred = []
+    for table_id in order:
+        inline = []
+        for fk in foreign_keys.get(table_id, ()):
+            if position[fk.reference_table_id] > position[table_id]:
+                deferred.append(fk)
+            else:
+                inline.append(fk)
+        tables.append(TableSchema(
+            table_id=table_id,
+            name=table_names[table_id],
+            columns=tuple(columns[table_id]),
+            foreign_keys=tuple(inline),
+        ))
+    return ProjectSchema(
+        project_id=project_id,
+        database_name=database_name,
+        tables=tuple(tables),
+        deferred_foreign_keys=tuple(deferred),
+    )
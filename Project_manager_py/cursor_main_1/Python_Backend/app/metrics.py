@@ -0,0 +1,194 @@
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from typing import Callable, List, Optional, Dict, Tuple
+
+# Latency buckets in seconds, from sub-millisecond pool hits to slow generation
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metric:
+    kind = ""
+    
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+    
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    kind = "counter"
+    
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *label_values: str, amount: float = 1.0):
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+    
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, values)} {value}"
+            for values, value in sorted(self._values.items())
+        ]
+
+class Gauge(Metric):
+    """A gauge read from a callback at scrape time, so updating it costs nothing"""
+    kind = "gauge"
+    
+    def __init__(self, name: str, description: str, callback: Callable[[], Optional[float]]):
+        super().__init__(name, description)
+        self.callback = callback
+    
+    def samples(self) -> List[str]:
+        value = self.callback()
+        return [] if value is None else [f"{self.name} {value}"]
+
+class Histogram(Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = buckets
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+    
+    def observe(self, value: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+    
+    def samples(self) -> List[str]:
+        lines = []
+        for values, series in sorted(self._series.items()):
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, description: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, description, labels))
+    
+    def gauge(self, name: str, description: str, callback: Callable[[], Optional[float]]) -> Gauge:
+        return self.register(Gauge(name, description, callback))
+    
+    def histogram(self, name: str, description: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, labels, buckets))
+    
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Global metrics registry instance
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+
+db_operations = metrics.counter(
+    "db_operations_total", "DatabaseOperations calls by method and outcome", ("operation", "status")
+)
+db_operation_duration = metrics.histogram(
+    "db_operation_duration_seconds", "DatabaseOperations latency by method, including pool waits",
+    ("operation",)
+)
+
+def _timed(name: str, func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await func(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            db_operation_duration.observe(time.perf_counter() - start, name)
+            db_operations.inc(name, status)
+    return wrapper
+
+def instrument_operations(cls):
+    """Class decorator timing every public async static method of an operations class"""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_'):
+            continue
+        if isinstance(attr, staticmethod) and inspect.iscoroutinefunction(attr.__func__):
+            setattr(cls, name, staticmethod(_timed(name, attr.__func__)))
+    return cls
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request by its route template.
+    
+    Timing stops when the response starts, so streamed bodies count their
+    time to first byte rather than the whole transfer.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        recorded = False
+        
+        def record(status: int):
+            nonlocal recorded
+            recorded = True
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(time.perf_counter() - start, scope["method"], path)
+            http_requests.inc(scope["method"], path, str(status))
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not recorded:
+                record(500)
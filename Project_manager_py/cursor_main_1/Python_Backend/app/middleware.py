@@ -0,0 +1,141 @@
+from http.cookies import SimpleCookie
+from .database.connection import db_manager, request_pool_state, request_read_routing
+from .database.loaders import loader_scope
+
+class LoadSheddingMiddleware:
+    """
+    Reject requests with 503 and Retry-After while the pool is overloaded.
+    
+    Requests are refused up front once the acquire queue reaches
+    PG_POOL_MAX_QUEUE. A request that still hits the queue limit or the
+    acquire timeout inside a handler is answered with 503 as well, even
+    when the handler turned the PoolOverloadedError into a generic 500.
+    """
+    
+    # Paths that never touch the pool and must stay reachable under load
+    EXEMPT_PATHS = ("/", "/metrics")
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        retry_after = str(db_manager.settings.retry_after)
+        if db_manager.overloaded:
+            await self._reject(send, retry_after)
+            return
+        
+        state = {"overloaded": False}
+        token = request_pool_state.set(state)
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and state["overloaded"] and message["status"] >= 500:
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"retry-after"]
+                headers.append((b"retry-after", retry_after.encode()))
+                message = {**message, "status": 503, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_pool_state.reset(token)
+    
+    @staticmethod
+    async def _reject(send, retry_after: str):
+        body = b'{"detail":"Service overloaded, retry later"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+class ReplicaRoutingMiddleware:
+    """
+    Read from replicas for GET requests, and keep a client's reads behind its own writes.
+    
+    A successful write answers with the primary's WAL position, in the
+    X-Primary-LSN header and a primary_lsn cookie. A GET that sends
+    either back is only served by a replica that has replayed that far,
+    and by the primary until one has. Without PG_REPLICA_URLS this is a
+    pass-through.
+    """
+    
+    READ_METHODS = ("GET", "HEAD")
+    WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+    COOKIE = "primary_lsn"
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not db_manager.replicas:
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        if method in self.READ_METHODS:
+            token = request_read_routing.set({"min_lsn": self._session_lsn(scope), "replica": None})
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                request_read_routing.reset(token)
+            return
+        if method not in self.WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                lsn = await db_manager.primary_lsn()
+                cookie = (
+                    f"{self.COOKIE}={lsn}; Max-Age={db_manager.settings.read_your_writes_ttl}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"x-primary-lsn", str(lsn).encode()))
+                headers.append((b"set-cookie", cookie.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+    
+    @classmethod
+    def _session_lsn(cls, scope) -> int:
+        """The newest WAL position the client has written, from its header or cookie; 0 if none"""
+        lsn = 0
+        for name, value in scope["headers"]:
+            if name == b"x-primary-lsn":
+                candidate = value.decode("latin-1")
+            elif name == b"cookie":
+                morsel = SimpleCookie(value.decode("latin-1")).get(cls.COOKIE)
+                candidate = morsel.value if morsel else ""
+            else:
+                continue
+            if candidate.isdigit():
+                lsn = max(lsn, int(candidate))
+        return lsn
+
+class LoaderScopeMiddleware:
+    """
+    Give every GET request its own DataLoaders.
+    
+    ID lookups made concurrently within the request are fetched with one
+    query, and each row once. Other methods get no scope: a request that
+    writes could otherwise read back rows fetched before its write.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        with loader_scope():
+            await self.app(scope, receive, send)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Union, Literal
 from datetime import datetime
 
 # Database Table Models
@@ -112,13 +112,114 @@ class TableField(TableFieldBase):
     class Config:
         from_attributes = True
 
+class TableFieldBulkUpdate(TableFieldUpdate):
+    table_wise_field_id: int
+
+# Project Tree Models
+class TableWithFields(Table):
+    fields: List[TableField]
+
+class ProjectTree(Project):
+    tables: List[TableWithFields]
+
 # SQL Generation Models
 class SQLGenerationRequest(BaseModel):
     table_id: int
 
 class SQLGenerationResponse(BaseModel):
     query: str
+    dialect: str
+    queries: Dict[str, str]
+
+class ProjectSQLGenerationResponse(SQLGenerationResponse):
+    table_order: List[str]
+    deferred_constraints: List[str]
+
+# Migration Models
+class ColumnRename(BaseModel):
+    from_: str = Field(..., alias="from")
+    to: str
+
+class TableChange(BaseModel):
+    table_id: int
+    table: str
+    action: Literal["create", "alter", "drop"]
+    renamed_from: Optional[str] = None
+    added_columns: List[str]
+    dropped_columns: List[str]
+    renamed_columns: List[ColumnRename]
+    altered_columns: List[str]
+    primary_key_changed: bool
+    added_foreign_keys: List[str]
+    dropped_foreign_keys: List[str]
+
+class MigrationResponse(SQLGenerationResponse):
+    changes: List[TableChange]
+    # When the snapshot diffed against was recorded; None if there was none
+    snapshot_at: Optional[datetime] = None
+    recorded: bool
+
+# Batch Models
+MAX_BATCH_OPERATIONS = 500
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    resource: Literal["project", "table", "field"]
+    # An ID, or "$<ref>" for the row of an earlier operation
+    id: Optional[Union[int, str]] = None
+    data: Dict[str, Any] = {}
+    # Label for this operation's row; "$<ref>" in a later id or *_id value resolves to it
+    ref: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+class BatchResult(BaseModel):
+    index: int
+    op: str
+    resource: str
+    id: int
+    data: Optional[Dict[str, Any]] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
+
+# Search Models
+class SearchResult(BaseModel):
+    type: Literal["project", "table", "field"]
+    id: int
+    name: str
+    # project_description, table_description or field_label
+    description: Optional[str] = None
+    score: float
+    project_id: int
+    project_name: str
+    # The table itself for tables, the field's table for fields, None for projects
+    table_id: Optional[int] = None
+    table_name: Optional[str] = None
 
 # Table Name Response
 class TableNameResponse(BaseModel):
-    table_name: str 
\ No newline at end of file
+    table_name: str 
+
+# Generation Job Models
+class GenerationRequest(BaseModel):
+    # Defaults to the dialect of the project's database
+    dialects: Optional[List[str]] = None
+    # Optional outputs besides the DDL scripts: "models", "crud"
+    scaffold: List[str] = []
+
+class GenerationJob(BaseModel):
+    job_id: int
+    project_id: int
+    status: Literal["queued", "running", "succeeded", "failed"]
+    options: Dict[str, Any]
+    output_path: Optional[str] = None
+    tables_total: int
+    tables_done: int
+    files_written: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
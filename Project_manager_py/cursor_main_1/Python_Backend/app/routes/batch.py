@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException
+from ..models.database_models import BatchRequest, BatchResponse
+from ..database.batch import BatchError, execute_batch
+
+router = APIRouter(prefix="/api", tags=["Batch"])
+
+@router.post("/batch", response_model=BatchResponse)
+async def run_batch(batch: BatchRequest):
+    """Apply an ordered list of project, table and field operations in one transaction"""
+    try:
+        results = await execute_batch([operation.dict() for operation in batch.operations])
+        return {"results": results}
+    except BatchError as e:
+        raise HTTPException(status_code=e.status_code, detail={"index": e.index, "message": str(e)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch failed: {str(e)}")
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from ..change_feed import change_feed
+
+router = APIRouter(prefix="/api", tags=["Changes"])
+
+@router.get("/changes")
+async def stream_changes(project_id: Optional[int] = Query(None, description="Only send changes to this project")):
+    """Stream project, table and field changes as Server-Sent Events"""
+    return StreamingResponse(
+        change_feed.stream(project_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List
-from ..models.database_models import TableField, TableFieldCreate, TableFieldUpdate
-from ..database.operations import DatabaseOperations
+from ..models.database_models import TableField, TableFieldCreate, TableFieldUpdate, TableFieldBulkUpdate
+from ..database.operations import DatabaseOperations, BulkValidationError, TABLE_FIELD_COLUMNS
+from .pagination import ListParams, paginated_response
 
 router = APIRouter(prefix="/api/fields", tags=["Fields"])
 
 @router.get("/", response_model=List[TableField])
-async def get_fields(table_id: int = Query(..., description="Table ID to filter fields")):
+async def get_fields(table_id: int = Query(..., description="Table ID to filter fields"),
+                     params: ListParams = Depends()):
     """Get all fields for a table"""
+    columns = params.projection(TABLE_FIELD_COLUMNS)
     try:
-        fields = await DatabaseOperations.get_fields_by_table(table_id)
-        return fields
+        page = await DatabaseOperations.get_fields_by_table_json(table_id, columns, params.cursor, params.limit)
+        total = await DatabaseOperations.count_fields_by_table(table_id) if params.include_total else None
+        return paginated_response(page, params, total)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -36,6 +40,28 @@ async def create_field(field: TableFieldCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create field: {str(e)}")
 
+@router.post("/bulk", response_model=List[TableField], status_code=201)
+async def create_fields_bulk(fields: List[TableFieldCreate]):
+    """Create many fields in one transaction"""
+    try:
+        return await DatabaseOperations.create_fields_bulk([field.dict() for field in fields])
+    except BulkValidationError as e:
+        raise HTTPException(status_code=422, detail={"message": str(e), "items": e.errors})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create fields: {str(e)}")
+
+@router.put("/bulk", response_model=List[TableField])
+async def update_fields_bulk(fields: List[TableFieldBulkUpdate]):
+    """Update many fields in one transaction"""
+    try:
+        # Filter out None values, as for single-field updates
+        updates = [{k: v for k, v in field.dict().items() if v is not None} for field in fields]
+        return await DatabaseOperations.update_fields_bulk(updates)
+    except BulkValidationError as e:
+        raise HTTPException(status_code=422, detail={"message": str(e), "items": e.errors})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update fields: {str(e)}")
+
 @router.put("/{field_id}", response_model=TableField)
 async def update_field(field_id: int, field: TableFieldUpdate):
     """Update a field"""
@@ -1,14 +1,31 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Dict, Any
 from ..database.operations import DatabaseOperations
+from ..database.datatype_registry import datatype_registry
 
 router = APIRouter(prefix="/api", tags=["General"])
 
+MAX_TABLE_NAME_IDS = 1000
+
 @router.get("/gettablename")
-async def get_table_name(table_id: int = Query(..., description="Table ID")):
-    """Get table name by table ID"""
+async def get_table_name(table_id: str = Query(..., description="Table ID, or comma-separated table IDs")):
+    """
+    Get table names by table ID.
+    
+    One ID returns {"table_name": ...}, or 404 if there is no such table.
+    Comma-separated IDs return {"table_names": {id: name}} from a single
+    query, with null for IDs that do not exist.
+    """
+    try:
+        table_ids = [int(part) for part in table_id.split(',') if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="table_id must be an integer or comma-separated integers")
+    if not table_ids or len(table_ids) > MAX_TABLE_NAME_IDS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_TABLE_NAME_IDS} table IDs are allowed")
     try:
-        table_name = await DatabaseOperations.get_table_name(table_id)
+        if ',' in table_id:
+            return {"table_names": await DatabaseOperations.get_table_names(table_ids)}
+        table_name = await DatabaseOperations.get_table_name(table_ids[0])
         if not table_name:
             raise HTTPException(status_code=404, detail="Table not found")
         return {"table_name": table_name}
@@ -24,4 +41,13 @@ async def get_datatypes():
         datatypes = await DatabaseOperations.get_all_datatypes()
         return datatypes
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}") 
+
+@router.post("/datatype/invalidate")
+async def invalidate_datatypes():
+    """Reload the cached field datatypes from the database"""
+    try:
+        count = await datatype_registry.load()
+        return {"message": "Datatype registry reloaded", "count": count}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to reload datatypes: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException
+from ..models.database_models import GenerationJob
+from ..database.generation_jobs import generation_workers
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+@router.get("/{job_id}", response_model=GenerationJob)
+async def get_job(job_id: int):
+    """A generation job's status; tables_done counts up to tables_total while it runs"""
+    try:
+        job = await generation_workers.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,47 @@
+from fastapi import HTTPException, Query, Response
+from typing import List, Optional, Sequence
+from ..database.operations import JSONPage
+
+MAX_PAGE_SIZE = 1000
+
+class ListParams:
+    """Keyset pagination, projection and count options shared by list endpoints"""
+    
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of rows to return"),
+        cursor: Optional[int] = Query(None, description="Return rows after this ID (from X-Next-Cursor)"),
+        fields: Optional[str] = Query(None, description="Comma-separated columns to return; the ID is always included"),
+        include_total: bool = Query(False, description="Return the total row count in X-Total-Count"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+        self.include_total = include_total
+    
+    def projection(self, allowed: Sequence[str]) -> Optional[List[str]]:
+        """Validate the requested columns; the first allowed column is the key and always included"""
+        if not self.fields:
+            return None
+        requested = [name.strip() for name in self.fields.split(',') if name.strip()]
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+            )
+        return [name for name in allowed if name == allowed[0] or name in requested]
+
+def paginated_response(page: JSONPage, params: ListParams, total: Optional[int] = None) -> Response:
+    """
+    Return a page of Postgres-built JSON as-is, with X-Next-Cursor / X-Total-Count headers.
+    
+    The body is sent without decoding or response_model validation; the
+    rows come straight from the table the route's model describes.
+    """
+    headers = {}
+    if params.limit is not None and page.row_count == params.limit:
+        headers["X-Next-Cursor"] = str(page.last_key)
+    if total is not None:
+        headers["X-Total-Count"] = str(total)
+    return Response(content=page.body, media_type="application/json", headers=headers)
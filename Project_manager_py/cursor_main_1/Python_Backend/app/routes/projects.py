@@ -1,19 +1,37 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from ..models.database_models import Project, ProjectCreate, ProjectUpdate
-from ..database.operations import DatabaseOperations
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from ..models.database_models import Project, ProjectCreate, ProjectUpdate, ProjectTree, GenerationRequest, GenerationJob
+from ..database.operations import DatabaseOperations, PROJECT_COLUMNS
+from ..database.project_transfer import export_project, import_project, iter_ndjson
+from ..database.schema_import import parse_script, introspect_database, import_schema
+from ..database.generation_jobs import generation_workers
+from .pagination import ListParams, paginated_response
 
 router = APIRouter(prefix="/api/project", tags=["Projects"])
 
 @router.get("/", response_model=List[Project])
-async def get_projects():
+async def get_projects(params: ListParams = Depends()):
     """Get all projects"""
+    columns = params.projection(PROJECT_COLUMNS)
     try:
-        projects = await DatabaseOperations.get_all_projects()
-        return projects
+        page = await DatabaseOperations.get_all_projects_json(columns, params.cursor, params.limit)
+        total = await DatabaseOperations.count_projects() if params.include_total else None
+        return paginated_response(page, params, total)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.post("/import", status_code=201)
+async def import_project_ndjson(request: Request,
+                                project_name: Optional[str] = Query(None, description="Override the imported project's name")):
+    """Import a project exported by /api/project/{id}/export, remapping all IDs"""
+    try:
+        return await import_project(iter_ndjson(request.stream()), project_name)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid import stream: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to import project: {str(e)}")
+
 @router.get("/{project_id}", response_model=Project)
 async def get_project(project_id: int):
     """Get project by ID"""
@@ -27,6 +45,42 @@ async def get_project(project_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.get("/{project_id}/tree", response_model=ProjectTree)
+async def get_project_tree(project_id: int):
+    """Get a project with its tables and fields nested, built in a single query"""
+    try:
+        tree = await DatabaseOperations.get_project_tree_json(project_id)
+        if tree is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        # Postgres already produced the JSON; pass it through without re-parsing
+        return Response(content=tree, media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/{project_id}/export")
+async def export_project_ndjson(project_id: int):
+    """Stream a project with its tables and fields as NDJSON"""
+    lines = export_project(project_id)
+    try:
+        first = await lines.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=404, detail="Project not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export project: {str(e)}")
+    
+    async def body():
+        yield first
+        async for line in lines:
+            yield line
+    
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="project_{project_id}.ndjson"'}
+    )
+
 @router.post("/", response_model=Project, status_code=201)
 async def create_project(project: ProjectCreate):
     """Create a new project"""
@@ -64,4 +118,71 @@ async def delete_project(project_id: int):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to delete project: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to delete project: {str(e)}") 
+
+@router.post("/{project_id}/import-sql", status_code=201)
+async def import_sql_script(project_id: int, request: Request):
+    """
+    Create tables and fields from a SQL script's CREATE TABLE statements.
+    
+    The body is the script itself (e.g. a pg_dump or mysqldump schema),
+    parsed as it streams in. Foreign keys become field references.
+    """
+    try:
+        if not await DatabaseOperations.get_project_by_id(project_id):
+            raise HTTPException(status_code=404, detail="Project not found")
+        schema, statements = await parse_script(request.stream())
+        return {**await import_schema(project_id, schema), "statements": statements}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid SQL script: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to import SQL script: {str(e)}")
+
+@router.post("/{project_id}/import-database", status_code=201)
+async def import_database_schema(project_id: int,
+                                 schema: str = Query("public", description="Schema whose tables are imported"),
+                                 database: Optional[str] = Query(None, description="Database on the configured server; defaults to the backend's own")):
+    """Create tables and fields from the catalog of an existing Postgres database"""
+    try:
+        if not await DatabaseOperations.get_project_by_id(project_id):
+            raise HTTPException(status_code=404, detail="Project not found")
+        return await import_schema(project_id, await introspect_database(schema, database))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to import database schema: {str(e)}")
+
+@router.post("/{project_id}/generate", response_model=GenerationJob, status_code=202)
+async def generate_project_files(project_id: int, response: Response, generation: Optional[GenerationRequest] = None):
+    """
+    Queue a job that writes the project's DDL, and optional scaffolding, under its project_path.
+    
+    Returns the job to poll at Location. While a job of the project is
+    queued or running, that job is returned instead of a new one.
+    """
+    generation = generation or GenerationRequest()
+    try:
+        if not await DatabaseOperations.get_project_by_id(project_id):
+            raise HTTPException(status_code=404, detail="Project not found")
+        job, _ = await generation_workers.enqueue(project_id, generation.dialects, generation.scaffold)
+        response.headers["Location"] = f"/api/jobs/{job['job_id']}"
+        return job
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue generation: {str(e)}")
+
+@router.get("/{project_id}/jobs", response_model=List[GenerationJob])
+async def get_project_jobs(project_id: int,
+                           limit: int = Query(20, ge=1, le=100, description="Maximum number of jobs, newest first")):
+    """Get a project's most recent generation jobs"""
+    try:
+        return await generation_workers.list_for_project(project_id, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
+from ..models.database_models import SearchResult
+from ..database.operations import DatabaseOperations, SEARCH_DOCUMENTS, SEARCH_MIN_SCORE, SearchUnavailableError
+
+router = APIRouter(prefix="/api", tags=["Search"])
+
+MAX_SEARCH_LIMIT = 100
+# Deep pages cost more candidates per type; past this, narrow the search instead
+MAX_SEARCH_OFFSET = 1000
+
+@router.get("/search", response_model=List[SearchResult])
+async def search(response: Response,
+                 q: str = Query(..., min_length=2, max_length=200, description="Search term"),
+                 types: Optional[List[str]] = Query(None, alias="type", description="Result types to include; repeat for several"),
+                 project_id: Optional[int] = Query(None, description="Only search this project"),
+                 limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT, description="Maximum number of results"),
+                 offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET, description="Results to skip (from X-Next-Offset)"),
+                 min_score: float = Query(SEARCH_MIN_SCORE, ge=0, le=1, description="Lowest word similarity returned")):
+    """
+    Search project names, table names and descriptions, and field names, labels and display names.
+    
+    Results are ranked by trigram word similarity, so near misses such as
+    typos still match. X-Next-Offset is set when another page follows.
+    """
+    unknown = [result_type for result_type in types or [] if result_type not in SEARCH_DOCUMENTS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown types: {', '.join(unknown)}. Allowed: {', '.join(SEARCH_DOCUMENTS)}"
+        )
+    try:
+        results, more = await DatabaseOperations.search(q, types, project_id, limit, offset, min_score)
+        if more and offset + limit <= MAX_SEARCH_OFFSET:
+            response.headers["X-Next-Offset"] = str(offset + limit)
+        return results
+    except SearchUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
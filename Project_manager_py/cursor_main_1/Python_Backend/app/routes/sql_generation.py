@@ -1,16 +1,97 @@
-from fastapi import APIRouter, HTTPException, Query
-from ..models.database_models import SQLGenerationResponse
+from fastapi import APIRouter, HTTPException, Query, Header, Response
+from typing import Optional
+from ..models.database_models import SQLGenerationResponse, ProjectSQLGenerationResponse, MigrationResponse
 from ..database.operations import DatabaseOperations
+from ..generation.cache import SQLArtifact, sql_cache, etag_matches
+from ..generation.dialects import parse_dialects
+from ..generation.graph import schema_graph
 
 router = APIRouter(prefix="/api", tags=["SQL Generation"])
 
+DIALECT_DESCRIPTION = (
+    "Comma-separated dialects (postgresql, mysql, mongodb). "
+    "Defaults to the project's database"
+)
+
+def _parse_dialects(dialect: Optional[str]):
+    try:
+        return parse_dialects(dialect)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _artifact_response(artifact: SQLArtifact, if_none_match: Optional[str]) -> Response:
+    """Return the cached body, or 304 when the client already holds this version"""
+    headers = {"ETag": artifact.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, artifact.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=artifact.body, media_type="application/json", headers=headers)
+
 @router.get("/generate-sql", response_model=SQLGenerationResponse)
-async def generate_sql(table_id: int = Query(..., description="Table ID to generate SQL for")):
+async def generate_sql(table_id: int = Query(..., description="Table ID to generate SQL for"),
+                       dialect: Optional[str] = Query(None, description=DIALECT_DESCRIPTION),
+                       if_none_match: Optional[str] = Header(None)):
     """Generate SQL CREATE TABLE statement for a table"""
+    dialects = _parse_dialects(dialect)
     try:
-        sql_query = await DatabaseOperations.generate_sql(table_id)
-        return {"query": sql_query}
+        artifact = await DatabaseOperations.get_sql_artifact(table_id, dialects)
+        return _artifact_response(artifact, if_none_match)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate SQL: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to generate SQL: {str(e)}")
+
+@router.get("/projects/{project_id}/generate-sql", response_model=ProjectSQLGenerationResponse)
+async def generate_project_sql(project_id: int,
+                               dialect: Optional[str] = Query(None, description=DIALECT_DESCRIPTION),
+                               if_none_match: Optional[str] = Header(None)):
+    """Generate the CREATE TABLE script for a whole project, ordered by foreign key dependencies"""
+    dialects = _parse_dialects(dialect)
+    try:
+        artifact = await DatabaseOperations.get_project_sql_artifact(project_id, dialects)
+        return _artifact_response(artifact, if_none_match)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate SQL: {str(e)}")
+
+async def _migration(method, resource_id: int, dialect: Optional[str], record: bool):
+    dialects = _parse_dialects(dialect)
+    try:
+        return await method(resource_id, dialects, record=record)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate migration: {str(e)}")
+
+@router.get("/tables/{table_id}/migration", response_model=MigrationResponse)
+async def get_table_migration(table_id: int, dialect: Optional[str] = Query(None, description=DIALECT_DESCRIPTION)):
+    """Preview the ALTER statements from a table's last recorded migration to its current fields"""
+    return await _migration(DatabaseOperations.get_table_migration, table_id, dialect, record=False)
+
+@router.post("/tables/{table_id}/migration", response_model=MigrationResponse)
+async def record_table_migration(table_id: int,
+                                 dialect: Optional[str] = Query(None, description=DIALECT_DESCRIPTION)):
+    """Generate a table's migration and record its current schema as the new baseline"""
+    return await _migration(DatabaseOperations.get_table_migration, table_id, dialect, record=True)
+
+@router.get("/projects/{project_id}/migration", response_model=MigrationResponse)
+async def get_project_migration(project_id: int,
+                                dialect: Optional[str] = Query(None, description=DIALECT_DESCRIPTION)):
+    """Preview the migration of a whole project, including created and dropped tables"""
+    return await _migration(DatabaseOperations.get_project_migration, project_id, dialect, record=False)
+
+@router.post("/projects/{project_id}/migration", response_model=MigrationResponse)
+async def record_project_migration(project_id: int,
+                                   dialect: Optional[str] = Query(None, description=DIALECT_DESCRIPTION)):
+    """Generate a project's migration and record its current schema as the new baseline"""
+    return await _migration(DatabaseOperations.get_project_migration, project_id, dialect, record=True)
+
+@router.get("/generate-sql/cache")
+async def get_sql_cache_stats():
+    """Get generated SQL cache statistics"""
+    return sql_cache.stats()
+
+@router.get("/schema-graph/cache")
+async def get_schema_graph_stats():
+    """Get schema graph cache statistics"""
+    return schema_graph.stats()
\ No newline at end of file
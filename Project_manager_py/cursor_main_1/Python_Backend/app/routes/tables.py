@@ -1,16 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List
 from ..models.database_models import Table, TableCreate, TableUpdate
-from ..database.operations import DatabaseOperations
+from ..database.operations import DatabaseOperations, TABLE_COLUMNS
+from .pagination import ListParams, paginated_response
 
 router = APIRouter(prefix="/api/tables", tags=["Tables"])
 
 @router.get("/", response_model=List[Table])
-async def get_tables(project_id: int = Query(..., description="Project ID to filter tables")):
+async def get_tables(project_id: int = Query(..., description="Project ID to filter tables"),
+                     params: ListParams = Depends()):
     """Get all tables for a project"""
+    columns = params.projection(TABLE_COLUMNS)
     try:
-        tables = await DatabaseOperations.get_tables_by_project(project_id)
-        return tables
+        page = await DatabaseOperations.get_tables_by_project_json(project_id, columns, params.cursor, params.limit)
+        total = await DatabaseOperations.count_tables_by_project(project_id) if params.include_total else None
+        return paginated_response(page, params, total)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -0,0 +1,294 @@
+"""
+Load and latency benchmark for the API against a throwaway Postgres.
+
+Creates a scratch database, loads project_manager.sql into it, scales the
+sample data up to projects x tables x fields (each table's col_2 is a
+foreign key to the previous table's id, so generation has real ordering
+work), then drives the FastAPI app in-process through an ASGI client.
+Every endpoint runs at each concurrency level, except those answering 503
+(search without pg_trgm), which are listed as unavailable. The report is
+JSON with p50/p95/p99 latency and throughput per endpoint and concurrency,
+and it is meant to be diffed between commits; pass --baseline to add the
+ratios against an earlier report.
+
+Postgres comes from one of:
+    pgserver  a private server in a temporary directory
+    env       the server in the PG* variables; a pm_bench_* database is
+              created on it and dropped afterwards (needs CREATEDB)
+
+Usage (from Python_Backend):
+    pip install -r requirements-bench.txt
+    python -m benchmarks.bench_api --postgres pgserver --projects 20 --tables 20 --fields 15 \\
+        --concurrency 1 8 32 --requests 200 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import asyncpg
+import httpx
+
+from main import app
+
+SCHEMA_SQL = Path(__file__).resolve().parents[2] / "project_manager.sql"
+
+
+@asynccontextmanager
+async def throwaway_database(source):
+    """Yield PG* settings for an empty scratch database that is removed afterwards"""
+    server = None
+    if source == "pgserver":
+        try:
+            import pgserver
+        except ImportError:
+            raise SystemExit("--postgres pgserver needs the pgserver package (pip install -r requirements-bench.txt)")
+        server = pgserver.get_server(tempfile.mkdtemp(prefix="pm_bench_"), cleanup_mode="delete")
+        info = server.get_postmaster_info()
+        settings = {"PGHOST": str(info.socket_dir), "PGPORT": str(info.port),
+                    "PGUSER": "postgres", "PGPASSWORD": ""}
+    else:
+        settings = {name: os.environ[name] for name in ("PGHOST", "PGPORT", "PGUSER", "PGPASSWORD")
+                    if name in os.environ}
+    settings["PGDATABASE"] = f"pm_bench_{uuid.uuid4().hex[:8]}"
+    admin = await asyncpg.connect(
+        host=settings.get("PGHOST", "localhost"), port=int(settings.get("PGPORT", "5432")),
+        user=settings.get("PGUSER"), password=settings.get("PGPASSWORD"), database="postgres"
+    )
+    try:
+        await admin.execute(f'CREATE DATABASE "{settings["PGDATABASE"]}"')
+        try:
+            yield settings
+        finally:
+            await admin.execute(f'DROP DATABASE IF EXISTS "{settings["PGDATABASE"]}"')
+    finally:
+        await admin.close()
+        if server is not None:
+            server.cleanup()
+
+
+async def seed(conn, projects, tables, fields):
+    """Load the sample schema and scale it up; returns the seeded project and table IDs"""
+    await conn.execute(SCHEMA_SQL.read_text())
+    datatypes = await conn.fetchval("SELECT COUNT(*) FROM field_datatype")
+    project_ids = [row["project_id"] for row in await conn.fetch(
+        """INSERT INTO project_table (project_name, project_description, database_id, database_path, project_path)
+           SELECT 'bench_project_' || p, 'Benchmark project', (p % 3) + 1, '/bench/' || p, '/bench/' || p
+           FROM generate_series(1, $1) AS p
+           RETURNING project_id""",
+        projects
+    )]
+    table_ids = [row["table_id"] for row in await conn.fetch(
+        """INSERT INTO all_table (project_id, table_name, table_description)
+           SELECT p.project_id, 'table_' || t, 'Benchmark table'
+           FROM unnest($1::int[]) AS p (project_id) CROSS JOIN generate_series(1, $2) AS t
+           ORDER BY p.project_id, t
+           RETURNING table_id""",
+        project_ids, tables
+    )]
+    await conn.execute(
+        """INSERT INTO table_wise_field
+           (table_id, field_name, field_datatype_id, is_primary, field_label, display_name,
+            is_auto_increment, is_foreign_key)
+           SELECT t.table_id, CASE WHEN f = 1 THEN 'id' ELSE 'col_' || f END,
+                  CASE WHEN f = 1 THEN 1 ELSE (f % $3) + 1 END, f = 1,
+                  'Column ' || f, 'Column ' || f, f = 1, false
+           FROM unnest($1::int[]) AS t (table_id) CROSS JOIN generate_series(1, $2) AS f
+           ORDER BY t.table_id, f""",
+        table_ids, fields, datatypes
+    )
+    await conn.execute(
+        """WITH ordered AS (
+               SELECT table_id, lag(table_id) OVER (PARTITION BY project_id ORDER BY table_id) AS previous_id
+               FROM all_table WHERE project_id = ANY($1::int[])
+           )
+           UPDATE table_wise_field f
+           SET is_foreign_key = true, reference_table_id = o.previous_id,
+               reference_table_field_id = pk.table_wise_field_id
+           FROM ordered o
+           JOIN table_wise_field pk ON pk.table_id = o.previous_id AND pk.field_name = 'id'
+           WHERE f.table_id = o.table_id AND f.field_name = 'col_2'""",
+        project_ids
+    )
+    await conn.execute("ANALYZE")
+    return project_ids, table_ids
+
+
+# name -> request builder; builders get a seeded RNG and the seeded IDs
+ENDPOINTS = {
+    "GET /api/project/": lambda rng, ids: ("GET", "/api/project/", {"limit": 100}, None),
+    "GET /api/project/{id}": lambda rng, ids: ("GET", f"/api/project/{rng.choice(ids['projects'])}", None, None),
+    "GET /api/project/{id}/tree": lambda rng, ids: ("GET", f"/api/project/{rng.choice(ids['projects'])}/tree", None, None),
+    "GET /api/tables/": lambda rng, ids: ("GET", "/api/tables/", {"project_id": rng.choice(ids["projects"])}, None),
+    "GET /api/tables/{id}": lambda rng, ids: ("GET", f"/api/tables/{rng.choice(ids['tables'])}", None, None),
+    "GET /api/fields/": lambda rng, ids: ("GET", "/api/fields/", {"table_id": rng.choice(ids["tables"])}, None),
+    "GET /api/gettablename": lambda rng, ids: ("GET", "/api/gettablename", {"table_id": rng.choice(ids["tables"])}, None),
+    "GET /api/gettablename (50 IDs)": lambda rng, ids: (
+        "GET", "/api/gettablename", {"table_id": ",".join(str(rng.choice(ids["tables"])) for _ in range(50))}, None
+    ),
+    "GET /api/datatype": lambda rng, ids: ("GET", "/api/datatype", None, None),
+    "GET /api/generate-sql": lambda rng, ids: ("GET", "/api/generate-sql", {"table_id": rng.choice(ids["tables"])}, None),
+    "GET /api/projects/{id}/generate-sql": lambda rng, ids: (
+        "GET", f"/api/projects/{rng.choice(ids['projects'])}/generate-sql", None, None
+    ),
+    "GET /api/search": lambda rng, ids: (
+        "GET", "/api/search", {"q": rng.choice(["col_7", "table_12", "Column", "bench_project_3"])}, None
+    ),
+    "POST /api/fields/": lambda rng, ids: ("POST", "/api/fields/", None, {
+        "table_id": rng.choice(ids["tables"]),
+        "field_name": f"extra_{rng.randrange(10 ** 9)}",
+        "field_datatype_id": 2,
+        "is_primary": False,
+        "field_label": "Extra",
+    }),
+}
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of sorted samples"""
+    index = max(0, min(len(samples) - 1, int(round(q / 100 * len(samples))) - 1))
+    return samples[index]
+
+
+async def drive(client, build, ids, concurrency, requests, rng):
+    latencies, errors = [], 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, params, body = build(rng, ids)
+            start = time.perf_counter()
+            response = await client.request(method, url, params=params, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def compare(report, baseline):
+    """Ratios of this report to a baseline (above 1 means slower latency / higher throughput)"""
+    changes = {}
+    for endpoint, levels in report["results"].items():
+        for level, stats in levels.items():
+            before = baseline.get("results", {}).get(endpoint, {}).get(level)
+            if not before:
+                continue
+            changes.setdefault(endpoint, {})[level] = {
+                metric: round(stats[metric] / before[metric], 3)
+                for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms") if before[metric]
+            }
+    return changes
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    endpoints = args.endpoints or list(ENDPOINTS)
+    async with throwaway_database(args.postgres) as settings:
+        os.environ.update(settings)
+        conn = await asyncpg.connect(
+            host=settings.get("PGHOST", "localhost"), port=int(settings.get("PGPORT", "5432")),
+            user=settings.get("PGUSER"), password=settings.get("PGPASSWORD"), database=settings["PGDATABASE"]
+        )
+        try:
+            project_ids, table_ids = await seed(conn, args.projects, args.tables, args.fields)
+        finally:
+            await conn.close()
+        ids = {"projects": project_ids, "tables": table_ids}
+        rng = random.Random(args.seed)
+        results, unavailable = {}, {}
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for endpoint in endpoints:
+                    build = ENDPOINTS[endpoint]
+                    # A feature the server lacks (search without pg_trgm) answers 503 every time,
+                    # so it is reported as unavailable rather than timed
+                    method, url, params, body = build(rng, ids)
+                    probe = await client.request(method, url, params=params, json=body)
+                    if probe.status_code == 503:
+                        unavailable[endpoint] = probe.json().get("detail")
+                        print(f"{endpoint}: unavailable ({unavailable[endpoint]})", flush=True)
+                        continue
+                    # Warm caches and the pool before measuring
+                    await drive(client, build, ids, 1, args.warmup, rng)
+                    for level in args.concurrency:
+                        results.setdefault(endpoint, {})[str(level)] = await drive(
+                            client, build, ids, level, args.requests, rng
+                        )
+                        print(f"{endpoint} c={level}: {results[endpoint][str(level)]}", flush=True)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "postgres": args.postgres,
+            "scale": {"projects": args.projects, "tables_per_project": args.tables,
+                      "fields_per_table": args.fields},
+            "requests_per_level": args.requests,
+            "seed": args.seed,
+        },
+        "results": results,
+        "unavailable": unavailable,
+    }
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        report["compared_to"] = baseline.get("meta", {}).get("revision")
+        report["changes"] = compare(report, baseline)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--postgres", choices=("pgserver", "env"), default="pgserver")
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--tables", type=int, default=20, help="Tables per project")
+    parser.add_argument("--fields", type=int, default=15, help="Fields per table (at least 2)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+    if args.fields < 2:
+        parser.error("--fields must be at least 2")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark for bulk field creation against the single-row path.
+
+Imports the same N-column table twice: once with one create_field call
+per column (one request and pool checkout each in the API) and once with
+a single create_fields_bulk call, then reports wall time for both.
+
+Usage (from Python_Backend, PG* variables as for the API):
+    python -m benchmarks.bench_bulk_fields --columns 150 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.database.connection import db_manager
+from app.database.datatype_registry import datatype_registry
+from app.database.operations import DatabaseOperations
+
+
+def field_rows(table_id: int, columns: int):
+    return [
+        {
+            "table_id": table_id,
+            "field_name": f"col_{i}",
+            "field_datatype_id": (i % 8) + 1,
+            "is_primary": i == 0,
+            "field_label": f"Column {i}",
+        }
+        for i in range(columns)
+    ]
+
+
+async def run(columns, repeat):
+    await db_manager.create_pool()
+    await datatype_registry.load()
+    async with db_manager.pool.acquire() as conn:
+        database_id = await conn.fetchval("SELECT MIN(database_id) FROM database_table")
+        project_id = await conn.fetchval(
+            """INSERT INTO project_table (project_name, project_description, database_id)
+               VALUES ('bulk field benchmark', 'scratch', $1) RETURNING project_id""",
+            database_id
+        )
+    timings = {"single_row": [], "bulk": []}
+    try:
+        for _ in range(repeat):
+            for mode in timings:
+                table = await DatabaseOperations.create_table({
+                    "project_id": project_id,
+                    "table_name": f"bench_{mode}",
+                    "table_description": "benchmark",
+                })
+                rows = field_rows(table["table_id"], columns)
+                start = time.perf_counter()
+                if mode == "bulk":
+                    await DatabaseOperations.create_fields_bulk(rows)
+                else:
+                    for row in rows:
+                        await DatabaseOperations.create_field(row)
+                timings[mode].append(time.perf_counter() - start)
+    finally:
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute("DELETE FROM project_table WHERE project_id = $1", project_id)
+        await db_manager.close_pool()
+
+    results = {
+        mode: {
+            "columns": columns,
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "best_ms": min(samples) * 1000,
+        }
+        for mode, samples in timings.items()
+    }
+    results["speedup"] = results["single_row"]["mean_ms"] / results["bulk"]["mean_ms"]
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--columns", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.columns, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Regression benchmark for DatabaseOperations.generate_sql.
+
+Creates a scratch project with tables of increasing column counts, then
+counts the statements issued (round trips) and the wall time per call.
+The round-trip count (which includes the pool's reset statement on
+release) must stay constant regardless of column count.
+
+Usage (from Python_Backend, PG* variables as for the API):
+    python -m benchmarks.bench_generate_sql --columns 10 50 200 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import asyncpg
+from dotenv import load_dotenv
+
+from app.database.connection import db_manager
+from app.database.datatype_registry import datatype_registry
+from app.database.operations import DatabaseOperations
+
+load_dotenv()
+
+
+class QueryCounter:
+    """Counts statements executed on every pool connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, record):
+        self.count += 1
+
+
+async def create_scratch_table(conn, project_id: int, columns: int) -> int:
+    table_id = await conn.fetchval(
+        """INSERT INTO all_table (project_id, table_name, table_description)
+           VALUES ($1, $2, 'benchmark') RETURNING table_id""",
+        project_id, f"bench_{columns}_cols"
+    )
+    await conn.executemany(
+        """INSERT INTO table_wise_field
+           (table_id, field_name, field_datatype_id, is_primary, is_auto_increment)
+           VALUES ($1, $2, $3, $4, $5)""",
+        [
+            (table_id, f"col_{i}", (i % 8) + 1, i == 0, i == 0)
+            for i in range(columns)
+        ]
+    )
+    return table_id
+
+
+async def run(columns, repeat):
+    counter = QueryCounter()
+
+    async def init(conn):
+        conn.add_query_logger(counter)
+
+    db_manager.pool = await asyncpg.create_pool(
+        host=os.getenv("PGHOST", "localhost"),
+        user=os.getenv("PGUSER"),
+        password=os.getenv("PGPASSWORD"),
+        database=os.getenv("PGDATABASE"),
+        port=int(os.getenv("PGPORT", "5432")),
+        min_size=1,
+        max_size=10,
+        init=init
+    )
+    await datatype_registry.load()
+    results = []
+    async with db_manager.pool.acquire() as conn:
+        database_id = await conn.fetchval("SELECT MIN(database_id) FROM database_table")
+        project_id = await conn.fetchval(
+            """INSERT INTO project_table (project_name, project_description, database_id)
+               VALUES ('generate_sql benchmark', 'scratch', $1) RETURNING project_id""",
+            database_id
+        )
+    try:
+        for n in columns:
+            async with db_manager.pool.acquire() as conn:
+                table_id = await create_scratch_table(conn, project_id, n)
+
+            counter.count = 0
+            start = time.perf_counter()
+            for _ in range(repeat):
+                await DatabaseOperations.generate_sql(table_id)
+            elapsed = time.perf_counter() - start
+
+            results.append({
+                "columns": n,
+                "round_trips_per_call": counter.count / repeat,
+                "mean_ms": elapsed / repeat * 1000,
+            })
+    finally:
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute("DELETE FROM project_table WHERE project_id = $1", project_id)
+        await db_manager.close_pool()
+
+    print(json.dumps(results, indent=2))
+    round_trips = {r["round_trips_per_call"] for r in results}
+    if len(round_trips) != 1:
+        raise SystemExit(f"Round trips vary with column count: {sorted(round_trips)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--columns", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.columns, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
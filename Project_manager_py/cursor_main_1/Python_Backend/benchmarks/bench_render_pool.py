@@ -0,0 +1,132 @@
+"""
+Benchmark project rendering inline on the event loop against the process pool.
+
+Builds a synthetic project of N tables (no database needed) and renders
+its scripts and files for every dialect, with both scaffolds, inline and
+then with pools of increasing size. While each render runs, a probe task
+sleeping 1 ms at a time records how late the event loop wakes it: inline
+rendering blocks the loop for the whole render, the pool should keep the
+lag flat. Every pooled render must match the inline output exactly.
+
+Usage (from Python_Backend):
+    python -m benchmarks.bench_render_pool --tables 2000 5000 --processes 1 2 4 --repeat 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+
+from app.generation.render_pool import RenderPool
+from app.generation.schema import ColumnSchema, ForeignKeySchema, TableSchema, ProjectSchema
+
+DIALECTS = ["postgresql", "mysql", "mongodb"]
+SCAFFOLD = ["models", "crud"]
+
+# field_datatype columns for IDs 1-8, as seeded by project_manager.sql
+TYPE_MAPS = {
+    name: dict(enumerate(types, 1))
+    for name, types in {
+        "postgresql": ["bigint", "NUMERIC (15, 4)", "varchar(250)", "TEXT", "boolean", "date", "time", "bytea"],
+        "mysql": ["BIGINT", "DECIMAL(15,4)", "VARCHAR(250)", "TEXT", "BOOLEAN", "DATE", "TIME", "BLOB"],
+        "mongodb": ["NumberLong", "Decimal128", "String", "String", "Boolean", "Date", "String", "BinData"],
+    }.items()
+}
+
+
+def synthetic_schema(tables: int, columns: int) -> ProjectSchema:
+    """Tables in dependency order, each referencing an earlier one; every 10th key is deferred"""
+    rnd = random.Random(tables)
+    table_schemas = []
+    deferred = []
+    for table_id in range(1, tables + 1):
+        name = f"table_{table_id}"
+        fks = []
+        if table_id > 1:
+            reference_id = rnd.randint(1, table_id - 1)
+            fks.append(ForeignKeySchema(
+                f"fk_{name}_ref", table_id, name, "ref", reference_id, f"table_{reference_id}", "id"
+            ))
+        if table_id % 10 == 0 and table_id < tables:
+            deferred.append(ForeignKeySchema(
+                f"fk_{name}_next", table_id, name, "next", table_id + 1, f"table_{table_id + 1}", "id"
+            ))
+        names = ["id", "ref", "next"] + [f"col_{i}" for i in range(3, columns)]
+        table_schemas.append(TableSchema(
+            table_id=table_id,
+            name=name,
+            columns=tuple(
+                ColumnSchema(table_id * 1000 + i, column, (i % 8) + 1, i == 0, i == 0)
+                for i, column in enumerate(names)
+            ),
+            foreign_keys=tuple(fks),
+        ))
+    return ProjectSchema(1, "postgresql", tuple(table_schemas), tuple(deferred))
+
+
+async def measure(pool: RenderPool, schema: ProjectSchema, repeat: int):
+    """Mean render time and the event loop lag seen by a 1 ms probe while rendering"""
+    lags = []
+    stop = asyncio.Event()
+
+    async def probe():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    probe_task = asyncio.create_task(probe())
+    await asyncio.sleep(0.01)
+    lags.clear()
+    durations = []
+    rendered = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rendered = await pool.render(schema, DIALECTS, TYPE_MAPS, SCAFFOLD, with_files=True)
+        durations.append(time.perf_counter() - start)
+    stop.set()
+    await probe_task
+    lags.sort()
+    return rendered, {
+        "mean_ms": statistics.mean(durations) * 1000,
+        "loop_lag_p99_ms": lags[int(len(lags) * 0.99)] * 1000 if lags else None,
+        "loop_lag_max_ms": lags[-1] * 1000 if lags else None,
+        "probe_wakeups": len(lags),
+    }
+
+
+async def run(table_counts, columns, processes, repeat):
+    results = []
+    for tables in table_counts:
+        schema = synthetic_schema(tables, columns)
+        inline, stats = await measure(RenderPool(processes=0), schema, repeat)
+        results.append({"tables": tables, "processes": 0, **stats})
+        baseline = stats["mean_ms"]
+        for count in processes:
+            pool = RenderPool(processes=count, min_tables=0)
+            await pool.start()
+            try:
+                rendered, stats = await measure(pool, schema, repeat)
+            finally:
+                await pool.stop()
+            if rendered != inline:
+                raise SystemExit(f"Pool of {count} rendered {tables} tables differently from inline")
+            results.append({"tables": tables, "processes": count, **stats,
+                            "speedup": baseline / stats["mean_ms"]})
+    print(json.dumps({"cpus": os.cpu_count(), "results": results}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tables", type=int, nargs="+", default=[2000, 5000])
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.tables, args.columns, args.processes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark list responses: Postgres-built JSON against Records -> dicts -> models.
+
+Seeds one table with N fields and one project with M tables, then requests
+/api/fields and /api/tables through the ASGI app. The "before" numbers come
+from a copy of the previous handlers, which returned dicts for FastAPI to
+validate against response_model and encode; "after" is the live route,
+which passes the JSON text from Postgres through untouched.
+
+Usage (from Python_Backend, PG* variables as for the API):
+    pip install -r requirements-bench.txt
+    python -m benchmarks.bench_responses --fields 1000 --tables 500 --requests 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+from fastapi import FastAPI, Query
+
+from app.database.connection import db_manager
+from app.database.operations import DatabaseOperations
+from app.models.database_models import Table, TableField
+from main import app
+
+before_app = FastAPI()
+
+
+@before_app.get("/api/fields/", response_model=List[TableField])
+async def get_fields_before(table_id: int = Query(...)):
+    return await DatabaseOperations.get_fields_by_table(table_id)
+
+
+@before_app.get("/api/tables/", response_model=List[Table])
+async def get_tables_before(project_id: int = Query(...)):
+    return await DatabaseOperations.get_tables_by_project(project_id)
+
+
+async def seed(field_count, table_count):
+    async with db_manager.pool.acquire() as conn:
+        database_id = await conn.fetchval("SELECT MIN(database_id) FROM database_table")
+        project_id = await conn.fetchval(
+            """INSERT INTO project_table (project_name, project_description, database_id)
+               VALUES ('response benchmark', 'scratch', $1) RETURNING project_id""",
+            database_id
+        )
+        table_ids = [row["table_id"] for row in await conn.fetch(
+            """INSERT INTO all_table (project_id, table_name, table_description, is_generated, generated_date)
+               SELECT $1, 'bench_' || i, 'benchmark table', i % 2 = 0, now()
+               FROM generate_series(1, $2) AS i
+               RETURNING table_id""",
+            project_id, table_count
+        )]
+        await conn.execute(
+            """INSERT INTO table_wise_field (table_id, field_name, field_datatype_id, is_primary,
+                                             field_label, display_name, is_auto_increment, is_foreign_key)
+               SELECT $1, 'col_' || i, (i % 8) + 1, i = 1, 'Column ' || i, 'Column ' || i, i = 1, false
+               FROM generate_series(1, $2) AS i""",
+            min(table_ids), field_count
+        )
+    return project_id, min(table_ids)
+
+
+async def measure(target, url, params, requests):
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        size = len(response.content)
+        body = response.json()
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get(url, params=params)
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return body, {
+        "bytes": size,
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "best_ms": samples[0] * 1000,
+    }
+
+
+async def run(field_count, table_count, requests):
+    async with app.router.lifespan_context(app):
+        project_id, table_id = await seed(field_count, table_count)
+        results = {}
+        try:
+            for name, url, params in [
+                ("fields", "/api/fields/", {"table_id": table_id}),
+                ("tables", "/api/tables/", {"project_id": project_id}),
+            ]:
+                before_body, before = await measure(before_app, url, params, requests)
+                after_body, after = await measure(app, url, params, requests)
+                results[name] = {
+                    "rows": len(after_body),
+                    "identical": before_body == after_body,
+                    "before": before,
+                    "after": after,
+                    "speedup": before["mean_ms"] / after["mean_ms"],
+                }
+        finally:
+            async with db_manager.pool.acquire() as conn:
+                await conn.execute("DELETE FROM project_table WHERE project_id = $1", project_id)
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fields", type=int, default=1000)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.fields, args.tables, args.requests))
+
+
+if __name__ == "__main__":
+    main()
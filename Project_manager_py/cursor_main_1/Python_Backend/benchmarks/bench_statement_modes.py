@@ -0,0 +1,119 @@
+"""
+Benchmark CRUD throughput under each PG_STATEMENT_MODE.
+
+For every mode a fresh pool is opened and a fixed number of workers run
+the same create/read/update/delete cycle against DatabaseOperations.
+Reports pool start-up time (which includes preparing the registry in
+"prepared" mode), operations per second and per-operation latency.
+
+"pgbouncer" mode is measured directly against Postgres here; it shows the
+cost of unnamed statements, not the pooler's own overhead.
+
+Usage (from Python_Backend, PG* variables as for the API):
+    python -m benchmarks.bench_statement_modes --concurrency 8 --cycles 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.database.connection import STATEMENT_MODES, db_manager
+from app.database.datatype_registry import datatype_registry
+from app.database.operations import DatabaseOperations
+
+# Operations per cycle, used to turn cycle counts into operation rates
+CYCLE_OPERATIONS = 9
+
+
+async def cycle(project_id: int, worker: int, n: int):
+    table = await DatabaseOperations.create_table({
+        "project_id": project_id,
+        "table_name": f"bench_{worker}_{n}",
+        "table_description": "benchmark",
+    })
+    table_id = table["table_id"]
+    await DatabaseOperations.get_table_by_id(table_id)
+    field = await DatabaseOperations.create_field({
+        "table_id": table_id,
+        "field_name": "id",
+        "field_datatype_id": 1,
+        "is_primary": True,
+        "field_label": "ID",
+        "display_name": "ID",
+        "is_auto_increment": True,
+        "is_foreign_key": False,
+        "reference_table_id": None,
+        "reference_table_field_id": None,
+    })
+    await DatabaseOperations.get_field_by_id(field["table_wise_field_id"])
+    await DatabaseOperations.update_field(field["table_wise_field_id"], {**field, "field_label": "Key"})
+    await DatabaseOperations.get_table_name(table_id)
+    await DatabaseOperations.get_project_by_id(project_id)
+    await DatabaseOperations.delete_field(field["table_wise_field_id"])
+    await DatabaseOperations.delete_table(table_id)
+
+
+async def run_mode(mode, project_id, concurrency, cycles):
+    db_manager.settings.statement_mode = mode
+    start = time.perf_counter()
+    await db_manager.create_pool()
+    startup = time.perf_counter() - start
+    latencies = []
+
+    async def worker(index):
+        for n in range(cycles):
+            started = time.perf_counter()
+            await cycle(project_id, index, n)
+            latencies.append((time.perf_counter() - started) / CYCLE_OPERATIONS)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await db_manager.close_pool()
+    latencies.sort()
+    return {
+        "pool_startup_ms": startup * 1000,
+        "ops_per_second": len(latencies) * CYCLE_OPERATIONS / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+async def run(modes, concurrency, cycles):
+    await db_manager.create_pool()
+    await datatype_registry.load()
+    async with db_manager.pool.acquire() as conn:
+        database_id = await conn.fetchval("SELECT MIN(database_id) FROM database_table")
+        project_id = await conn.fetchval(
+            """INSERT INTO project_table (project_name, project_description, database_id)
+               VALUES ('statement mode benchmark', 'scratch', $1) RETURNING project_id""",
+            database_id
+        )
+    await db_manager.close_pool()
+    results = {"concurrency": concurrency, "cycles_per_worker": cycles}
+    configured_mode = db_manager.settings.statement_mode
+    try:
+        for mode in modes:
+            results[mode] = await run_mode(mode, project_id, concurrency, cycles)
+    finally:
+        db_manager.settings.statement_mode = configured_mode
+        await db_manager.create_pool()
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute("DELETE FROM project_table WHERE project_id = $1", project_id)
+        await db_manager.close_pool()
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=STATEMENT_MODES, default=list(STATEMENT_MODES))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--cycles", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.modes, args.concurrency, args.cycles))
+
+
+if __name__ == "__main__":
+    main()
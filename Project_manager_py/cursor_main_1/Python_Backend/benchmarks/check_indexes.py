@@ -0,0 +1,125 @@
+"""
+Check with EXPLAIN that the hot queries use the indexes from the migrations.
+
+Seeds a scratch database the same way bench_api does and runs EXPLAIN on
+each query twice: before the migrations, to show the scans they replace,
+and after them. It prints the scans found in each plan as JSON and exits
+with status 1 if a query does not use its expected index after migrating.
+
+The queries are the keyset list pages, the project generation reads, and
+the lookups Postgres's foreign key triggers run for ON DELETE CASCADE /
+SET NULL.
+
+Usage (from Python_Backend):
+    pip install -r requirements-bench.txt
+    python -m benchmarks.check_indexes --postgres pgserver --projects 200 --tables 20 --fields 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import asyncpg
+
+from app.database.migrate import migrate
+from app.database.operations import _list_query
+from app.database.queries import QUERIES
+from benchmarks.bench_api import seed, throwaway_database
+
+
+def hot_queries(project_id, table_id, field_id):
+    """(name, sql, args, expected index) for each query that must avoid a sequential scan"""
+    tables_sql, tables_args = _list_query("all_table", "table_id", None, "project_id", project_id, None, 100)
+    fields_sql, fields_args = _list_query(
+        "table_wise_field", "table_wise_field_id", None, "table_id", table_id, field_id, 100
+    )
+    return [
+        ("tables by project", tables_sql, tables_args, "idx_all_table_project_id"),
+        ("fields by table", fields_sql, fields_args, "idx_table_wise_field_table_id"),
+        ("project tables", QUERIES["generate.project_tables"], [project_id], "idx_all_table_project_id"),
+        ("project fields", QUERIES["generate.project_fields"], [project_id], "idx_table_wise_field_table_id"),
+        # The statements the foreign key triggers run when a parent row is deleted
+        ("cascade project -> tables", "DELETE FROM ONLY all_table WHERE $1 = project_id",
+         [project_id], "idx_all_table_project_id"),
+        ("cascade table -> fields", "DELETE FROM ONLY table_wise_field WHERE $1 = table_id",
+         [table_id], "idx_table_wise_field_table_id"),
+        ("set null reference table", "UPDATE ONLY table_wise_field SET reference_table_id = NULL "
+         "WHERE $1 = reference_table_id", [table_id], "idx_table_wise_field_reference_table_id"),
+        ("set null reference field", "UPDATE ONLY table_wise_field SET reference_table_field_id = NULL "
+         "WHERE $1 = reference_table_field_id", [field_id], "idx_table_wise_field_reference_table_field_id"),
+    ]
+
+
+def scans(plan):
+    """Scan nodes of a JSON plan as 'Node Type on relation [using index]'"""
+    found = []
+    if "Scan" in plan.get("Node Type", ""):
+        description = f"{plan['Node Type']} on {plan.get('Relation Name')}"
+        if plan.get("Index Name"):
+            description += f" using {plan['Index Name']}"
+        found.append(description)
+    for child in plan.get("Plans", []):
+        found.extend(scans(child))
+    return found
+
+
+async def explain_all(conn, queries):
+    plans = {}
+    for name, sql, args, _ in queries:
+        plan = json.loads(await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *args))
+        plans[name] = scans(plan[0]["Plan"])
+    return plans
+
+
+async def run(args):
+    async with throwaway_database(args.postgres) as settings:
+        os.environ.update(settings)
+        conn = await asyncpg.connect(
+            host=settings.get("PGHOST", "localhost"), port=int(settings.get("PGPORT", "5432")),
+            user=settings.get("PGUSER"), password=settings.get("PGPASSWORD"), database=settings["PGDATABASE"]
+        )
+        try:
+            project_ids, table_ids = await seed(conn, args.projects, args.tables, args.fields)
+            project_id = project_ids[len(project_ids) // 2]
+            table_id = table_ids[len(table_ids) // 2]
+            field_id = await conn.fetchval(
+                "SELECT MIN(table_wise_field_id) FROM table_wise_field WHERE table_id = $1", table_id
+            )
+            queries = hot_queries(project_id, table_id, field_id)
+            before = await explain_all(conn, queries)
+            await migrate()
+            await conn.execute("ANALYZE")
+            after = await explain_all(conn, queries)
+        finally:
+            await conn.close()
+
+    failures = [
+        name for name, _, _, index in queries
+        if not any(scan.endswith(f"using {index}") for scan in after[name])
+    ]
+    report = {
+        "scale": {"projects": args.projects, "tables_per_project": args.tables, "fields_per_table": args.fields},
+        "queries": {
+            name: {"expected_index": index, "before": before[name], "after": after[name], "ok": name not in failures}
+            for name, _, _, index in queries
+        },
+        "ok": not failures,
+    }
+    print(json.dumps(report, indent=2))
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--postgres", choices=("pgserver", "env"), default="pgserver")
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--tables", type=int, default=20, help="Tables per project")
+    parser.add_argument("--fields", type=int, default=10, help="Fields per table (at least 2)")
+    args = parser.parse_args()
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Check that generated PostgreSQL migrations run against a real database.
+
+For each case, the "before" tables are created in a scratch database by
+migrating from an empty snapshot, then the migration from "before" to
+"after" is run in a transaction. It prints each case's statements and
+outcome as JSON and exits with status 1 if a migration fails or leaves
+tables other than the "after" ones.
+
+Usage (from Python_Backend):
+    pip install -r requirements-bench.txt
+    python -m benchmarks.check_migrations --postgres pgserver
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+import asyncpg
+
+from app.generation.dialects import get_dialect
+from app.generation.diff import diff_project
+from app.generation.schema import ColumnSchema, ForeignKeySchema, TableSchema
+from benchmarks.bench_api import throwaway_database
+
+TYPES = {1: "bigint", 2: "varchar(250)"}
+
+
+def table(table_id, name, columns, foreign_keys=(), auto_increment=()):
+    """A table whose columns are (field_id, name, datatype_id, is_primary) tuples"""
+    return TableSchema(
+        table_id=table_id,
+        name=name,
+        columns=tuple(ColumnSchema(field_id, column, datatype_id, is_primary, column in auto_increment)
+                      for field_id, column, datatype_id, is_primary in columns),
+        foreign_keys=tuple(foreign_keys),
+    )
+
+
+CUSTOMERS = table(1, "customers", [(1, "id", 1, True), (2, "name", 2, False)])
+ORDERS = table(2, "orders", [(3, "id", 1, True), (4, "customer_id", 1, False)], [
+    ForeignKeySchema("fk_orders_customer_id", 2, "orders", "customer_id", 1, "customers", "id"),
+])
+ORDER_ITEMS = table(3, "order_items", [(5, "id", 1, True), (6, "order_id", 1, False)], [
+    ForeignKeySchema("fk_order_items_order_id", 3, "order_items", "order_id", 2, "orders", "id"),
+])
+ORDERS_WITHOUT_KEY = ORDERS._replace(foreign_keys=())
+TAGS = table(4, "tags", [(7, "id", 1, True), (8, "name", 2, False)], auto_increment=("id",))
+TAGS_WITHOUT_ID = table(4, "tags", [(8, "name", 2, False)])
+TAGS_MANUAL_ID = table(4, "tags", [(7, "id", 1, True), (8, "name", 2, False)])
+
+
+def by_id(*tables):
+    return {t.table_id: t for t in tables}
+
+
+# (name, before, after)
+CASES = [
+    ("create linked tables", {}, by_id(CUSTOMERS, ORDERS, ORDER_ITEMS)),
+    ("drop two linked tables together", by_id(CUSTOMERS, ORDERS), {}),
+    ("drop a chain of linked tables", by_id(CUSTOMERS, ORDERS, ORDER_ITEMS), by_id(CUSTOMERS)),
+    ("drop a referenced table", by_id(CUSTOMERS, ORDERS), by_id(ORDERS_WITHOUT_KEY)),
+    ("create an auto-increment column", {}, by_id(TAGS)),
+    ("add an auto-increment column", by_id(TAGS_WITHOUT_ID), by_id(TAGS)),
+    ("make a column auto-increment", by_id(TAGS_MANUAL_ID), by_id(TAGS)),
+    ("make a column manual", by_id(TAGS), by_id(TAGS_MANUAL_ID)),
+]
+
+
+async def check(conn, name, before, after):
+    dialect = get_dialect("postgresql")
+    setup = dialect.render_migration(diff_project({}, before), TYPES)
+    migration = dialect.render_migration(diff_project(before, after), TYPES)
+    result = {"case": name, "migration": migration.splitlines()}
+    tx = conn.transaction()
+    await tx.start()
+    try:
+        if before:
+            await conn.execute(setup)
+        await conn.execute(migration)
+        tables = {row["relname"] for row in await conn.fetch(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+        )}
+        expected = {t.name for t in after.values()}
+        result["ok"] = tables == expected
+        if not result["ok"]:
+            result["error"] = f"tables {sorted(tables)}, expected {sorted(expected)}"
+    except asyncpg.PostgresError as e:
+        result["ok"] = False
+        result["error"] = str(e)
+    finally:
+        await tx.rollback()
+    return result
+
+
+async def run(args):
+    async with throwaway_database(args.postgres) as settings:
+        conn = await asyncpg.connect(
+            host=settings.get("PGHOST", "localhost"), port=int(settings.get("PGPORT", "5432")),
+            user=settings.get("PGUSER"), password=settings.get("PGPASSWORD"), database=settings["PGDATABASE"]
+        )
+        try:
+            return [await check(conn, *case) for case in CASES]
+        finally:
+            await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--postgres", choices=("pgserver", "env"), default="pgserver")
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,61 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from app.database.connection import db_manager
-from app.routes import database, projects, tables, fields, sql_generation, general
+from app.database.datatype_registry import datatype_registry
+from app.database.migrate import migrate
+from app.change_feed import CHANGE_CHANNEL, change_feed
+from app.database.generation_jobs import JOB_CHANNEL, generation_workers
+from app.generation.graph import schema_graph
+from app.generation.render_pool import render_pool
+from app.metrics import RequestMetricsMiddleware
+from app.middleware import LoadSheddingMiddleware, ReplicaRoutingMiddleware, LoaderScopeMiddleware
+from app.routes import database, projects, tables, fields, sql_generation, general, metrics, batch, changes, search, jobs
 
 load_dotenv()
 
 app = FastAPI(title="Project Manager API")
 
-# CORS middleware
+# Batch the ID lookups of each GET request
+app.add_middleware(LoaderScopeMiddleware)
+
+# Send GET reads to replicas; writes and read-your-writes stay on the primary
+app.add_middleware(ReplicaRoutingMiddleware)
+
+# Shed load before requests queue on the pool
+app.add_middleware(LoadSheddingMiddleware)
+
+# CORS middleware, outside the others so their early responses (e.g. a shed 503) carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count", "X-Next-Offset", "X-Primary-LSN", "Retry-After"],
 )
 
+# Request timing middleware, outermost so it sees every response
+app.add_middleware(RequestMetricsMiddleware)
+
 @app.on_event("startup")
 async def startup():
+    if os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true":
+        await migrate()
     await db_manager.create_pool()
+    await datatype_registry.load()
+    await render_pool.start()
+    db_manager.listen(CHANGE_CHANNEL, change_feed.handle_notification)
+    # Keeps the schema graph current with writes made by other workers
+    db_manager.listen(CHANGE_CHANNEL, schema_graph.handle_notification)
+    db_manager.listen(JOB_CHANNEL, generation_workers.handle_notification)
+    await db_manager.start_listener()
+    await generation_workers.start()
 
 @app.on_event("shutdown")
 async def shutdown():
+    await generation_workers.stop()
+    await render_pool.stop()
+    await db_manager.stop_listener()
     await db_manager.close_pool()
 
 # Include routers
@@ -33,6 +67,11 @@ app.include_router(tables.router)
 app.include_router(fields.router)
 app.include_router(sql_generation.router)
 app.include_router(general.router)
+app.include_router(batch.router)
+app.include_router(changes.router)
+app.include_router(search.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,31 @@
+-- migrate: no-transaction
+-- Indexes behind the foreign keys created by project_manager.sql.
+--
+-- (parent, id) pairs serve both the per-parent list queries, which filter on
+-- the parent and page by ID, and the ON DELETE CASCADE lookups. The
+-- reference columns are mostly NULL, so their indexes only cover set rows;
+-- ON DELETE SET NULL looks them up by equality, which the partial index serves.
+--
+-- Built CONCURRENTLY so writes continue during the build. An interrupted
+-- build leaves an INVALID index behind, so each index is dropped first and
+-- the migration is safe to re-run.
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_project_table_database_id;
+CREATE INDEX CONCURRENTLY idx_project_table_database_id
+    ON project_table (database_id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_all_table_project_id;
+CREATE INDEX CONCURRENTLY idx_all_table_project_id
+    ON all_table (project_id, table_id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_table_wise_field_table_id;
+CREATE INDEX CONCURRENTLY idx_table_wise_field_table_id
+    ON table_wise_field (table_id, table_wise_field_id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_table_wise_field_reference_table_id;
+CREATE INDEX CONCURRENTLY idx_table_wise_field_reference_table_id
+    ON table_wise_field (reference_table_id) WHERE reference_table_id IS NOT NULL;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_table_wise_field_reference_table_field_id;
+CREATE INDEX CONCURRENTLY idx_table_wise_field_reference_table_field_id
+    ON table_wise_field (reference_table_field_id) WHERE reference_table_field_id IS NOT NULL;
@@ -0,0 +1,54 @@
+-- Publish every change to projects, tables and fields on the schema_changes
+-- channel, for the API's change feed and for other workers' caches.
+--
+-- Payloads carry the resource, operation, IDs and project, plus the new row
+-- for inserts and updates when it fits in NOTIFY's 8000 byte limit. Fields
+-- deleted by a cascade from their table cannot be traced to a project any
+-- more and go out with a null project_id; the table's own delete event covers
+-- them for per-project subscribers.
+
+CREATE OR REPLACE FUNCTION notify_schema_change() RETURNS trigger AS $$
+DECLARE
+    row_data jsonb;
+    event jsonb;
+    payload text;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+    event := jsonb_build_object('resource', TG_ARGV[0], 'op', lower(TG_OP), 'id', row_data -> TG_ARGV[1]);
+    IF TG_ARGV[0] = 'field' THEN
+        event := event || jsonb_build_object(
+            'table_id', row_data -> 'table_id',
+            'project_id', (SELECT project_id FROM all_table WHERE table_id = (row_data ->> 'table_id')::int)
+        );
+    ELSIF TG_ARGV[0] = 'table' THEN
+        event := event || jsonb_build_object('table_id', row_data -> 'table_id', 'project_id', row_data -> 'project_id');
+    ELSE
+        event := event || jsonb_build_object('project_id', row_data -> 'project_id');
+    END IF;
+    payload := event::text;
+    IF TG_OP <> 'DELETE' AND octet_length(payload) + octet_length(row_data::text) < 7900 THEN
+        payload := (event || jsonb_build_object('data', row_data))::text;
+    END IF;
+    PERFORM pg_notify('schema_changes', payload);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS project_table_notify ON project_table;
+CREATE TRIGGER project_table_notify
+    AFTER INSERT OR UPDATE OR DELETE ON project_table
+    FOR EACH ROW EXECUTE FUNCTION notify_schema_change('project', 'project_id');
+
+DROP TRIGGER IF EXISTS all_table_notify ON all_table;
+CREATE TRIGGER all_table_notify
+    AFTER INSERT OR UPDATE OR DELETE ON all_table
+    FOR EACH ROW EXECUTE FUNCTION notify_schema_change('table', 'table_id');
+
+DROP TRIGGER IF EXISTS table_wise_field_notify ON table_wise_field;
+CREATE TRIGGER table_wise_field_notify
+    AFTER INSERT OR UPDATE OR DELETE ON table_wise_field
+    FOR EACH ROW EXECUTE FUNCTION notify_schema_change('field', 'table_wise_field_id');
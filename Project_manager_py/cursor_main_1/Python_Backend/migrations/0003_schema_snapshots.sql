@@ -0,0 +1,15 @@
+-- The schema of each table as of its last recorded migration, which the
+-- migration endpoints diff the current fields against.
+--
+-- table_id deliberately has no foreign key: the snapshot of a deleted table
+-- is what lets the project migration emit its DROP TABLE. Snapshots go away
+-- with their project, or when the next project migration is recorded.
+
+CREATE TABLE IF NOT EXISTS schema_snapshot (
+    table_id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES project_table(project_id) ON DELETE CASCADE,
+    snapshot JSONB NOT NULL,
+    generated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_schema_snapshot_project_id ON schema_snapshot (project_id);
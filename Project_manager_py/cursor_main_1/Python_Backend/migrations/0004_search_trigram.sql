@@ -0,0 +1,29 @@
+-- migrate: no-transaction
+-- migrate: requires-extension pg_trgm
+-- Trigram indexes behind /api/search.
+--
+-- Each indexed expression is the text searched for one kind of result and
+-- must match SEARCH_DOCUMENTS in app/database/operations.py exactly.
+--
+-- GiST rather than GIN: search ranks by word similarity, and GiST returns
+-- rows in distance order (ORDER BY q <<-> document LIMIT n), so a page
+-- costs the same whether a term matches ten fields or a million. GIN can
+-- only filter, leaving every match to be scored and sorted.
+--
+-- Built CONCURRENTLY and dropped first, as in 0001.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_project_table_search;
+CREATE INDEX CONCURRENTLY idx_project_table_search
+    ON project_table USING gist (project_name gist_trgm_ops);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_all_table_search;
+CREATE INDEX CONCURRENTLY idx_all_table_search
+    ON all_table USING gist ((table_name || ' ' || coalesce(table_description, '')) gist_trgm_ops);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_table_wise_field_search;
+CREATE INDEX CONCURRENTLY idx_table_wise_field_search
+    ON table_wise_field USING gist (
+        (field_name || ' ' || coalesce(field_label, '') || ' ' || coalesce(display_name, '')) gist_trgm_ops
+    );
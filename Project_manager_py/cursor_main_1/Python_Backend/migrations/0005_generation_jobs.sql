@@ -0,0 +1,29 @@
+-- Background jobs that write a project's generated files under its
+-- project_path, queued by POST /api/project/{id}/generate.
+--
+-- Workers claim queued jobs with FOR UPDATE SKIP LOCKED and refresh
+-- heartbeat_at while they run; a running job whose heartbeat stops is
+-- failed by the next worker that looks. At most one job per project is
+-- queued or running at a time.
+
+CREATE TABLE IF NOT EXISTS generation_job (
+    job_id SERIAL PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES project_table(project_id) ON DELETE CASCADE,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+    options JSONB NOT NULL DEFAULT '{}',
+    output_path TEXT,
+    tables_total INTEGER NOT NULL DEFAULT 0,
+    tables_done INTEGER NOT NULL DEFAULT 0,
+    files_written INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_job_project_id ON generation_job (project_id, job_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_generation_job_active
+    ON generation_job (project_id) WHERE status IN ('queued', 'running');